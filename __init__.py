@@ -9,9 +9,10 @@ Manage Meerschaum environments with Compose.
 import pathlib
 
 from meerschaum.utils.typing import SuccessTuple, Optional, List, Any
-from meerschaum.plugins import add_plugin_argument, make_action, from_plugin_import
+from meerschaum.plugins import add_plugin_argument, make_action, from_plugin_import, post_sync_hook
 
 from .sync import sync
+from .utils.jobs import is_adaptive_jobs_env, record_job_sync
 
 __version__ = '2.3.5'
 required = ['python-dotenv', 'envyaml']
@@ -47,6 +48,11 @@ add_plugin_argument(
         "Exit before starting the background jobs. This is used by `mrsm compose run`."
     )
 )
+add_plugin_argument(
+    '--watch', action='store_true', help=(
+        "Keep `compose up` running and reconcile changes to the compose and environment files."
+    )
+)
 add_plugin_argument(
     '--isolated', action='store_true', help=(
         "Execute Meerschaum commands in subprocesses for best isolation."
@@ -54,6 +60,11 @@ add_plugin_argument(
 )
 
 
+### The generated sync jobs record their pipes' syncs for `sync:adaptive`.
+if is_adaptive_jobs_env():
+    post_sync_hook(record_job_sync)
+
+
 @make_action(daemon=False)
 def compose(
     action: Optional[List] = None,
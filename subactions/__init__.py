@@ -46,7 +46,11 @@ def _do_subaction(
     )
     from meerschaum.utils.warnings import dprint
 
-    get_env_dict = from_plugin_import('compose.utils.config', 'get_env_dict')
+    get_env_dict, is_compose_env = from_plugin_import(
+        'compose.utils.config',
+        'get_env_dict',
+        'is_compose_env',
+    )
     init = from_plugin_import('compose.utils', 'init')
     subaction_function = (
         _original_subaction_functions.get(
@@ -71,7 +75,7 @@ def _do_subaction(
             else {'config': config}
         )
     )
-    need_unload = 'MRSM__COMPOSE_CONFIG' not in os.environ
+    need_unload = not is_compose_env()
 
     old_plugins_names = get_plugins_names()
     old_plugins_to_unload = [
@@ -26,12 +26,12 @@ def _compose_down(
     """
     run_mrsm_command = from_plugin_import('compose.utils', 'run_mrsm_command')
     (
-        get_defined_pipes,
+        iter_defined_pipes,
         build_custom_connectors,
         instance_pipes_from_pipes_list,
     ) = from_plugin_import(
         'compose.utils.pipes',
-        'get_defined_pipes',
+        'iter_defined_pipes',
         'build_custom_connectors',
         'instance_pipes_from_pipes_list',
     )
@@ -49,7 +49,7 @@ def _compose_down(
         return True, "Success"
 
     _ = build_custom_connectors(compose_config)
-    pipes = [pipe for pipe in get_defined_pipes(compose_config) if pipe.id is not None]
+    pipes = [pipe for pipe in iter_defined_pipes(compose_config) if pipe.id is not None]
     if not pipes:
         return False, "No pipes to delete."
 
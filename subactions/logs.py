@@ -19,12 +19,33 @@ def _compose_logs(
 ) -> SuccessTuple:
     """
     Execute Meerschaum actions in the isolated environment.
+
+    Logs may be filtered by instance (e.g. `compose logs sql:main`)
+    to follow all of the shards of an instance's sync job.
     """
     from meerschaum.plugins import from_plugin_import
     run_mrsm_command = from_plugin_import('compose.utils', 'run_mrsm_command')
+    get_instances_jobs_names = from_plugin_import('compose.utils.jobs', 'get_instances_jobs_names')
+
+    instances_filter = (action or [])[1:]
+    jobs_names = (
+        [
+            job_name
+            for instance_keys, instance_jobs_names in get_instances_jobs_names(
+                compose_config,
+                instances_filter,
+            ).items()
+            for job_name in instance_jobs_names
+            if instance_keys in instances_filter
+        ]
+        if instances_filter
+        else []
+    )
+    if instances_filter and not jobs_names:
+        return False, f"No jobs for instance(s) {', '.join(instances_filter)}."
 
     success, msg = run_mrsm_command(
-        ['show', 'logs'] + (['--nopretty'] if nopretty else []),
+        ['show', 'logs'] + jobs_names + (['--nopretty'] if nopretty else []),
         compose_config,
         capture_output = False,
         debug = debug,
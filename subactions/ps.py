@@ -19,15 +19,44 @@ def _compose_ps(
 ) -> SuccessTuple:
     """
     Execute Meerschaum actions in the isolated environment.
+
+    Jobs may be filtered by instance (e.g. `compose ps sql:main`),
+    and the shards of an instance's sync job are shown together.
     """
     from meerschaum.plugins import from_plugin_import
+    from meerschaum.utils.warnings import info
     run_mrsm_command = from_plugin_import('compose.utils', 'run_mrsm_command')
-
-    success, msg = run_mrsm_command(
-        ['show', 'jobs'] + (['--nopretty'] if nopretty else []),
-        compose_config,
-        capture_output=False,
-        debug=debug,
-        _replace=False,
+    get_instances_jobs_names, are_sync_jobs_split = from_plugin_import(
+        'compose.utils.jobs',
+        'get_instances_jobs_names',
+        'are_sync_jobs_split',
     )
+
+    ### Only read the pipes when an instance's pipes are split across jobs.
+    instances_filter = (action or [])[1:]
+    if not instances_filter and not are_sync_jobs_split(compose_config):
+        return run_mrsm_command(
+            ['show', 'jobs'] + (['--nopretty'] if nopretty else []),
+            compose_config,
+            capture_output=False,
+            debug=debug,
+            _replace=False,
+        )
+
+    instances_jobs_names = get_instances_jobs_names(compose_config, instances_filter or None)
+    success, msg = True, "Success"
+    for instance_keys, jobs_names in instances_jobs_names.items():
+        if instances_filter and instance_keys not in instances_filter:
+            continue
+        if not nopretty:
+            info(f"Jobs for instance '{instance_keys}':")
+        success, msg = run_mrsm_command(
+            ['show', 'jobs'] + jobs_names + (['--nopretty'] if nopretty else []),
+            compose_config,
+            capture_output=False,
+            debug=debug,
+            _replace=False,
+        )
+        if not success:
+            break
     return success, msg
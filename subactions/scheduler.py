@@ -0,0 +1,428 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Define `mrsm compose scheduler` (the job for `sync:mode: scheduler`).
+"""
+
+import time
+import heapq
+import itertools
+from datetime import datetime, timezone
+from typing import Set
+
+import meerschaum as mrsm
+from meerschaum.utils.typing import SuccessTuple, Dict, Any, Optional, Union
+from meerschaum.utils.warnings import info, warn, dprint
+
+DEFAULT_MIN_SECONDS: float = 1.0
+
+### The `sync:args` which the scheduler handles itself (or which only apply to the CLI)
+### and are not passed to the pipes' syncs.
+SCHEDULER_IGNORED_SYNC_ARGS = [
+    'action', 'sub_args', 'sysargs', 'filtered_sysargs',
+    'loop', 'min_seconds', 'schedule', 'timeout_seconds',
+    'mrsm_instance', 'instance', 'connector_keys', 'metric_keys', 'location_keys', 'tags',
+    'name', 'daemon', 'rm', 'debug', 'force', 'yes', 'noask', 'nopretty', 'shell',
+]
+
+
+def _compose_scheduler(
+    compose_config: Dict[str, Any],
+    debug: bool = False,
+    **kw
+) -> SuccessTuple:
+    """
+    Sync all of the project's pipes from a single long-lived process.
+
+    The pipes and connectors are built once and shared between syncs.
+    Each pipe is queued by its next run time (from its `schedule`, or `min_seconds` after
+    its last sync finished, or its adaptive interval if `sync:adaptive` is set),
+    and due pipes are dispatched to a pool of `sync:workers`
+    using `sync:executor` (`thread`, `process`, or `async`).
+    A pipe which runs longer than its `job_timeout_seconds` (or `sync:timeout_seconds`)
+    is abandoned and rescheduled.
+    When more pipes are due than there are free workers, the pipes which have breached
+    their `max_lag` are synced first, then those with the highest `priority`,
+    then the pipes which have been due the longest.
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+    from meerschaum.plugins import from_plugin_import
+    build_custom_connectors, iter_defined_pipes, get_sync_group_defaults = from_plugin_import(
+        'compose.utils.pipes',
+        'build_custom_connectors',
+        'iter_defined_pipes',
+        'get_sync_group_defaults',
+    )
+    (
+        get_executor,
+        shutdown_executor,
+        get_num_workers,
+        get_timeout_seconds,
+        get_urgency_key,
+        get_adaptive_config,
+        get_adaptive_interval,
+        update_sync_history,
+        get_rows_synced,
+        EXECUTOR_TYPES,
+        CONNECTOR_WORKERS,
+        START_POLL_SECONDS,
+    ) = from_plugin_import(
+        'compose.sync',
+        'get_executor',
+        'shutdown_executor',
+        'get_num_workers',
+        'get_timeout_seconds',
+        'get_urgency_key',
+        'get_adaptive_config',
+        'get_adaptive_interval',
+        'update_sync_history',
+        'get_rows_synced',
+        'EXECUTOR_TYPES',
+        'CONNECTOR_WORKERS',
+        'START_POLL_SECONDS',
+    )
+    get_project_name = from_plugin_import('compose.utils.stack', 'get_project_name')
+
+    project_name = get_project_name(compose_config)
+    sync_config = compose_config.get('sync', {}) or {}
+    executor_type = sync_config.get('executor', None) or 'thread'
+    if executor_type not in EXECUTOR_TYPES:
+        return False, f"Invalid executor '{executor_type}' for the scheduler."
+
+    _ = build_custom_connectors(compose_config)
+    defaults = get_sync_group_defaults(compose_config)
+
+    ### The scheduler keeps every pipe, so build each pipe and its settings in a single pass
+    ### rather than also holding on to the pipes' metadata.
+    pipes, pipes_settings = [], []
+    for pipe_meta in iter_defined_pipes(compose_config, as_meta=True):
+        pipes.append(mrsm.Pipe(**pipe_meta))
+        pipes_settings.append({
+            **defaults,
+            **get_scheduler_compose_parameters(pipe_meta),
+        })
+    if not pipes:
+        return True, "No pipes to schedule."
+
+    triggers = [
+        get_schedule_trigger(settings['schedule'], pipe)
+        for settings, pipe in zip(pipes_settings, pipes)
+    ]
+    timeouts = [
+        get_timeout_seconds(settings, pipe, key='job_timeout_seconds')
+        for settings, pipe in zip(pipes_settings, pipes)
+    ]
+    workers = get_num_workers(
+        sync_config.get('workers', None),
+        len(pipes),
+        executor_type=executor_type,
+    )
+    connector_workers = sync_config.get('connector_workers', None) or CONNECTOR_WORKERS
+    adaptive_config = get_adaptive_config(sync_config.get('adaptive', None))
+
+    ### Abandoned syncs keep their workers, so leave room for every pipe with a timeout.
+    pool_workers = min(
+        len(pipes),
+        workers + len([timeout for timeout in timeouts if timeout is not None]),
+    )
+    max_running = workers
+
+    ### Entries are (monotonic run time, tiebreaker, pipe index).
+    counter = itertools.count()
+    queue = [(time.monotonic(), next(counter), pipe_ix) for pipe_ix in range(len(pipes))]
+    heapq.heapify(queue)
+    running = {}
+    connectors_running: Dict[str, int] = {}
+    abandoned = {}
+
+    ### Syncs record when they start running (rather than when they were submitted),
+    ### so time spent queued doesn't count against their timeouts.
+    start_times: Dict[int, float] = {}
+    abandoned_ixs: Set[int] = set()
+    success_times = [None for _ in pipes]
+    histories = [None for _ in pipes]
+    sync_kwargs = {
+        **get_sync_args_kwargs(sync_config),
+        **{
+            key: val
+            for key, val in kw.items()
+            if key in ('begin', 'end', 'params', 'chunksize', 'bounded')
+        },
+    }
+    sync_kwargs['debug'] = debug
+
+    def schedule_next_run(pipe_ix: int) -> None:
+        """
+        Queue the pipe's next run from its trigger, or its adaptive interval
+        (or `min_seconds`) from now.
+        """
+        trigger = triggers[pipe_ix]
+        if trigger is not None:
+            now = datetime.now(timezone.utc)
+            next_dt = trigger.next_after(now)
+            if next_dt is None:
+                info(f"{pipes[pipe_ix]} has no more scheduled runs.")
+                return
+            delay = max(0.0, (next_dt - now).total_seconds())
+        elif adaptive_config is not None:
+            delay = get_adaptive_interval(histories[pipe_ix], adaptive_config)
+        else:
+            delay = get_min_seconds(pipes_settings[pipe_ix]['min_seconds'], pipes[pipe_ix])
+
+        heapq.heappush(queue, (time.monotonic() + delay, next(counter), pipe_ix))
+
+    def has_free_connector_slot(pipe_ix: int) -> bool:
+        """
+        Return whether a pipe may be submitted without waiting on its connector
+        (only the async executor limits concurrency per connector).
+        """
+        if executor_type != 'async':
+            return True
+        connector_keys = str(pipes[pipe_ix].connector_keys)
+        return connectors_running.get(connector_keys, 0) < connector_workers
+
+    def release_pipe(future) -> int:
+        """
+        Remove a finished or abandoned sync from the running syncs and return its pipe index.
+        """
+        pipe_ix = running.pop(future)
+        connector_keys = str(pipes[pipe_ix].connector_keys)
+        connectors_running[connector_keys] = connectors_running.get(connector_keys, 1) - 1
+        return pipe_ix
+
+    def get_wait_timeout() -> Union[float, None]:
+        """
+        Return the number of seconds until the next pipe is due or a running pipe times out.
+        """
+        now = time.monotonic()
+        deadlines = [
+            (
+                start_times[pipe_ix] + timeouts[pipe_ix]
+                if pipe_ix in start_times
+                else now + START_POLL_SECONDS
+            )
+            for pipe_ix in running.values()
+            if timeouts[pipe_ix] is not None
+        ]
+        if queue and len(running) < max_running:
+            deadlines.append(queue[0][0])
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+
+    info(
+        f"Scheduling {len(pipes)} pipe" + ('s' if len(pipes) != 1 else '')
+        + f" for project '{project_name}' with {workers} {executor_type} worker"
+        + ('s' if workers != 1 else '') + '.'
+    )
+    executor = get_executor(executor_type, pool_workers)
+    try:
+        while queue or running:
+            now = time.monotonic()
+            due_entries = []
+            while queue and queue[0][0] <= now and len(running) < max_running:
+                due_entries.append(heapq.heappop(queue))
+
+            ### When the pool is saturated, sync the pipes which have breached `max_lag` first
+            ### and defer the pipes which are on time.
+            now_dt = datetime.now(timezone.utc)
+            due_entries.sort(
+                key=lambda entry: (
+                    get_urgency_key(
+                        pipes_settings[entry[2]],
+                        success_times[entry[2]],
+                        now_dt,
+                        pipes[entry[2]],
+                    ),
+                    entry[0],
+                    entry[1],
+                )
+            )
+            for due_entry in due_entries:
+                pipe_ix = due_entry[2]
+                if len(running) >= max_running or not has_free_connector_slot(pipe_ix):
+                    heapq.heappush(queue, due_entry)
+                    continue
+
+                ### Don't pile up syncs behind one which timed out and is still running.
+                if pipe_ix in abandoned and not abandoned[pipe_ix].done():
+                    if debug:
+                        dprint(f"{pipes[pipe_ix]} is still running, rescheduling.")
+                    schedule_next_run(pipe_ix)
+                    continue
+                _ = abandoned.pop(pipe_ix, None)
+                abandoned_ixs.discard(pipe_ix)
+                _ = start_times.pop(pipe_ix, None)
+
+                future = submit_pipe_sync(
+                    executor,
+                    executor_type,
+                    project_name,
+                    pipes[pipe_ix],
+                    pipe_ix,
+                    start_times,
+                    abandoned_ixs,
+                    **sync_kwargs
+                )
+                running[future] = pipe_ix
+                connector_keys = str(pipes[pipe_ix].connector_keys)
+                connectors_running[connector_keys] = connectors_running.get(connector_keys, 0) + 1
+
+            wait_timeout = get_wait_timeout()
+            if not running:
+                if wait_timeout is None:
+                    break
+                time.sleep(wait_timeout)
+                continue
+
+            done, _ = wait(running, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pipe_ix = release_pipe(future)
+                try:
+                    success, _, metrics = future.result()
+                except Exception as e:
+                    success, metrics = False, {}
+                    warn(f"Failed to sync {pipes[pipe_ix]} in a worker:\n{e}", stack=False)
+                if success:
+                    success_times[pipe_ix] = datetime.now(timezone.utc)
+                    if adaptive_config is not None:
+                        histories[pipe_ix] = update_sync_history(
+                            histories[pipe_ix],
+                            adaptive_config,
+                            metrics.get('duration', None),
+                            get_rows_synced(metrics),
+                        )
+                schedule_next_run(pipe_ix)
+
+            now = time.monotonic()
+            for future, pipe_ix in list(running.items()):
+                timeout = timeouts[pipe_ix]
+                start_time = start_times.get(pipe_ix, None)
+                if timeout is None or start_time is None or (now - start_time) < timeout:
+                    continue
+
+                ### Blocking syncs cannot be interrupted, so abandon the worker.
+                _ = release_pipe(future)
+                duration = now - start_time
+                future.cancel()
+                abandoned[pipe_ix] = future
+                abandoned_ixs.add(pipe_ix)
+                warn(
+                    f"{pipes[pipe_ix]} timed out after {round(duration, 2)} seconds.",
+                    stack=False,
+                )
+                schedule_next_run(pipe_ix)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        abandoned_ixs.update(running.values())
+        shutdown_executor(
+            executor,
+            abandoned=bool(running) or any(not future.done() for future in abandoned.values()),
+        )
+
+    return True, f"Stopped the scheduler for project '{project_name}'."
+
+
+def submit_pipe_sync(
+    executor: Any,
+    executor_type: str,
+    project_name: str,
+    pipe: mrsm.Pipe,
+    pipe_ix: int,
+    start_times: Dict[int, float],
+    abandoned: Set[int],
+    **kwargs: Any
+) -> Any:
+    """
+    Submit a pipe's sync to the executor, rebuilding it from its meta in worker processes.
+    The sync's start time is written to `start_times` once it begins running.
+    """
+    from meerschaum.plugins import from_plugin_import
+    _run_child, _sync_child, _sync_child_from_meta, _get_picklable_kwargs = from_plugin_import(
+        'compose.sync',
+        '_run_child',
+        '_sync_child',
+        '_sync_child_from_meta',
+        '_get_picklable_kwargs',
+    )
+    run_args = (start_times, abandoned, pipe_ix, _sync_child, project_name, pipe, pipe_ix)
+    if executor_type != 'process':
+        return executor.submit(_run_child, *run_args, **kwargs)
+
+    ### The process pool has a free worker for every submitted sync.
+    start_times[pipe_ix] = time.monotonic()
+
+    pipe_meta = {
+        **pipe.meta,
+        'parameters': pipe.get_parameters(apply_symlinks=False),
+        'temporary': pipe.temporary,
+    }
+    return executor.submit(
+        _sync_child_from_meta,
+        project_name,
+        pipe_meta,
+        pipe_ix,
+        **_get_picklable_kwargs(kwargs)
+    )
+
+
+def get_sync_args_kwargs(sync_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse the `sync:args` into keyword arguments for the pipes' syncs
+    (the same arguments the `sync pipes` jobs receive in jobs mode).
+    """
+    import shlex
+    from meerschaum._internal.arguments import parse_arguments
+    args = sync_config.get('args', None) or []
+    if isinstance(args, str):
+        args = shlex.split(args)
+    try:
+        sync_args = parse_arguments(['sync', 'pipes'] + [str(arg) for arg in args])
+    except (Exception, SystemExit) as e:
+        warn(f"Failed to parse sync:args {args}:\n{e}", stack=False)
+        return {}
+
+    return {
+        key: val
+        for key, val in sync_args.items()
+        if key not in SCHEDULER_IGNORED_SYNC_ARGS
+    }
+
+
+def get_scheduler_compose_parameters(pipe_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the compose-specific parameters from a pipe's metadata.
+    """
+    return (pipe_meta.get('parameters', None) or {}).get('compose', None) or {}
+
+
+def get_schedule_trigger(schedule: Optional[str], pipe: Optional[mrsm.Pipe] = None) -> Any:
+    """
+    Return a trigger (with a `next_after()` method) for a schedule string,
+    or `None` if the schedule is unset or invalid.
+    """
+    if not schedule:
+        return None
+
+    from meerschaum.utils.schedule import parse_schedule
+    try:
+        return parse_schedule(schedule)
+    except Exception as e:
+        warn(f"Invalid schedule for {pipe}: '{schedule}'\n{e}", stack=False)
+        return None
+
+
+def get_min_seconds(min_seconds: Any, pipe: Optional[mrsm.Pipe] = None) -> float:
+    """
+    Return the configured `min_seconds` as a float (defaulting to `DEFAULT_MIN_SECONDS`).
+    """
+    if min_seconds is None:
+        return DEFAULT_MIN_SECONDS
+    try:
+        return max(0.0, float(min_seconds))
+    except (TypeError, ValueError):
+        warn(f"Invalid min_seconds for {pipe}: {min_seconds}", stack=False)
+        return DEFAULT_MIN_SECONDS
@@ -7,11 +7,20 @@ Entrypoint to the `compose up` command.
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import meerschaum as mrsm
-from meerschaum.utils.typing import SuccessTuple, Dict, Any, List, Optional
+from meerschaum.utils.typing import SuccessTuple, Dict, Any, List, Optional, Tuple, Callable
+from typing import Iterable, Iterator
 from meerschaum.utils.warnings import info, warn, dprint
-from meerschaum.utils.misc import print_options
+from meerschaum.utils.misc import print_options, items_str
+
+### Changes to these sections require reconciling the entire project in watch mode.
+PROJECT_SECTIONS = ['root_dir', 'plugins_dir', 'project_name', 'isolation']
+
+### Pipes are reconciled (and registered) in chunks as they are generated,
+### so large `matrix:` or `include:` projects are never held in memory at once.
+RECONCILE_CHUNKSIZE: int = 1000
 
 
 def _compose_up(
@@ -21,6 +30,7 @@ def _compose_up(
     presync: bool = False,
     no_jobs: bool = False,
     sysargs: Optional[List[str]] = None,
+    watch: bool = False,
     debug: bool = False,
     **kw
 ) -> SuccessTuple:
@@ -28,25 +38,49 @@ def _compose_up(
     Bring up the configured Meerschaum stack.
     """
     from meerschaum.plugins import from_plugin_import
-    from meerschaum.utils.pipes import is_pipe_registered
+    from meerschaum.utils.formatting import print_tuple
+
+    ### Don't watch after a failed startup, so that the exit code reflects the failure.
+    if watch:
+        success, msg = _compose_up(
+            compose_config,
+            dry=dry,
+            presync=presync,
+            no_jobs=no_jobs,
+            sysargs=sysargs,
+            debug=debug,
+            **kw
+        )
+        if not success:
+            return success, msg
+        print_tuple((success, msg))
+        return watch_compose_up(
+            compose_config,
+            dry=dry,
+            no_jobs=no_jobs,
+            sysargs=sysargs,
+            debug=debug,
+            **kw
+        )
 
     run_mrsm_command = from_plugin_import('compose.utils', 'run_mrsm_command')
-    get_project_name = from_plugin_import('compose.utils.stack', 'get_project_name')
     check_and_install_plugins = from_plugin_import('compose.utils.plugins', 'check_and_install_plugins')
-    build_custom_connectors, get_defined_pipes, instance_pipes_from_pipes_list = from_plugin_import(
+    prestart_warm_workers = from_plugin_import('compose.utils.workers', 'prestart_warm_workers')
+    build_custom_connectors, iter_defined_pipes = from_plugin_import(
         'compose.utils.pipes',
         'build_custom_connectors',
-        'get_defined_pipes',
-        'instance_pipes_from_pipes_list',
+        'iter_defined_pipes',
     )
-    get_jobs_commands = from_plugin_import('compose.utils.jobs', 'get_jobs_commands')
-    config_has_changed = from_plugin_import('compose.utils.config', 'config_has_changed')
-    no_daemon_flags = (
-        ['--no-daemon']
-        if compose_config.get('isolation', None) == 'subprocess'
-        else []
+    get_cached_config_changes, get_pipe_affected_by_changes, write_config_cache = from_plugin_import(
+        'compose.utils.config',
+        'get_cached_config_changes',
+        'get_pipe_affected_by_changes',
+        'write_config_cache',
     )
 
+    ### Start the warm workers while the plugins and pipes are checked.
+    prestart_warm_workers(compose_config, debug=debug)
+
     success, msg = check_and_install_plugins(compose_config, debug=debug)
     if not success:
         return success, msg
@@ -57,32 +91,657 @@ def _compose_up(
         dprint("Compose: Built custom connectors:")
         mrsm.pprint(custom_connectors)
 
-    pipes = get_defined_pipes(compose_config, debug=debug)
-    instance_pipes = instance_pipes_from_pipes_list(pipes)
-    project_name = get_project_name(compose_config)
+    ### Run a verification pass before starting jobs for the pipes affected by changes
+    ### to their definitions, connectors, or plugins since the last `compose up`.
+    config_changes = get_cached_config_changes(compose_config)
+    if debug and config_changes is not None:
+        dprint("Compose: Changes since the last `compose up`:")
+        mrsm.pprint(config_changes)
+
+    ### Only keep the affected pipes (and counts) as the pipes stream through reconciliation.
+    instances_counts = {}
+    first_pipes = []
+    affected_pipes = []
+
+    def iter_pipes() -> Iterator[mrsm.Pipe]:
+        for pipe in iter_defined_pipes(compose_config, debug=debug):
+            instance_keys = str(pipe.instance_keys)
+            instances_counts[instance_keys] = instances_counts.get(instance_keys, 0) + 1
+            if not first_pipes:
+                first_pipes.append(pipe)
+            if (
+                not presync
+                and config_changes is not None
+                and get_pipe_affected_by_changes(pipe, config_changes)
+            ):
+                affected_pipes.append(pipe)
+            yield pipe
+
+    updated_pipes = reconcile_pipes(
+        iter_pipes(),
+        compose_config,
+        custom_connectors=custom_connectors,
+        presync=presync,
+        debug=debug,
+    )
+    num_pipes, num_instances = sum(instances_counts.values()), len(instances_counts)
+
+    if dry:
+        return True, (
+            f"Updated parameters for {num_pipes} pipe"
+            + ("s" if num_pipes != 1 else "")
+            + (" across " if num_instances != 1 else " on ")
+            + f"{num_instances} instance"
+            + ("s" if num_instances != 1 else "")
+            + "."
+        )
+
+    presync_pipes = (
+        updated_pipes
+        if presync or config_changes is None
+        else affected_pipes
+    )
+
+    ran_verification_sync = False
+    if presync_pipes:
+        ran_verification_sync = True
+        print_options(
+            presync_pipes,
+            header = (
+                f"Running initial syncs for {len(presync_pipes)} pipe"
+                + ('s' if len(presync_pipes) != 1 else '')
+                + ':'
+            ),
+        )
+        success, msg = run_initial_syncs(
+            presync_pipes,
+            compose_config,
+            sysargs,
+            debug = debug,
+            **kw
+        )
+        if not success:
+            return success, msg
+
+    try:
+        write_config_cache(compose_config)
+    except Exception as e:
+        warn(f"Failed to write the config cache:\n{e}", stack=False)
 
-    remote_instance_pipes = {
-        instance_keys: mrsm.get_pipes(
-            tags=[project_name],
-            instance=custom_connectors.get(instance_keys, instance_keys),
+    if no_jobs:
+        msg = (
+            (
+                f"Synced {len(presync_pipes)} pipe"
+                + ("s" if len(presync_pipes) != 1 else "")
+                + f" across {num_instances} instance"
+                + ("s" if num_instances != 1 else "")
+                + "."
+            )
+            if ran_verification_sync
+            else (
+                (
+                    f"Updated {len(updated_pipes)} pipe"
+                    + ("s" if len(updated_pipes) != 1 else "")
+                    + f" across {num_instances} instance"
+                    + "."
+                )
+                if updated_pipes
+                else "Nothing to do."
+            )
+        )
+        return True, msg
+
+    jobs_commands = start_jobs(compose_config, debug=debug)
+
+    if force:
+        run_mrsm_command(
+            ['show', 'logs'] + list(jobs_commands),
+            compose_config,
+            capture_output=False,
             debug=debug,
+            _replace=False,
         )
-        for instance_keys in instance_pipes
-    }
 
+    explicit_jobs = compose_config.get('jobs', {})
+    if explicit_jobs:
+        msg = (
+            f"Running {len(jobs_commands)} background job"
+            + ('s' if len(jobs_commands) != 1 else '')
+            + '.'
+        )
+    elif num_pipes == 1:
+        msg = f"Syncing {first_pipes[0]} in a background job."
+    else:
+        msg = (
+            f"Syncing {num_pipes} pipe" + ('s' if num_pipes != 1 else '')
+            + (" across " if num_instances != 1 else " on ")
+            + f"{num_instances} instance"
+            + ('s' if num_instances != 1 else '')
+            + (
+                f" in {len(jobs_commands)} job" + ('s' if len(jobs_commands) != 1 else '')
+                if len(jobs_commands) != num_instances
+                else ''
+            )
+            + "."
+        )
+
+    msg += (
+        "\nRun `mrsm compose logs` or pass `-f` to follow logs output."
+        if not force
+        else ''
+    )
+    return True, msg
+
+
+def reconcile_pipes(
+    pipes: Iterable[mrsm.Pipe],
+    compose_config: Dict[str, Any],
+    custom_connectors: Optional[Dict[str, Any]] = None,
+    presync: bool = False,
+    fetch_registry: bool = True,
+    debug: bool = False,
+) -> List[mrsm.Pipe]:
+    """
+    Reconcile the pipes in chunks of `RECONCILE_CHUNKSIZE` as they are generated.
+    Each chunk's instances are reconciled concurrently (one worker per instance),
+    and each instance's output is printed in order.
+
+    Parameters
+    ----------
+    pipes: Iterable[mrsm.Pipe]
+        The pipes to reconcile (e.g. from `iter_defined_pipes()`).
+
+    Returns
+    -------
+    The pipes which need to be synced, grouped by instance within each chunk.
+    """
+    from meerschaum.plugins import from_plugin_import
+    instance_pipes_from_pipes_list = from_plugin_import(
+        'compose.utils.pipes',
+        'instance_pipes_from_pipes_list',
+    )
+
+    ### The registries and defined keys of each instance are kept across chunks.
+    instances_states = {}
+    failed_instances = set()
+
+    def run_instances(submit: Callable[..., Any], instances_keys: List[str]) -> List[mrsm.Pipe]:
+        _updated_pipes = []
+        with ThreadPoolExecutor(max_workers=max(len(instances_keys), 1)) as executor:
+            futures = {
+                instance_keys: executor.submit(submit, instance_keys)
+                for instance_keys in instances_keys
+            }
+            for instance_keys, future in futures.items():
+                try:
+                    _instance_updated_pipes, output = future.result()
+                except Exception as e:
+                    warn(f"Failed to reconcile pipes on '{instance_keys}':\n{e}", stack=False)
+                    failed_instances.add(instance_keys)
+                    continue
+
+                for func, args, kwargs in output:
+                    func(*args, **kwargs)
+                _updated_pipes.extend(_instance_updated_pipes)
+        return _updated_pipes
+
+    updated_pipes = []
+    for chunk in iter_chunks(pipes, RECONCILE_CHUNKSIZE):
+        chunk_instance_pipes = instance_pipes_from_pipes_list(chunk)
+        updated_pipes.extend(run_instances(
+            lambda instance_keys: reconcile_instance_pipes(
+                instance_keys,
+                chunk_instance_pipes[instance_keys],
+                compose_config,
+                custom_connectors=custom_connectors,
+                presync=presync,
+                fetch_registry=fetch_registry,
+                state=instances_states.setdefault(instance_keys, {}),
+                untag_stale=False,
+                debug=debug,
+            ),
+            [
+                instance_keys
+                for instance_keys in chunk_instance_pipes
+                if instance_keys not in failed_instances
+            ],
+        ))
+
+    ### Only untag stale pipes once every defined pipe has been seen.
+    _ = run_instances(
+        lambda instance_keys: untag_stale_pipes(
+            instance_keys,
+            compose_config,
+            instances_states[instance_keys],
+            debug=debug,
+        ),
+        [
+            instance_keys
+            for instance_keys in instances_states
+            if instance_keys not in failed_instances
+        ],
+    )
+
+    return updated_pipes
+
+
+def iter_chunks(items: Iterable[Any], chunksize: int) -> Iterator[List[Any]]:
+    """
+    Yield lists of up to `chunksize` items from an iterable.
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def watch_compose_up(
+    compose_config: Dict[str, Any],
+    dry: bool = False,
+    no_jobs: bool = False,
+    sysargs: Optional[List[str]] = None,
+    debug: bool = False,
+    **kw
+) -> SuccessTuple:
+    """
+    Watch the compose, environment, and fragment files and reconcile changes until interrupted.
+    """
+    from meerschaum.plugins import from_plugin_import
+    from meerschaum.utils.formatting import print_tuple
+    init = from_plugin_import('compose.utils', 'init')
+    infer_compose_file_path, CONFIG_METADATA = from_plugin_import(
+        'compose.utils.config',
+        'infer_compose_file_path',
+        'CONFIG_METADATA',
+    )
+    watch_paths = from_plugin_import('compose.utils.watch', 'watch_paths')
+    get_fragments_paths = from_plugin_import('compose.utils.fragments', 'get_fragments_paths')
+
+    file, env_file = kw.get('file', None), kw.get('env_file', None)
+    compose_file_path = infer_compose_file_path(file)
+    env_file_path = compose_file_path.parent / (env_file or '.env')
+    get_paths = lambda _compose_config: (
+        [compose_file_path, env_file_path] + get_fragments_paths(_compose_config, debug=debug)
+    )
+
+    try:
+        paths = get_paths(compose_config)
+        while True:
+            info(f"Watching {items_str([path.as_posix() for path in paths])} for changes...")
+            for changed_paths in watch_paths(paths, debug=debug):
+                info(f"Detected changes to {items_str(sorted(path.name for path in changed_paths))}.")
+                CONFIG_METADATA.clear()
+                try:
+                    new_compose_config = init(
+                        file=file,
+                        env_file=env_file,
+                        isolated=kw.get('isolated', False),
+                        override_env=True,
+                        debug=debug,
+                    )
+                except Exception as e:
+                    warn(f"Failed to read the compose file:\n{e}", stack=False)
+                    continue
+
+                print_tuple(
+                    reconcile_config_changes(
+                        compose_config,
+                        new_compose_config,
+                        dry=dry,
+                        no_jobs=no_jobs,
+                        sysargs=sysargs,
+                        debug=debug,
+                        **kw
+                    )
+                )
+                compose_config = new_compose_config
+
+                ### Start watching again if fragments were added or removed.
+                new_paths = get_paths(compose_config)
+                if new_paths != paths:
+                    paths = new_paths
+                    break
+    except KeyboardInterrupt:
+        pass
+
+    return True, "Stopped watching for changes."
+
+
+def reconcile_config_changes(
+    old_compose_config: Dict[str, Any],
+    compose_config: Dict[str, Any],
+    dry: bool = False,
+    no_jobs: bool = False,
+    sysargs: Optional[List[str]] = None,
+    debug: bool = False,
+    **kw
+) -> SuccessTuple:
+    """
+    Reconcile only the pipes, connectors, and jobs which differ between two compose configurations.
+    Changes to sections which affect the entire project trigger a full `compose up`.
+    """
+    from meerschaum.plugins import from_plugin_import
+    from meerschaum.config import replace_config
+    from meerschaum.config.environment import replace_env
+    from meerschaum.config import get_config
+    (
+        get_env_dict,
+        get_config_hashes,
+        get_config_changes,
+        get_pipe_keys_affected_by_changes,
+        write_config_cache,
+    ) = from_plugin_import(
+        'compose.utils.config',
+        'get_env_dict',
+        'get_config_hashes',
+        'get_config_changes',
+        'get_pipe_keys_affected_by_changes',
+        'write_config_cache',
+    )
+    get_project_name = from_plugin_import('compose.utils.stack', 'get_project_name')
+    check_and_install_plugins = from_plugin_import('compose.utils.plugins', 'check_and_install_plugins')
+    build_custom_connectors, iter_defined_pipes, get_pipe_meta_keys = from_plugin_import(
+        'compose.utils.pipes',
+        'build_custom_connectors',
+        'iter_defined_pipes',
+        'get_pipe_meta_keys',
+    )
+
+    changes = get_config_changes(
+        get_config_hashes(old_compose_config),
+        get_config_hashes(compose_config),
+    )
+
+    ### Only build the pipes which were added, changed, or removed
+    ### or whose connectors or plugins changed.
+    default_instance = get_config('meerschaum', 'instance')
+    added_keys, changed_keys = set(changes['pipes']['added']), set(changes['pipes']['changed'])
+    removed_keys = set(changes['pipes']['removed'])
+    added_pipes, changed_pipes, affected_pipes = [], [], []
+    for pipe_meta in iter_defined_pipes(compose_config, as_meta=True):
+        pipe_keys = get_pipe_meta_keys(pipe_meta, default_instance)
+        if not get_pipe_keys_affected_by_changes(pipe_keys, changes):
+            continue
+        pipe = mrsm.Pipe(**pipe_meta)
+        affected_pipes.append(pipe)
+        if pipe_keys in added_keys:
+            added_pipes.append(pipe)
+        elif pipe_keys in changed_keys:
+            changed_pipes.append(pipe)
+    removed_pipes = [
+        mrsm.Pipe(**pipe_meta)
+        for pipe_meta in (
+            iter_defined_pipes(old_compose_config, as_meta=True)
+            if removed_keys
+            else []
+        )
+        if get_pipe_meta_keys(pipe_meta, default_instance) in removed_keys
+    ]
+    if not (changes['sections'] or changes['connectors'] or added_pipes or changed_pipes or removed_pipes):
+        return True, "Nothing changed."
+
+    if debug:
+        dprint("Compose: Config changes:")
+        mrsm.pprint(changes)
+
+    with replace_config(compose_config.get('config', {})):
+        with replace_env(get_env_dict(compose_config)):
+            project_sections = [key for key in changes['sections'] if key in PROJECT_SECTIONS]
+            if project_sections:
+                info(
+                    f"Changes to {items_str(project_sections)} affect the entire project, "
+                    + "reconciling all pipes..."
+                )
+                return _compose_up(
+                    compose_config,
+                    dry=dry,
+                    no_jobs=no_jobs,
+                    sysargs=sysargs,
+                    debug=debug,
+                    **kw
+                )
+
+            if 'plugins' in changes['sections']:
+                success, msg = check_and_install_plugins(compose_config, debug=debug)
+                if not success:
+                    return success, msg
+
+            custom_connectors = (
+                build_custom_connectors(compose_config, connectors_keys=changes['connectors'])
+                if changes['connectors']
+                else {}
+            )
+
+            project_name = get_project_name(compose_config)
+            for pipe in removed_pipes:
+                remote_pipe = mrsm.Pipe(**pipe.meta, **{'cache': False})
+                if remote_pipe.id is not None:
+                    untag_pipe(remote_pipe, project_name, debug=debug)
+
+            updated_pipes = reconcile_pipes(
+                added_pipes + changed_pipes,
+                compose_config,
+                custom_connectors=custom_connectors,
+                fetch_registry=False,
+                debug=debug,
+            )
+
+            ### Added and changed pipes are always affected, so this includes `updated_pipes`.
+            presync_pipes = affected_pipes
+            if presync_pipes and not dry:
+                success, msg = run_initial_syncs(
+                    presync_pipes,
+                    compose_config,
+                    sysargs,
+                    debug=debug,
+                    **kw
+                )
+                if not success:
+                    return success, msg
+
+            if not dry:
+                try:
+                    write_config_cache(compose_config)
+                except Exception as e:
+                    warn(f"Failed to write the config cache:\n{e}", stack=False)
+
+            if not dry and not no_jobs:
+                start_jobs(compose_config, debug=debug)
+
+    return True, (
+        f"Reconciled {len(added_pipes)} added, {len(changed_pipes)} changed, "
+        + f"and {len(removed_pipes)} removed pipe"
+        + ('s' if len(removed_pipes) != 1 else '')
+        + (
+            f" ({len(changes['connectors'])} changed connector"
+            + ('s' if len(changes['connectors']) != 1 else '')
+            + ")"
+            if changes['connectors']
+            else ''
+        )
+        + "."
+    )
+
+
+def start_jobs(compose_config: Dict[str, Any], debug: bool = False) -> Dict[str, List[str]]:
+    """
+    Start the project's jobs, only restarting jobs whose commands or config have changed
+    (or which aren't running).
+
+    Returns
+    -------
+    The jobs' commands from `get_jobs_commands()`.
+    """
+    from meerschaum.plugins import from_plugin_import
+    run_mrsm_command = from_plugin_import('compose.utils', 'run_mrsm_command')
+    (
+        get_jobs_commands,
+        get_job_fingerprint,
+        read_jobs_fingerprints,
+        write_jobs_fingerprints,
+        job_is_running,
+        get_job_env,
+    ) = from_plugin_import(
+        'compose.utils.jobs',
+        'get_jobs_commands',
+        'get_job_fingerprint',
+        'read_jobs_fingerprints',
+        'write_jobs_fingerprints',
+        'job_is_running',
+        'get_job_env',
+    )
+
+    jobs_commands = get_jobs_commands(compose_config)
+    old_jobs_fingerprints = read_jobs_fingerprints(compose_config)
+    jobs_fingerprints = {}
+    for job_name, job_command in jobs_commands.items():
+        fingerprint = get_job_fingerprint(job_command, compose_config)
+        if old_jobs_fingerprints.get(job_name, None) == fingerprint and job_is_running(job_name):
+            info(f"Job '{job_name}' is unchanged.")
+            jobs_fingerprints[job_name] = fingerprint
+            continue
+
+        info(f"Starting job '{job_name}'...")
+        run_mrsm_command(
+            ['delete', 'job', job_name, '-f'],
+            compose_config,
+            capture_output=(not debug),
+            debug=debug,
+            _replace=False,
+        )
+        success, msg = run_mrsm_command(
+            job_command,
+            compose_config,
+            capture_output=False,
+            debug=debug,
+            _replace=False,
+            _env=get_job_env(job_command, compose_config),
+        )
+        if success:
+            jobs_fingerprints[job_name] = fingerprint
+        else:
+            warn(f"Failed to start job '{job_name}':\n{msg}", stack=False)
+
+    ### Remove jobs which are no longer defined (e.g. after changing `sync:shards`).
+    for job_name in old_jobs_fingerprints:
+        if job_name in jobs_commands:
+            continue
+        info(f"Removing job '{job_name}'...")
+        run_mrsm_command(
+            ['delete', 'job', job_name, '-f'],
+            compose_config,
+            capture_output=(not debug),
+            debug=debug,
+            _replace=False,
+        )
+
+    try:
+        write_jobs_fingerprints(compose_config, jobs_fingerprints)
+    except Exception as e:
+        warn(f"Failed to write the jobs' fingerprints:\n{e}", stack=False)
+
+    return jobs_commands
+
+
+def reconcile_instance_pipes(
+    instance_keys: str,
+    pipes: List[mrsm.Pipe],
+    compose_config: Dict[str, Any],
+    custom_connectors: Optional[Dict[str, Any]] = None,
+    presync: bool = False,
+    fetch_registry: bool = True,
+    state: Optional[Dict[str, Any]] = None,
+    untag_stale: bool = True,
+    debug: bool = False,
+) -> Tuple[List[mrsm.Pipe], List[Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]]]:
+    """
+    Register, update, and untag an instance's pipes to match the compose file.
+
+    Output is buffered rather than printed so that instances may be reconciled concurrently.
+
+    Parameters
+    ----------
+    instance_keys: str
+        The keys of the instance connector to reconcile.
+
+    pipes: List[mrsm.Pipe]
+        The pipes defined on this instance.
+
+    compose_config: Dict[str, Any]
+        The compose configuration dictionary.
+
+    custom_connectors: Optional[Dict[str, Any]], default None
+        The connectors built by `build_custom_connectors()`, reused by the worker.
+
+    presync: bool, default False
+        If `True`, return every pipe as needing a sync.
+
+    fetch_registry: bool, default True
+        If `False`, check each of the given pipes individually
+        rather than fetching the instance's tagged registry,
+        and do not untag stale pipes (i.e. when only reconciling changed pipes).
+
+    state: Optional[Dict[str, Any]], default None
+        The instance's registry and defined keys, shared between the chunks of an instance.
+        The registry is only fetched for the first chunk.
+
+    untag_stale: bool, default True
+        If `False`, skip untagging stale pipes (see `untag_stale_pipes()`),
+        e.g. when more of the instance's pipes are still to be reconciled.
+
+    Returns
+    -------
+    A tuple of the pipes to be synced and the buffered output
+    (a list of functions and their arguments, e.g. `(info, ("Registering...",), {})`).
+    """
+    from meerschaum.plugins import from_plugin_import
+    get_project_name = from_plugin_import('compose.utils.stack', 'get_project_name')
+    register_pipes = from_plugin_import('compose.utils.pipes', 'register_pipes')
+
+    output = []
+    log = lambda func, *args, **kwargs: output.append((func, args, kwargs))
+    project_name = get_project_name(compose_config)
+    instance_connector = (custom_connectors or {}).get(instance_keys, instance_keys)
+
+    ### Fetch the tagged registry once and index it by keys.
+    state = state if state is not None else {}
+    if 'remote_pipes' not in state:
+        state['remote_pipes'] = {
+            (remote_pipe.connector_keys, remote_pipe.metric_key, remote_pipe.location_key): remote_pipe
+            for remote_pipe in mrsm.get_pipes(
+                tags=[project_name],
+                instance=instance_connector,
+                as_list=True,
+                debug=debug,
+            )
+        } if fetch_registry else {}
+        state['defined_keys'] = set()
+    remote_pipes, defined_keys = state['remote_pipes'], state['defined_keys']
 
-    ### Update the parameters in case the remote has changed.
     updated_pipes = []
-    updated_registration = False
+    new_pipes = []
     for pipe in pipes:
         if debug:
-            dprint(f"Compose: Checking parameters for {pipe}...")
+            log(dprint, f"Compose: Checking parameters for {pipe}...")
         updated_registration = False
 
-        pipe_is_registered = is_pipe_registered(pipe, remote_instance_pipes.get(pipe.instance_keys, None))
+        pipe_keys = (pipe.connector_keys, pipe.metric_key, pipe.location_key)
+        defined_keys.add(pipe_keys)
+        if not fetch_registry:
+            _remote_pipe = mrsm.Pipe(**pipe.meta, **{'cache': False})
+            _remote_tags = (
+                _remote_pipe.get_parameters(refresh=True, apply_symlinks=False, debug=debug) or {}
+            ).get('tags', None) or []
+            if project_name in _remote_tags:
+                remote_pipes[pipe_keys] = _remote_pipe
+        pipe_is_registered = pipe_keys in remote_pipes
 
         remote_pipe = (
-            remote_instance_pipes[pipe.instance_keys][pipe.connector_keys][pipe.metric_key][pipe.location_key]
+            remote_pipes[pipe_keys]
             if pipe_is_registered
             else mrsm.Pipe(**pipe.meta, **{'cache': False})
         )
@@ -96,22 +755,22 @@ def _compose_up(
             )
         )
         if debug:
-            dprint(f"Remote parameters for {pipe}...")
-            mrsm.pprint(remote_parameters)
+            log(dprint, f"Remote parameters for {pipe}...")
+            log(mrsm.pprint, remote_parameters)
         local_parameters = pipe._attributes['parameters']
 
         local_parameters_str = json.dumps(local_parameters, sort_keys=True, separators=(',', ':'))
         remote_parameters_str = json.dumps(remote_parameters, sort_keys=True, separators=(',', ':'))
 
         if pipe.temporary:
-            info(f"{pipe} is temporary, will not modify registration.")
+            log(info, f"{pipe} is temporary, will not modify registration.")
         elif not pipe_is_registered:
             ### Clear any stale local cache (e.g. pipe id) from a prior registration.
             try:
                 pipe._invalidate_cache(hard=True, debug=debug)
             except Exception as e:
                 if debug:
-                    dprint(f"Failed to invalidate cache for {pipe}: {e}")
+                    log(dprint, f"Failed to invalidate cache for {pipe}: {e}")
 
             ### The pipe may already exist under a different project's tag.
             ### In that case, merge tags + parameters instead of re-registering.
@@ -120,10 +779,11 @@ def _compose_up(
                 existing_id = remote_pipe.get_id(debug=debug)
             except Exception as e:
                 if debug:
-                    dprint(f"Could not check remote id for {pipe}: {e}")
+                    log(dprint, f"Could not check remote id for {pipe}: {e}")
 
             if existing_id is not None:
-                info(
+                log(
+                    info,
                     f"{pipe} already exists on '{pipe.instance_keys}'; "
                     f"adding tag '{project_name}'..."
                 )
@@ -142,187 +802,117 @@ def _compose_up(
                 except Exception as e:
                     success, msg = False, str(e)
                 if not success:
-                    warn(f"Failed to add tag '{project_name}' to {pipe}:\n{msg}", stack=False)
+                    log(warn, f"Failed to add tag '{project_name}' to {pipe}:\n{msg}", stack=False)
             else:
-                info(f"Registering {pipe}...")
-                success, msg = run_mrsm_command(
-                    [
-                        'register', 'pipes',
-                        '-c', str(pipe.connector_keys),
-                        '-m', str(pipe.metric_key),
-                        '-l', str(pipe.location_key),
-                        '-i', str(pipe.instance_keys),
-                        '--params', json.dumps(pipe.parameters, separators=(',', ':')),
-                        '--noask',
-                    ] + no_daemon_flags,
-                    compose_config,
-                    capture_output=False,
-                    debug=debug,
-                    _replace=False,
-                    _subprocess=False,
-                )
-                if not success:
-                    warn(f"Failed to register {pipe}.", stack=False)
+                new_pipes.append(pipe)
             updated_registration = True
 
         ### Check the remote parameters against the specified parameters in the YAML.
         elif local_parameters_str != remote_parameters_str:
             if debug:
-                dprint("Local parameters:")
-                mrsm.pprint(local_parameters)
-                dprint("Remote parameters:")
-                mrsm.pprint(remote_parameters)
+                log(dprint, "Local parameters:")
+                log(mrsm.pprint, local_parameters)
+                log(dprint, "Remote parameters:")
+                log(mrsm.pprint, remote_parameters)
                 
             ### Editing with `--params` in a subprocess only patches,
             ### so instead replace the parameters dictionary directly.
-            info(f"Updating parameters for {pipe}...")
+            log(info, f"Updating parameters for {pipe}...")
             try:
                 pipe._invalidate_cache(hard=True, debug=debug)
             except Exception as e:
                 if debug:
-                    dprint(f"Failed to invalidate cache for {pipe}: {e}")
+                    log(dprint, f"Failed to invalidate cache for {pipe}: {e}")
             success, msg = pipe.edit(debug=debug)
             if not success:
-                warn(f"Failed to edit {pipe}.", stack=False)
+                log(warn, f"Failed to edit {pipe}.", stack=False)
             updated_registration = True
 
         if updated_registration or presync or pipe.temporary:
             updated_pipes.append(pipe)
 
-    ### Untag pipes that are tagged but no longer defined in mrsm-config.yaml.
-    if debug:
-        dprint(f"Compose: Checking for stale pipes tagged as '{project_name}'...")
-    tagged_instance_pipes = {
-        instance_keys: mrsm.get_pipes(
-            tags=[project_name],
-            instance=custom_connectors.get(instance_keys, instance_keys),
-            as_list=True,
-            debug=debug,
+    ### Register the new pipes together, one batch per instance.
+    if new_pipes:
+        log(
+            info,
+            f"Registering {len(new_pipes)} pipe"
+            + ('s' if len(new_pipes) != 1 else '')
+            + f" on '{instance_keys}'..."
         )
-        for instance_keys in instance_pipes
-    }
-    for instance_connector, tagged_pipes in tagged_instance_pipes.items():
-        for tagged_pipe in tagged_pipes:
-            if tagged_pipe not in pipes:
-                try:
-                    tagged_pipe.tags = [
-                        _tag
-                        for _tag in tagged_pipe.tags
-                        if _tag != project_name
-                    ]
-                except Exception:
-                    warn(f"{tagged_pipe} was incorrectly tagged with '{project_name}'...")
-                    continue
-                info(f"Removing tag '{project_name}' from {tagged_pipe}...")
-                tagged_pipe.edit(debug=debug)
+        for pipe, (success, msg) in register_pipes(new_pipes, compose_config, debug=debug).items():
+            if not success:
+                log(warn, f"Failed to register {pipe}:\n{msg}", stack=False)
 
-    if dry:
-        return True, (
-            f"Updated parameters for {len(pipes)} pipe"
-            + ("s" if len(pipes) != 1 else "")
-            + (" across " if len(instance_pipes) != 1 else " on ")
-            + f"{len(instance_pipes)} instance"
-            + ("s" if len(instance_pipes) != 1 else "")
-            + "."
-        )
+    if untag_stale:
+        _, untag_output = untag_stale_pipes(instance_keys, compose_config, state, debug=debug)
+        output.extend(untag_output)
 
-    ### If any changes have been made to the config file's values,
-    ### trigger another verification pass before starting jobs.
-    ran_verification_sync = False
-    if presync or (updated_pipes and config_has_changed(compose_config)):
-        ran_verification_sync = True
-        print_options(
-            pipes,
-            header = (
-                f"Running initial syncs for {len(updated_pipes)} pipe"
-                + ('s' if len(updated_pipes) != 1 else '')
-                + ':'
-            ),
-        )
-        success, msg = run_initial_syncs(
-            updated_pipes,
-            compose_config,
-            sysargs,
-            debug = debug,
-            **kw
-        )
-        if not success:
-            return success, msg
+    return updated_pipes, output
 
-    if no_jobs:
-        msg = (
-            (
-                f"Synced {len(updated_pipes)} pipe"
-                + ("s" if len(updated_pipes) != 1 else "")
-                + f" across {len(instance_pipes)} instance"
-                + ("s" if len(instance_pipes) != 1 else "")
-                + "."
-            )
-            if ran_verification_sync
-            else (
-                (
-                    f"Updated {len(updated_pipes)} pipe"
-                    + ("s" if len(updated_pipes) != 1 else "")
-                    + f" across {len(instance_pipes)} instance"
-                    + "."
-                )
-                if updated_pipes
-                else "Nothing to do."
-            )
-        )
-        return True, msg
 
-    jobs_commands = get_jobs_commands(compose_config)
-    for job_name, job_command in jobs_commands.items():
-        info(f"Starting job '{job_name}'...")
-        run_mrsm_command(
-            ['delete', 'job', job_name, '-f'],
-            compose_config,
-            capture_output=(not debug),
-            debug=debug,
-            _replace=False,
-        )
-        run_mrsm_command(
-            job_command,
-            compose_config,
-            capture_output=False,
-            debug=debug,
-            _replace=False,
-        )
+def untag_stale_pipes(
+    instance_keys: str,
+    compose_config: Dict[str, Any],
+    state: Dict[str, Any],
+    debug: bool = False,
+) -> Tuple[List[mrsm.Pipe], List[Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]]]:
+    """
+    Untag an instance's pipes which are tagged but no longer defined in the compose file
+    (from the `state` of `reconcile_instance_pipes()`).
 
-    if force:
-        run_mrsm_command(
-            ['show', 'logs'] + list(jobs_commands),
-            compose_config,
-            capture_output=False,
-            debug=debug,
-            _replace=False,
-        )
+    Returns
+    -------
+    A tuple of the untagged pipes and the buffered output.
+    """
+    from meerschaum.plugins import from_plugin_import
+    get_project_name = from_plugin_import('compose.utils.stack', 'get_project_name')
 
-    explicit_jobs = compose_config.get('jobs', {})
-    if explicit_jobs:
-        msg = (
-            f"Running {len(jobs_commands)} background job"
-            + ('s' if len(jobs_commands) != 1 else '')
-            + '.'
-        )
-    elif len(pipes) == 1:
-        msg = f"Syncing {pipes[0]} in a background job."
-    else:
-        msg = (
-            f"Syncing {len(pipes)} pipe" + ('s' if len(pipes) != 1 else '')
-            + (" across " if len(jobs_commands) != 1 else " on ")
-            + f"{len(jobs_commands)} instance"
-            + ('s' if len(jobs_commands) != 1 else '')
-            + "."
+    output = []
+    log = lambda func, *args, **kwargs: output.append((func, args, kwargs))
+    project_name = get_project_name(compose_config)
+    if debug:
+        log(
+            dprint,
+            f"Compose: Checking for stale pipes tagged as '{project_name}' on '{instance_keys}'...",
         )
 
-    msg += (
-        "\nRun `mrsm compose logs` or pass `-f` to follow logs output."
-        if not force
-        else ''
-    )
-    return True, msg
+    untagged_pipes = []
+    defined_keys = state.get('defined_keys', set())
+    for tagged_keys, tagged_pipe in state.get('remote_pipes', {}).items():
+        if tagged_keys in defined_keys:
+            continue
+        untag_pipe(tagged_pipe, project_name, log=log, debug=debug)
+        untagged_pipes.append(tagged_pipe)
+
+    return untagged_pipes, output
+
+
+def untag_pipe(
+    tagged_pipe: mrsm.Pipe,
+    project_name: str,
+    log: Optional[Callable[..., None]] = None,
+    debug: bool = False,
+) -> None:
+    """
+    Remove the project's tags (including shard and sync group tags) from a pipe
+    which is no longer defined in the compose file.
+    """
+    from meerschaum.plugins import from_plugin_import
+    is_project_tag = from_plugin_import('compose.utils.pipes', 'is_project_tag')
+    if log is None:
+        log = lambda func, *args, **kwargs: func(*args, **kwargs)
+
+    try:
+        tagged_pipe.tags = [
+            _tag
+            for _tag in tagged_pipe.tags
+            if not is_project_tag(_tag, project_name)
+        ]
+    except Exception:
+        log(warn, f"{tagged_pipe} was incorrectly tagged with '{project_name}'...")
+        return
+    log(info, f"Removing tag '{project_name}' from {tagged_pipe}...")
+    tagged_pipe.edit(debug=debug)
 
 
 def run_initial_syncs(
@@ -333,10 +923,22 @@ def run_initial_syncs(
     **kw
 ) -> SuccessTuple:
     """
-    Try two passes of syncing before starting the jobs.
+    Sync the pipes in dependency order before starting the jobs.
+
+    With `isolation: subprocess`, each level of independent pipes is synced concurrently
+    (limited by `sync:workers`); otherwise the pipes are synced one at a time.
+    Pipes downstream of failures are skipped.
+    A failed pipe is retried only after one of its upstream pipes has succeeded
+    since its failure (e.g. an upstream in the same dependency cycle).
     """
     from meerschaum.plugins import from_plugin_import
     run_mrsm_command = from_plugin_import('compose.utils', 'run_mrsm_command')
+    get_pipes_dependencies, get_dependency_levels = from_plugin_import(
+        'compose.utils.pipes',
+        'get_pipes_dependencies',
+        'get_dependency_levels',
+    )
+    get_num_workers = from_plugin_import('compose.sync', 'get_num_workers')
     flags_to_remove = {
         '-c', '-C', '--connector-keys',
         '-m', '-M', '--metric-keys',
@@ -354,59 +956,129 @@ def run_initial_syncs(
     if '--no-daemon' not in flags:
         flags.append('--no-daemon')
 
-    failed_pipes = []
-    for pipe in pipes:
+    def sync_pipe(pipe: mrsm.Pipe) -> SuccessTuple:
         info(f"Syncing {pipe}...")
-        success, msg = (
-            run_mrsm_command(
-                [
-                    'sync',
-                    'pipes', 
-                    '-c', str(pipe.connector_keys),
-                    '-m', str(pipe.metric_key),
-                    '-l', str(pipe.location_key),
-                    '-i', str(pipe.instance_keys),
-                ] + flags,
-                compose_config,
-                capture_output=False,
-                debug=debug,
-                _replace=False,
+        try:
+            return (
+                run_mrsm_command(
+                    [
+                        'sync',
+                        'pipes',
+                        '-c', str(pipe.connector_keys),
+                        '-m', str(pipe.metric_key),
+                        '-l', str(pipe.location_key),
+                        '-i', str(pipe.instance_keys),
+                    ] + flags,
+                    compose_config,
+                    capture_output=False,
+                    debug=debug,
+                    _replace=False,
+                )
+                if not pipe.temporary
+                else pipe.sync(debug=debug, **kw)
             )
-            if not pipe.temporary
-            else pipe.sync(debug=debug, **kw)
+        except Exception as e:
+            return False, str(e)
+
+    dependencies = get_pipes_dependencies(pipes, debug=debug)
+    levels = get_dependency_levels(dependencies)
+    ### In-process commands swap the process-wide root directory, config, and environment
+    ### (see `run_mrsm_command()`), so only sync concurrently in subprocesses.
+    workers = (
+        get_num_workers(
+            compose_config.get('sync', {}).get('workers', None),
+            max([len(level) for level in levels] or [1]),
         )
+        if compose_config.get('isolation', None) == 'subprocess'
+        else 1
+    )
 
-        if not success:
-            warn(f"Failed to sync {pipe}:\n{msg}", stack=False)
-            failed_pipes.append(pipe)
+    ### Track the order in which pipes finish to decide which failures are worth retrying.
+    results = {}
+    messages = {}
+    succeeded_at = {}
+    failed_at = {}
+    finished_count = 0
 
-    if not failed_pipes:
-        return True, "Success"
+    def record_result(ix: int, success: bool, msg: str) -> None:
+        nonlocal finished_count
+        finished_count += 1
+        results[ix] = success
+        messages[ix] = msg
+        if success:
+            succeeded_at[ix] = finished_count
+        else:
+            warn(f"Failed to sync {pipes[ix]}:\n{msg}", stack=False)
+            failed_at[ix] = finished_count
 
-    ### Pipes may be interdependent, so try again if we encounter any errors.
-    for pipe in failed_pipes:
-        info(f"Retry syncing {pipe}...")
-        success, msg = (
-            run_mrsm_command(
-                [
-                    'sync',
-                    'pipes',
-                    '-c', str(pipe.connector_keys),
-                    '-m', str(pipe.metric_key),
-                    '-l', str(pipe.location_key),
-                    '-i', str(pipe.instance_keys),
-                ] + flags,
-                compose_config,
-                capture_output=False,
-                debug=debug,
-                _replace=False,
-            )
-            if not pipe.temporary
-            else pipe.sync(debug=debug, **kw)[0]
+    def sync_batch(indices: List[int]) -> None:
+        if not indices:
+            return
+
+        ### Sync on the main thread when not concurrent (for signals and connectors' threads).
+        if workers == 1:
+            for ix in indices:
+                record_result(ix, *sync_pipe(pipes[ix]))
+            return
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(indices))) as executor:
+            futures = {executor.submit(sync_pipe, pipes[ix]): ix for ix in indices}
+            for future in as_completed(futures):
+                record_result(futures[future], *future.result())
+
+    ### Pipes in a dependency cycle share a level and do not wait on each other.
+    levels_indices = {ix: level_ix for level_ix, level in enumerate(levels) for ix in level}
+
+    def upstreams_succeeded(ix: int) -> bool:
+        return all(
+            results.get(upstream_ix, False)
+            for upstream_ix in dependencies[ix]
+            if levels_indices[upstream_ix] < levels_indices[ix]
         )
 
-        if not success:
-            warn(f"Failed to sync {pipe}:\n{msg}", stack=False)
-            return False, f"Unable to begin syncing {pipe}:\n{msg}"
+    for level in levels:
+        sync_batch([ix for ix in level if upstreams_succeeded(ix)])
+
+    def upstream_succeeded_since_failure(ix: int) -> bool:
+        return any(
+            succeeded_at.get(upstream_ix, 0) > failed_at[ix]
+            for upstream_ix in dependencies[ix]
+        )
 
-    return True, "Success"
+    ### Retry failed or skipped pipes as long as new upstreams are satisfied.
+    while True:
+        retry_indices = [
+            ix
+            for level in levels
+            for ix in level
+            if not results.get(ix, False)
+            and upstreams_succeeded(ix)
+            and (ix not in failed_at or upstream_succeeded_since_failure(ix))
+        ]
+        if not retry_indices:
+            break
+        for ix in retry_indices:
+            if ix in failed_at:
+                info(f"Retry syncing {pipes[ix]}...")
+        sync_batch(retry_indices)
+
+    unsynced_indices = [ix for ix in range(len(pipes)) if not results.get(ix, False)]
+    if not unsynced_indices:
+        return True, "Success"
+
+    skipped_indices = [ix for ix in unsynced_indices if ix not in results]
+    failed_indices = [ix for ix in unsynced_indices if ix in results]
+    if len(failed_indices) == 1 and not skipped_indices:
+        pipe_ix = failed_indices[0]
+        return False, f"Unable to begin syncing {pipes[pipe_ix]}:\n{messages[pipe_ix]}"
+
+    return False, (
+        f"Unable to begin syncing {len(unsynced_indices)} pipe"
+        + ('s' if len(unsynced_indices) != 1 else '')
+        + ":\n"
+        + '\n'.join(
+            f"  - {pipes[ix]}"
+            + (" (skipped because an upstream pipe failed)" if ix in skipped_indices else '')
+            for ix in unsynced_indices
+        )
+    )
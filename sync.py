@@ -6,60 +6,922 @@
 Define the `plugin:compose` sync method.
 """
 
+import os
+import re
 import time
+from datetime import datetime, timezone
+from typing import Deque, Set
 
 import meerschaum as mrsm
-from meerschaum.utils.typing import SuccessTuple, Any, List
-from meerschaum.utils.warnings import info
+from meerschaum.utils.typing import SuccessTuple, Any, List, Dict, Tuple, Optional, Union
+from meerschaum.utils.warnings import info, warn
+from meerschaum.utils.misc import items_str
+
+EXECUTOR_TYPES = ['thread', 'process', 'async']
+ASYNC_WORKERS: int = 100
+CONNECTOR_WORKERS: int = 8
+
+### How often to check whether a queued child with a timeout has started running.
+START_POLL_SECONDS: float = 0.1
+ADAPTIVE_DEFAULTS: Dict[str, Union[int, float]] = {
+    'min_seconds': 1,
+    'max_seconds': 3600,
+    'window': 10,
+}
+ROWS_COUNTS_PATTERNS = {
+    'inserted': re.compile(r'Inserted ([\d,]+)'),
+    'updated': re.compile(r'updated ([\d,]+)'),
+    'upserted': re.compile(r'Upserted ([\d,]+)'),
+}
+METRICS_PATTERNS = {
+    'rows_fetched': re.compile(r'[Ff]etched ([\d,]+)'),
+    'bytes': re.compile(r'([\d,]+) bytes'),
+}
+METRICS_COLUMNS = {
+    'datetime': 'timestamp',
+    'connector': 'connector_keys',
+    'metric': 'metric_key',
+    'location': 'location_key',
+    'instance': 'instance_keys',
+}
+
+### Keyed by the parent pipe's keys, then each child's keys.
+CHILDREN_STATE: Dict[Tuple[str, ...], Dict[Tuple[str, ...], Dict[str, Any]]] = {}
+
+### The children and dependencies built for a parent pipe, keyed by the parent pipe's keys
+### and invalidated by the hash of the parent's parameters.
+CHILDREN_CACHE: Dict[Tuple[str, ...], Tuple[str, List[mrsm.Pipe], Dict[int, Any]]] = {}
+
+### The metrics records of the latest pass, keyed by the parent pipe's keys.
+SYNC_METRICS: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
 
 
 def sync(pipe: mrsm.Pipe, **kwargs: Any) -> SuccessTuple:
     """
-    Sync the pipe's children one-by-one.
+    Sync the pipe's children, running independent children concurrently.
+
+    Children are synced after the children they depend on (see `get_pipes_dependencies()`).
+    If a child fails, only the children downstream of it are skipped.
+
+    Set `executor` to `'process'` under the parameters key `compose` to sync each child
+    in a worker process instead of a thread (e.g. for CPU-bound plugins),
+    or to `'async'` to overlap many I/O-bound children from an asyncio event loop
+    (a child is only submitted while its connector has fewer than `connector_workers`
+    children running).
+
+    The last sync time and number of new rows of each child are kept in memory between passes.
+    Unless `skip_unchanged` is `False`, a child which was synced successfully before is skipped
+    when all of its upstream children reported no new rows in this pass.
+
+    A child with `timeout_seconds` (under its parameters key `compose`) is abandoned
+    and marked as failed once it has run for longer than its timeout,
+    and the rest of the children continue to sync.
+
+    If `adaptive` is set, a child which synced successfully is deferred until its adaptive
+    interval has elapsed (see `get_adaptive_interval()`).
+
+    When more children are ready than there are workers, the children which have breached
+    their `max_lag` (seconds since their last successful sync) are synced first,
+    then those with the highest `priority`. Children which are on time wait for free workers.
+
+    Per-child metrics (duration, rows, status) for the latest pass are returned by
+    `get_sync_metrics()` and, if `metrics` is set, appended to a metrics pipe
+    (see `get_metrics_pipe()`).
     """
-    from meerschaum.utils.formatting import make_header, UNICODE
+    from concurrent.futures import wait, FIRST_COMPLETED
+    from meerschaum.utils.formatting import make_header
+    from meerschaum.plugins import from_plugin_import
+
+    get_pipe_keys, get_pipe_compose_parameters = from_plugin_import(
+        'compose.utils.pipes',
+        'get_pipe_keys',
+        'get_pipe_compose_parameters',
+    )
+
+    compose_parameters = pipe.parameters.get('compose', {}) or {}
+    children, dependencies = get_children(pipe, debug=kwargs.get('debug', False))
+    executor_type = compose_parameters.get('executor', None) or 'thread'
+    if executor_type not in EXECUTOR_TYPES:
+        return False, (
+            f"Invalid executor '{executor_type}' for {pipe}.\n"
+            + f"    Accepted values are {items_str(EXECUTOR_TYPES)}."
+        )
+    workers = get_num_workers(
+        compose_parameters.get('workers', None),
+        len(children),
+        executor_type=executor_type,
+    )
+    connector_workers = compose_parameters.get('connector_workers', None) or CONNECTOR_WORKERS
+
+    max_running = workers
+    skip_unchanged = compose_parameters.get('skip_unchanged', True)
+    adaptive_config = get_adaptive_config(compose_parameters.get('adaptive', None))
+    children_state = CHILDREN_STATE.setdefault(get_pipe_keys(pipe), {})
+    children_keys = [get_pipe_keys(child_pipe) for child_pipe in children]
+    timeouts = [
+        get_timeout_seconds(get_pipe_compose_parameters(child_pipe), child_pipe)
+        for child_pipe in children
+    ]
 
-    child_successes: List[bool] = []
-    child_messages: List[str] = []
+    ### Abandoned children keep their workers, so leave room for every child with a timeout.
+    pool_workers = min(
+        len(children) or 1,
+        workers + len([timeout for timeout in timeouts if timeout is not None]),
+    )
+
+    results: Dict[int, Tuple[bool, str]] = {}
+    children_metrics: Dict[int, Dict[str, Any]] = {}
+    rows_synced: Dict[int, Optional[int]] = {}
+    skipped = set()
+    unchanged = set()
+    deferred = set()
+    timed_out: Dict[int, float] = {}
+    ### Children record when they start running (rather than when they were submitted),
+    ### so time spent queued behind other children doesn't count against their timeouts.
+    start_times: Dict[int, float] = {}
+    abandoned: Set[int] = set()
+    pass_start_time = datetime.now(timezone.utc)
+    urgency_keys = [
+        get_urgency_key(
+            get_pipe_compose_parameters(child_pipe),
+            (children_state.get(children_keys[child_ix], None) or {}).get('success_time', None),
+            pass_start_time,
+            child_pipe,
+        )
+        for child_ix, child_pipe in enumerate(children)
+    ]
+    pending: List[int] = sorted(
+        range(len(children)),
+        key=lambda child_ix: (urgency_keys[child_ix], child_ix),
+    )
+    running = {}
+    connectors_running: Dict[str, int] = {}
     loop_start = time.perf_counter()
-    arrow = '⮡' if UNICODE else '->'
 
-    for child_num, child_pipe in enumerate(pipe.children):
-        info(f"{pipe}:\n    {arrow} {child_num + 1}. Syncing {child_pipe}...")
-        child_pipe_start = time.perf_counter()
-        child_success, child_msg = child_pipe.sync(**kwargs)
-        child_msg = child_msg.lstrip().rstrip()
-        child_pipe_duration = time.perf_counter() - child_pipe_start
-        mrsm.pprint((child_success, child_msg))
+    def has_free_connector_slot(child_ix: int) -> bool:
+        """
+        Return whether a child may be submitted without waiting on its connector
+        (only the async executor limits concurrency per connector).
+        """
+        if executor_type != 'async':
+            return True
+        connector_keys = str(children[child_ix].connector_keys)
+        return connectors_running.get(connector_keys, 0) < connector_workers
 
-        child_successes.append(child_success)
-        child_message = (
-            (
-                "Successfully synced in "
+    def release_child(future) -> int:
+        """
+        Remove a finished or abandoned child from the running children and return its index.
+        """
+        child_ix = running.pop(future)
+        connector_keys = str(children[child_ix].connector_keys)
+        connectors_running[connector_keys] = connectors_running.get(connector_keys, 1) - 1
+        return child_ix
+
+    def schedule_ready_children(executor) -> None:
+        """
+        Submit the children whose upstream children have succeeded
+        and skip the children whose upstream children have failed or have no new rows.
+        """
+        found_skips = True
+        while found_skips:
+            found_skips = False
+            for child_ix in list(pending):
+                upstream = dependencies[child_ix]
+                failed_upstream = [
+                    upstream_ix
+                    for upstream_ix in sorted(upstream)
+                    if upstream_ix in results and not results[upstream_ix][0]
+                ]
+                if failed_upstream:
+                    pending.remove(child_ix)
+                    skipped.add(child_ix)
+                    results[child_ix] = (
+                        False,
+                        f"Skipped because {children[failed_upstream[0]]} did not sync.",
+                    )
+                    found_skips = True
+                    continue
+
+                if not all(upstream_ix in results for upstream_ix in upstream):
+                    continue
+
+                child_state = children_state.get(children_keys[child_ix], None)
+                if (
+                    skip_unchanged
+                    and upstream
+                    and child_state is not None
+                    and child_state['success']
+                    and all(rows_synced.get(upstream_ix, None) == 0 for upstream_ix in upstream)
+                ):
+                    pending.remove(child_ix)
+                    unchanged.add(child_ix)
+                    rows_synced[child_ix] = 0
+                    results[child_ix] = (
+                        True,
+                        "Skipped because upstream pipes had no new rows "
+                        + f"(last synced at {child_state['sync_time'].isoformat(timespec='seconds')}"
+                        + (
+                            f" with {child_state['rows']} new rows)."
+                            if child_state['rows'] is not None
+                            else ")."
+                        ),
+                    )
+                    found_skips = True
+                    continue
+
+                if (
+                    adaptive_config is not None
+                    and child_state is not None
+                    and child_state['success']
+                ):
+                    interval = get_adaptive_interval(child_state.get('history', None), adaptive_config)
+                    elapsed = (datetime.now(timezone.utc) - child_state['sync_time']).total_seconds()
+                    if elapsed < interval:
+                        pending.remove(child_ix)
+                        deferred.add(child_ix)
+                        rows_synced[child_ix] = 0
+                        results[child_ix] = (
+                            True,
+                            f"Deferred for {round(interval - elapsed, 2)} seconds "
+                            + f"(adaptive interval of {round(interval, 2)} seconds).",
+                        )
+                        found_skips = True
+                        continue
+
+                if len(running) >= max_running or not has_free_connector_slot(child_ix):
+                    continue
+
+                pending.remove(child_ix)
+                submit_child(executor, child_ix)
+
+    def submit_child(executor, child_ix: int) -> None:
+        """
+        Submit a child to the executor, rebuilding it from its meta in worker processes.
+        """
+        child_pipe = children[child_ix]
+        if executor_type != 'process':
+            future = executor.submit(
+                _run_child,
+                start_times,
+                abandoned,
+                child_ix,
+                _sync_child,
+                pipe,
+                child_pipe,
+                child_ix,
+                **kwargs
+            )
+        else:
+            ### The process pool has a free worker for every submitted child.
+            start_times[child_ix] = time.monotonic()
+            child_meta = {
+                **child_pipe.meta,
+                'parameters': child_pipe.get_parameters(apply_symlinks=False),
+                'temporary': child_pipe.temporary,
+            }
+            future = executor.submit(
+                _sync_child_from_meta,
+                str(pipe),
+                child_meta,
+                child_ix,
+                **_get_picklable_kwargs(kwargs)
+            )
+
+        running[future] = child_ix
+        connector_keys = str(child_pipe.connector_keys)
+        connectors_running[connector_keys] = connectors_running.get(connector_keys, 0) + 1
+
+    def record_result(
+        child_ix: int,
+        child_success: bool,
+        child_message: str,
+        child_metrics: Dict[str, Any],
+    ) -> None:
+        """
+        Store a child's result and metrics for this pass and its state for the next pass.
+        """
+        results[child_ix] = (child_success, child_message)
+        children_metrics[child_ix] = child_metrics
+        rows_synced[child_ix] = get_rows_synced(child_metrics) if child_success else None
+        sync_time = datetime.now(timezone.utc)
+        previous_state = children_state.get(children_keys[child_ix], None) or {}
+        history = previous_state.get('history', None)
+        if adaptive_config is not None:
+            history = update_sync_history(
+                history,
+                adaptive_config,
+                child_metrics.get('duration', None),
+                rows_synced[child_ix],
+            ) if child_success else history
+        children_state[children_keys[child_ix]] = {
+            'success': child_success,
+            'sync_time': sync_time,
+            'success_time': (
+                sync_time
                 if child_success
-                else "Failed to sync after "
-            ) + f"{round(child_pipe_duration, 2)} seconds:\n"
-            + child_msg
-        )
-        child_messages.append(child_message)
+                else previous_state.get('success_time', None)
+            ),
+            'rows': rows_synced[child_ix],
+            'timed_out': timed_out.get(child_ix, None),
+            'history': history,
+        }
 
-        if not child_success:
-            break
+    def get_wait_timeout() -> Union[float, None]:
+        """
+        Return the number of seconds until the next running child times out
+        (or until the next check for a child with a timeout which hasn't started yet).
+        """
+        now = time.monotonic()
+        deadlines = [
+            (
+                start_times[child_ix] + timeouts[child_ix]
+                if child_ix in start_times
+                else now + START_POLL_SECONDS
+            )
+            for child_ix in running.values()
+            if timeouts[child_ix] is not None
+        ]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+
+    executor = get_executor(executor_type, pool_workers)
+    try:
+        while pending or running:
+            schedule_ready_children(executor)
+            if not running:
+                if not pending:
+                    break
+
+                ### The remaining children depend on each other, so break the cycle in order.
+                child_ix = pending.pop(0)
+                warn(
+                    f"Detected a dependency cycle with {children[child_ix]}, syncing anyway.",
+                    stack=False,
+                )
+                submit_child(executor, child_ix)
+
+            done, _ = wait(running, timeout=get_wait_timeout(), return_when=FIRST_COMPLETED)
+            for future in done:
+                child_ix = release_child(future)
+                try:
+                    child_success, child_message, child_metrics = future.result()
+                except Exception as e:
+                    child_success, child_message = False, f"Failed to sync in a worker:\n{e}"
+                    child_metrics = {'status': 'failure'}
+                record_result(child_ix, child_success, child_message, child_metrics)
+
+            now = time.monotonic()
+            for future, child_ix in list(running.items()):
+                timeout = timeouts[child_ix]
+                start_time = start_times.get(child_ix, None)
+                if timeout is None or start_time is None or (now - start_time) < timeout:
+                    continue
+
+                ### Blocking syncs cannot be interrupted, so abandon the worker.
+                _ = release_child(future)
+                timed_out[child_ix] = now - start_time
+                abandoned.add(child_ix)
+                future.cancel()
+                warn(
+                    f"{children[child_ix]} timed out after "
+                    + f"{round(timed_out[child_ix], 2)} seconds.",
+                    stack=False,
+                )
+                record_result(
+                    child_ix,
+                    False,
+                    f"Timed out after {round(timed_out[child_ix], 2)} seconds "
+                    + f"(timeout_seconds: {timeout}).",
+                    {'status': 'timed_out', 'duration': timed_out[child_ix]},
+                )
+    finally:
+        ### Don't start any queued children once the pass has ended (e.g. on an interrupt).
+        abandoned.update(running.values())
+        shutdown_executor(executor, abandoned=bool(timed_out))
 
     loop_duration = time.perf_counter() - loop_start
 
-    num_synced = len(child_messages)
-    success = all(child_successes)
+    pass_time = datetime.now(timezone.utc)
+    metrics_records = []
+    for child_ix, child_pipe in enumerate(children):
+        if child_ix not in results:
+            continue
+        child_metrics = children_metrics.get(child_ix, None) or {
+            'status': (
+                'unchanged'
+                if child_ix in unchanged
+                else ('deferred' if child_ix in deferred else 'skipped')
+            ),
+        }
+        metrics_records.append(
+            build_metrics_record(child_pipe, results[child_ix][0], child_metrics, pass_time)
+        )
+    SYNC_METRICS[get_pipe_keys(pipe)] = metrics_records
+
+    metrics_pipe = get_metrics_pipe(pipe, compose_parameters)
+    if metrics_pipe is not None and metrics_records:
+        metrics_success, metrics_msg = metrics_pipe.sync(
+            metrics_records,
+            debug=kwargs.get('debug', False),
+        )
+        if not metrics_success:
+            warn(f"Failed to write metrics to {metrics_pipe}:\n{metrics_msg}", stack=False)
+
+    num_synced = (
+        len(results) - len(skipped) - len(unchanged) - len(deferred) - len(timed_out)
+    )
+    success = all(child_success for child_success, _ in results.values())
     msg = (
         f"Synced {num_synced} pipe"
         + ('s' if num_synced != 1 else '')
         + f" in {round(loop_duration, 2)} seconds."
     )
-    for child_num, (child_pipe, child_message) in enumerate(
-        zip(pipe.children, child_messages)
-    ):
+    if skipped:
+        msg += f" Skipped {len(skipped)} pipe" + ('s' if len(skipped) != 1 else '') + '.'
+    if unchanged:
+        msg += (
+            f" Skipped {len(unchanged)} unchanged pipe"
+            + ('s' if len(unchanged) != 1 else '')
+            + '.'
+        )
+    if deferred:
+        msg += (
+            f" Deferred {len(deferred)} pipe"
+            + ('s' if len(deferred) != 1 else '')
+            + '.'
+        )
+    if timed_out:
+        msg += (
+            f" {len(timed_out)} pipe"
+            + ('s' if len(timed_out) != 1 else '')
+            + ' timed out.'
+        )
+
+    for child_num, child_pipe in enumerate(children):
+        if child_num not in results:
+            continue
         child_header = make_header(
             str(child_num + 1) + '. ' + str(child_pipe)
         )
-        msg += f"\n\n{child_header}\n{child_message}"
+        msg += f"\n\n{child_header}\n{results[child_num][1]}"
     return success, msg
+
+
+def get_children(
+    pipe: mrsm.Pipe,
+    debug: bool = False,
+) -> Tuple[List[mrsm.Pipe], Dict[int, Any]]:
+    """
+    Return the parent's children and their dependencies (see `get_pipes_dependencies()`).
+
+    The children are built once and reused in later passes (keeping their connectors warm)
+    until the parent's parameters change.
+    """
+    from meerschaum.plugins import from_plugin_import
+    from meerschaum.utils.warnings import dprint
+    get_pipes_dependencies, get_pipe_keys = from_plugin_import(
+        'compose.utils.pipes',
+        'get_pipes_dependencies',
+        'get_pipe_keys',
+    )
+    hash_config = from_plugin_import('compose.utils.config', 'hash_config')
+
+    pipe_keys = get_pipe_keys(pipe)
+    parameters_hash = hash_config(pipe.parameters)
+    cached_hash, cached_children, cached_dependencies = CHILDREN_CACHE.get(
+        pipe_keys,
+        (None, None, None),
+    )
+    if cached_hash == parameters_hash:
+        return cached_children, cached_dependencies
+
+    if debug:
+        dprint(f"Compose: Building the children of {pipe}...")
+
+    children = pipe.children
+    dependencies = get_pipes_dependencies(children, debug=debug)
+    CHILDREN_CACHE[pipe_keys] = (parameters_hash, children, dependencies)
+    return children, dependencies
+
+
+def get_sync_metrics(pipe: mrsm.Pipe) -> List[Dict[str, Any]]:
+    """
+    Return the per-child metrics records from the latest pass of a `plugin:compose` pipe.
+    """
+    from meerschaum.plugins import from_plugin_import
+    get_pipe_keys = from_plugin_import('compose.utils.pipes', 'get_pipe_keys')
+    return SYNC_METRICS.get(get_pipe_keys(pipe), [])
+
+
+def get_metrics_pipe(
+    pipe: mrsm.Pipe,
+    compose_parameters: Dict[str, Any],
+) -> Union[mrsm.Pipe, None]:
+    """
+    Return the pipe to which a parent's metrics are written, or `None` if `metrics` is unset.
+
+    Set `metrics` to `True` to write to `Pipe('compose', 'metrics', <project_name>)`
+    on the parent's instance, or to a dictionary to override any of these keys
+    (`connector`, `metric`, `location`, `instance`).
+    """
+    metrics_config = compose_parameters.get('metrics', None)
+    if not metrics_config:
+        return None
+
+    metrics_keys = metrics_config if isinstance(metrics_config, dict) else {}
+    return mrsm.Pipe(
+        metrics_keys.get('connector', 'compose'),
+        metrics_keys.get('metric', 'metrics'),
+        metrics_keys.get('location', compose_parameters.get('project_name', pipe.metric_key)),
+        instance=metrics_keys.get('instance', pipe.instance_keys),
+        columns=METRICS_COLUMNS,
+    )
+
+
+def build_metrics_record(
+    child_pipe: mrsm.Pipe,
+    child_success: bool,
+    child_metrics: Dict[str, Any],
+    timestamp: datetime,
+) -> Dict[str, Any]:
+    """
+    Return a flat metrics record for a child (unavailable values are `None`).
+    """
+    return {
+        'timestamp': child_metrics.get('timestamp', None) or timestamp,
+        'connector_keys': str(child_pipe.connector_keys),
+        'metric_key': str(child_pipe.metric_key),
+        'location_key': child_pipe.location_key,
+        'instance_keys': str(child_pipe.instance_keys),
+        'status': child_metrics.get('status', None),
+        'success': child_success,
+        'duration': child_metrics.get('duration', None),
+        'rows_fetched': child_metrics.get('rows_fetched', None),
+        'rows_inserted': child_metrics.get('rows_inserted', None),
+        'rows_updated': child_metrics.get('rows_updated', None),
+        'rows_upserted': child_metrics.get('rows_upserted', None),
+        'bytes': child_metrics.get('bytes', None),
+    }
+
+
+def get_rows_counts(message: str) -> Dict[str, int]:
+    """
+    Parse the numbers of inserted, updated, and upserted rows from a sync message.
+    Only the counts found in the message are returned (e.g. an empty dictionary if none).
+    """
+    rows_counts = {}
+    for key, pattern in ROWS_COUNTS_PATTERNS.items():
+        matches = pattern.findall(message)
+        if matches:
+            rows_counts[key] = sum(int(match.replace(',', '')) for match in matches)
+    return rows_counts
+
+
+def get_rows_synced(child_metrics: Dict[str, Any]) -> Union[int, None]:
+    """
+    Return the total number of inserted, updated, and upserted rows from a child's metrics
+    (or `None` if the sync message reported no counts).
+    """
+    rows_counts = [
+        child_metrics[f'rows_{key}']
+        for key in ROWS_COUNTS_PATTERNS
+        if child_metrics.get(f'rows_{key}', None) is not None
+    ]
+    return sum(rows_counts) if rows_counts else None
+
+
+def get_adaptive_config(adaptive: Any) -> Union[Dict[str, Union[int, float]], None]:
+    """
+    Return the adaptive cadence settings (`min_seconds`, `max_seconds`, and `window`)
+    from the `adaptive` key (`True` for the defaults), or `None` if disabled or invalid.
+    """
+    if not adaptive:
+        return None
+
+    adaptive_config = {
+        **ADAPTIVE_DEFAULTS,
+        **(adaptive if isinstance(adaptive, dict) else {}),
+    }
+    try:
+        adaptive_config = {
+            'min_seconds': max(0.0, float(adaptive_config['min_seconds'])),
+            'max_seconds': float(adaptive_config['max_seconds']),
+            'window': max(1, int(adaptive_config['window'])),
+        }
+    except (TypeError, ValueError):
+        warn(f"Invalid adaptive settings: {adaptive}", stack=False)
+        return None
+    adaptive_config['max_seconds'] = max(
+        adaptive_config['min_seconds'],
+        adaptive_config['max_seconds'],
+    )
+    return adaptive_config
+
+
+def update_sync_history(
+    history: Optional[Deque[Tuple[Optional[float], Optional[int]]]],
+    adaptive_config: Dict[str, Union[int, float]],
+    duration: Optional[float],
+    rows: Optional[int],
+) -> Deque[Tuple[Optional[float], Optional[int]]]:
+    """
+    Append a successful sync's duration and rows to a pipe's moving window.
+    """
+    from collections import deque
+    if history is None or history.maxlen != adaptive_config['window']:
+        history = deque(history or [], maxlen=adaptive_config['window'])
+    history.append((duration, rows))
+    return history
+
+
+def get_adaptive_interval(
+    history: Optional[Deque[Tuple[Optional[float], Optional[int]]]],
+    adaptive_config: Dict[str, Union[int, float]],
+) -> float:
+    """
+    Return a pipe's interval between syncs from the moving window of its recent
+    successful syncs' durations and rows.
+
+    The interval is at least twice the average duration (so that slow syncs don't run
+    back to back) and doubles for each of the most recent syncs in a row without new rows,
+    bounded by `min_seconds` and `max_seconds`.
+    """
+    min_seconds, max_seconds = adaptive_config['min_seconds'], adaptive_config['max_seconds']
+    if not history:
+        return min_seconds
+
+    durations = [duration for duration, _ in history if duration is not None]
+    interval = max(min_seconds, 2 * (sum(durations) / len(durations))) if durations else min_seconds
+
+    num_quiet = 0
+    for _, rows in reversed(history):
+        if rows != 0:
+            break
+        num_quiet += 1
+
+    return min(max_seconds, max(min_seconds, interval * (2 ** num_quiet)))
+
+
+def get_timeout_seconds(
+    compose_parameters: Dict[str, Any],
+    pipe: Optional[mrsm.Pipe] = None,
+    key: str = 'timeout_seconds',
+) -> Union[float, None]:
+    """
+    Return the configured `timeout_seconds` (or another key, e.g. `job_timeout_seconds`)
+    as a float, or `None` if unset or invalid.
+    """
+    return _get_float_parameter(compose_parameters, key, pipe)
+
+
+def _get_float_parameter(
+    compose_parameters: Dict[str, Any],
+    key: str,
+    pipe: Optional[mrsm.Pipe] = None,
+) -> Union[float, None]:
+    """
+    Return a compose parameter as a float, or `None` if unset or invalid.
+    """
+    val = compose_parameters.get(key, None)
+    if val is None:
+        return None
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        warn(f"Invalid {key} for {pipe}: {val}", stack=False)
+        return None
+
+
+def get_urgency_key(
+    compose_parameters: Dict[str, Any],
+    success_time: Optional[datetime],
+    now: datetime,
+    pipe: Optional[mrsm.Pipe] = None,
+) -> Tuple[int, float, float]:
+    """
+    Return a sort key which orders pipes by how urgently they need to be synced.
+
+    Pipes which have breached their `max_lag` (seconds since their last successful sync)
+    come first, the most overdue first. The rest are on time and are ordered by their
+    `priority` (higher first, default 0), so ties fall back to the caller's order.
+    A pipe with `max_lag` which has not yet synced successfully is overdue.
+    """
+    max_lag = _get_float_parameter(compose_parameters, 'max_lag', pipe)
+    priority = _get_float_parameter(compose_parameters, 'priority', pipe) or 0.0
+    if max_lag is not None:
+        slack = (
+            max_lag - (now - success_time).total_seconds()
+            if success_time is not None
+            else 0.0
+        )
+        if slack <= 0:
+            return 0, slack, -1 * priority
+    return 1, 0.0, -1 * priority
+
+
+def get_num_workers(
+    workers: Optional[int],
+    num_children: int,
+    executor_type: str = 'thread',
+) -> int:
+    """
+    Return the number of children to sync concurrently.
+    If `workers` is not set, default to the `ThreadPoolExecutor` default
+    (or `ASYNC_WORKERS` for the async executor).
+    """
+    if workers is None:
+        workers = (
+            min(32, (os.cpu_count() or 1) + 4)
+            if executor_type != 'async'
+            else ASYNC_WORKERS
+        )
+    return max(1, min(int(workers), num_children or 1))
+
+
+def get_executor(executor_type: str, workers: int):
+    """
+    Return a thread, process, or asyncio executor with the given number of workers.
+    Process pools fork when possible so that workers inherit the loaded plugins.
+    """
+    import multiprocessing
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    if executor_type == 'async':
+        return AsyncioExecutor(workers)
+
+    if executor_type != 'process':
+        return ThreadPoolExecutor(max_workers=workers)
+
+    mp_context = (
+        multiprocessing.get_context('fork')
+        if 'fork' in multiprocessing.get_all_start_methods()
+        else None
+    )
+    return ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+
+
+def shutdown_executor(executor: Any, abandoned: bool = False) -> None:
+    """
+    Shut down an executor from `get_executor()`.
+
+    Parameters
+    ----------
+    executor: Any
+        The thread, process, or asyncio executor to shut down.
+
+    abandoned: bool, default False
+        If `True`, don't wait for running calls to finish.
+        Process pools join their workers at interpreter exit,
+        so terminate the worker processes to keep hung syncs from blocking the exit.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    if not abandoned:
+        executor.shutdown(wait=True)
+        return
+
+    if isinstance(executor, ProcessPoolExecutor):
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+        return
+
+    executor.shutdown(wait=False)
+
+
+class AsyncioExecutor:
+    """
+    Run blocking calls through a bounded thread pool from an asyncio event loop.
+    The callers limit the concurrent calls per connector before submitting.
+    """
+
+    def __init__(self, workers: int):
+        import asyncio
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        self.loop = asyncio.new_event_loop()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule `fn(*args, **kwargs)` and return a `concurrent.futures.Future`.
+        """
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(self._run(fn, *args, **kwargs), self.loop)
+
+    async def _run(self, fn, *args, **kwargs):
+        import functools
+        return await self.loop.run_in_executor(
+            self.pool,
+            functools.partial(fn, *args, **kwargs),
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the event loop and the thread pool.
+        """
+        self.pool.shutdown(wait=wait)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if wait:
+            self._thread.join()
+            self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown(wait=True)
+
+
+def _get_picklable_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return only the keyword arguments which may be sent to worker processes.
+    """
+    import pickle
+    picklable_kwargs = {}
+    for key, val in kwargs.items():
+        try:
+            pickle.dumps(val)
+        except Exception:
+            continue
+        picklable_kwargs[key] = val
+    return picklable_kwargs
+
+
+def _run_child(
+    start_times: Dict[int, float],
+    abandoned: Set[int],
+    child_ix: int,
+    fn,
+    *args: Any,
+    **kwargs: Any
+) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Record when a child starts running and run it (in a worker thread),
+    unless it was abandoned while it was queued.
+    """
+    if child_ix in abandoned:
+        return False, "Abandoned before it started.", {'status': 'timed_out'}
+    start_times[child_ix] = time.monotonic()
+    return fn(*args, **kwargs)
+
+
+def _sync_child_from_meta(
+    pipe_str: str,
+    child_meta: Dict[str, Any],
+    child_num: int,
+    **kwargs: Any
+) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Rebuild a child from its meta and sync it (executed in a worker process).
+    """
+    return _sync_child(pipe_str, mrsm.Pipe(**child_meta), child_num, **kwargs)
+
+
+def _sync_child(
+    pipe: mrsm.Pipe,
+    child_pipe: mrsm.Pipe,
+    child_num: int,
+    **kwargs: Any
+) -> Tuple[bool, str, Dict[str, Any]]:
+    """
+    Sync a single child and return the formatted result message and its metrics.
+    """
+    from meerschaum.utils.formatting import UNICODE
+    arrow = '⮡' if UNICODE else '->'
+    info(f"{pipe}:\n    {arrow} {child_num + 1}. Syncing {child_pipe}...")
+    child_pipe_start = time.perf_counter()
+    try:
+        child_success, child_msg = child_pipe.sync(**kwargs)
+    except Exception as e:
+        child_success, child_msg = False, f"Encountered an exception:\n{e}"
+    child_msg = child_msg.lstrip().rstrip()
+    child_pipe_duration = time.perf_counter() - child_pipe_start
+    mrsm.pprint((child_success, child_msg))
+
+    child_message = (
+        (
+            "Successfully synced in "
+            if child_success
+            else "Failed to sync after "
+        ) + f"{round(child_pipe_duration, 2)} seconds:\n"
+        + child_msg
+    )
+    child_metrics = {
+        'timestamp': datetime.now(timezone.utc),
+        'status': ('success' if child_success else 'failure'),
+        'duration': child_pipe_duration,
+        **{
+            f'rows_{key}': count
+            for key, count in get_rows_counts(child_msg).items()
+        },
+    }
+    for key, pattern in METRICS_PATTERNS.items():
+        matches = pattern.findall(child_msg)
+        if matches:
+            child_metrics[key] = sum(int(match.replace(',', '')) for match in matches)
+    return child_success, child_message, child_metrics
@@ -0,0 +1,35 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Load this checkout as `plugin:compose` in a scratch Meerschaum root.
+"""
+
+import os
+import shutil
+import pathlib
+import tempfile
+
+PACKAGE_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+### The root is kept between runs so that the plugin's requirements are only installed once.
+TESTS_ROOT_DIR = pathlib.Path(tempfile.gettempdir()) / 'mrsm-compose-tests'
+PLUGINS_DIR = TESTS_ROOT_DIR / 'plugins'
+PLUGIN_DIR = PLUGINS_DIR / 'compose'
+
+shutil.rmtree(PLUGIN_DIR, ignore_errors=True)
+shutil.copytree(
+    PACKAGE_DIR,
+    PLUGIN_DIR,
+    ignore=shutil.ignore_patterns('.*', '__pycache__', 'tests', 'root', '*.db'),
+)
+(TESTS_ROOT_DIR / 'root').mkdir(parents=True, exist_ok=True)
+os.environ['MRSM_ROOT_DIR'] = str(TESTS_ROOT_DIR / 'root')
+os.environ['MRSM_PLUGINS_DIR'] = str(PLUGINS_DIR)
+
+import meerschaum.plugins
+
+### Newer versions of Meerschaum bundle a `compose` plugin, so test this checkout instead.
+getattr(meerschaum.plugins, '_FIRST_PARTY_PLUGIN_MODULES', {}).pop('compose', None)
+meerschaum.plugins.load_plugins()
@@ -0,0 +1,145 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test reading the compose config and detecting its changes.
+"""
+
+import copy
+import textwrap
+
+from meerschaum.plugins import from_plugin_import
+
+COMPOSE_CONFIG = {
+    'project_name': 'changetest',
+    'plugins': ['noaa'],
+    'sync': {
+        'pipes': [
+            {
+                'matrix': {'location': ['1', '2']},
+                'template': {
+                    'connector': 'sql:demo',
+                    'metric': 'temperature',
+                    'location': '{{ location }}',
+                    'instance': 'sql:main',
+                },
+            },
+            {'connector': 'sql:demo', 'metric': 'orders', 'instance': 'sql:main'},
+            {'connector': 'plugin:noaa', 'metric': 'weather', 'instance': 'sql:main'},
+            {'connector': 'sql:other', 'metric': 'users', 'instance': 'sql:main'},
+        ],
+    },
+    'config': {
+        'meerschaum': {
+            'connectors': {
+                'sql': {
+                    'demo': {'flavor': 'sqlite', 'database': '/tmp/demo.db'},
+                    'other': {'flavor': 'sqlite', 'database': '/tmp/other.db'},
+                },
+            },
+        },
+    },
+}
+
+
+def get_changes(old_config, new_config) -> dict:
+    get_config_hashes, get_config_changes = from_plugin_import(
+        'compose.utils.config',
+        'get_config_hashes',
+        'get_config_changes',
+    )
+    return get_config_changes(get_config_hashes(old_config), get_config_hashes(new_config))
+
+
+def get_affected_metrics(config_changes) -> list:
+    get_pipe_keys_affected_by_changes = from_plugin_import(
+        'compose.utils.config',
+        'get_pipe_keys_affected_by_changes',
+    )
+    pipes_keys = [
+        ('sql:demo', 'temperature', '1', 'sql:main'),
+        ('sql:demo', 'temperature', '3', 'sql:main'),
+        ('sql:demo', 'orders', 'None', 'sql:main'),
+        ('plugin:noaa', 'weather', 'None', 'sql:main'),
+        ('sql:other', 'users', 'None', 'sql:main'),
+    ]
+    return [
+        (metric, location)
+        for connector, metric, location, instance in pipes_keys
+        if get_pipe_keys_affected_by_changes((connector, metric, location, instance), config_changes)
+    ]
+
+
+def test_config_changes_detect_pipes_connectors_and_sections():
+    """
+    Added, changed, and removed pipes, changed connectors, and changed sections are reported.
+    """
+    new_config = copy.deepcopy(COMPOSE_CONFIG)
+    new_config['sync']['pipes'][0]['matrix']['location'] = ['1', '3']
+    new_config['sync']['pipes'][1]['parameters'] = {'query': 'SELECT 1'}
+    new_config['config']['meerschaum']['connectors']['sql']['other']['database'] = '/tmp/new.db'
+    new_config['sync']['min_seconds'] = 30
+
+    config_changes = get_changes(COMPOSE_CONFIG, new_config)
+    assert config_changes['sections'] == ['sync']
+    assert config_changes['connectors'] == ['sql:other']
+    assert config_changes['pipes'] == {
+        'added': [('sql:demo', 'temperature', '3', 'sql:main')],
+        'changed': [('sql:demo', 'orders', 'None', 'sql:main')],
+        'removed': [('sql:demo', 'temperature', '2', 'sql:main')],
+    }
+    assert get_affected_metrics(config_changes) == [
+        ('temperature', '3'),
+        ('orders', 'None'),
+        ('users', 'None'),
+    ]
+
+
+def test_plugins_changes_affect_plugin_pipes():
+    """
+    Changing the plugins only affects the pipes whose connectors are plugins.
+    """
+    new_config = copy.deepcopy(COMPOSE_CONFIG)
+    new_config['plugins'] = ['noaa', 'color']
+
+    config_changes = get_changes(COMPOSE_CONFIG, new_config)
+    assert config_changes['sections'] == ['plugins']
+    assert config_changes['connectors'] == []
+    assert not any(config_changes['pipes'].values())
+    assert get_affected_metrics(config_changes) == [('weather', 'None')]
+
+
+def test_compiled_config_key_changes_with_referenced_env_vars(tmp_path, monkeypatch):
+    """
+    The compiled config is invalidated by the variables the compose file references
+    and by Meerschaum's variables, but not by unrelated variables.
+    """
+    get_compiled_config_key = from_plugin_import('compose.utils.config', 'get_compiled_config_key')
+    compose_file_path = tmp_path / 'mrsm-compose.yaml'
+    compose_file_path.write_text(textwrap.dedent(
+        """
+        project_name: "keytest"
+        sync:
+          pipes:
+            - connector: "sql:demo"
+              metric: "${KEYTEST_METRIC}"
+        """
+    ))
+    monkeypatch.setenv('KEYTEST_METRIC', 'orders')
+    monkeypatch.delenv('KEYTEST_UNRELATED', raising=False)
+    key = get_compiled_config_key(compose_file_path)
+
+    monkeypatch.setenv('KEYTEST_UNRELATED', 'value')
+    assert get_compiled_config_key(compose_file_path) == key
+
+    monkeypatch.setenv('KEYTEST_METRIC', 'items')
+    items_key = get_compiled_config_key(compose_file_path)
+    assert items_key != key
+
+    monkeypatch.setenv('MRSM_KEYTEST', 'value')
+    mrsm_key = get_compiled_config_key(compose_file_path)
+    assert mrsm_key != items_key
+
+    (tmp_path / '.env').write_text('KEYTEST_METRIC=items\n')
+    assert get_compiled_config_key(compose_file_path) != mrsm_key
@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test the expansion of `include:` entries into fragments' pipes.
+"""
+
+import os
+import textwrap
+
+from meerschaum.plugins import from_plugin_import
+
+
+def write_project(tmp_path) -> dict:
+    """
+    Write a compose file which includes a fragment, which in turn includes a nested fragment.
+    """
+    read_compose_config = from_plugin_import('compose.utils.config', 'read_compose_config')
+    (tmp_path / 'root').mkdir()
+    (tmp_path / 'pipes' / 'nested').mkdir(parents=True)
+    (tmp_path / 'mrsm-compose.yaml').write_text(textwrap.dedent(
+        """
+        project_name: "fragtest"
+        root_dir: "./root"
+        sync:
+          pipes:
+            - connector: "sql:demo"
+              metric: "inline"
+            - include: "pipes/*.yaml"
+        """
+    ))
+    (tmp_path / 'pipes' / 'orders.yaml').write_text(textwrap.dedent(
+        """
+        pipes:
+          - connector: "sql:demo"
+            metric: "orders"
+          - include: "nested/*.yaml"
+        """
+    ))
+    (tmp_path / 'pipes' / 'nested' / 'items.yaml').write_text(textwrap.dedent(
+        """
+        pipes:
+          - connector: "sql:demo"
+            metric: "items"
+            location: "${FRAGTEST_LOCATION}"
+          - include: "../orders.yaml"
+        """
+    ))
+    return read_compose_config(tmp_path / 'mrsm-compose.yaml')
+
+
+def get_pipes_keys(entries) -> list:
+    return [(entry['metric'], entry.get('location', None)) for entry in entries]
+
+
+def test_nested_includes_are_expanded_in_order(tmp_path, monkeypatch):
+    """
+    Includes are resolved relative to their fragment, and recursive includes are skipped.
+    """
+    expand_pipes_includes = from_plugin_import('compose.utils.fragments', 'expand_pipes_includes')
+    monkeypatch.setenv('FRAGTEST_LOCATION', 'us')
+    compose_config = write_project(tmp_path)
+
+    entries = expand_pipes_includes(compose_config['sync']['pipes'], compose_config)
+    assert get_pipes_keys(entries) == [('inline', None), ('orders', None), ('items', 'us')]
+
+
+def test_fragments_are_reparsed_only_when_changed(tmp_path, monkeypatch):
+    """
+    A fragment is cached until its file or its environment variables change.
+    """
+    read_fragment = from_plugin_import('compose.utils.fragments', 'read_fragment')
+    monkeypatch.setenv('FRAGTEST_LOCATION', 'us')
+    compose_config = write_project(tmp_path)
+    items_path = (tmp_path / 'pipes' / 'nested' / 'items.yaml').resolve()
+
+    entries = read_fragment(items_path, compose_config)
+    assert read_fragment(items_path, compose_config) is entries
+    assert (tmp_path / 'root' / '.compose-fragments.pkl').exists()
+
+    monkeypatch.setenv('FRAGTEST_LOCATION', 'eu')
+    assert get_pipes_keys(read_fragment(items_path, compose_config)[:1]) == [('items', 'eu')]
+
+    items_path.write_text(textwrap.dedent(
+        """
+        pipes:
+          - connector: "sql:demo"
+            metric: "items_v2"
+        """
+    ))
+    stat = items_path.stat()
+    os.utime(items_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get_pipes_keys(read_fragment(items_path, compose_config)) == [('items_v2', None)]
@@ -0,0 +1,148 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test the generated jobs and their fingerprints.
+"""
+
+import copy
+import pathlib
+
+from meerschaum.plugins import from_plugin_import
+
+
+def build_compose_config(**sync_config) -> dict:
+    return {
+        'project_name': 'jobtest',
+        '__file__': pathlib.Path('/tmp/jobtest/mrsm-compose.yaml'),
+        'root_dir': pathlib.Path('/tmp/jobtest/root'),
+        'sync': {
+            'min_seconds': 60,
+            **sync_config,
+            'pipes': [
+                {
+                    'matrix': {'location': [str(i) for i in range(20)]},
+                    'template': {
+                        'connector': 'sql:demo',
+                        'metric': 'orders',
+                        'location': '{{ location }}',
+                        'instance': 'sql:main',
+                    },
+                },
+                {'connector': 'sql:demo', 'metric': 'items', 'instance': 'sql:other'},
+                {
+                    'connector': 'sql:demo',
+                    'metric': 'daily',
+                    'instance': 'sql:main',
+                    'schedule': 'daily',
+                },
+            ],
+        },
+    }
+
+
+def test_jobs_commands_split_instances_and_sync_groups():
+    """
+    Each instance gets a sync job, and pipes which override the schedule get their own job.
+    """
+    get_jobs_commands = from_plugin_import('compose.utils.jobs', 'get_jobs_commands')
+    get_sync_group_tag, get_grouped_tag, get_pipe_meta_sync_group = from_plugin_import(
+        'compose.utils.pipes',
+        'get_sync_group_tag',
+        'get_grouped_tag',
+        'get_pipe_meta_sync_group',
+    )
+    compose_config = build_compose_config()
+    sync_group = get_pipe_meta_sync_group(
+        {'parameters': {'compose': {'schedule': 'daily'}}},
+        compose_config,
+    )
+    ungrouped_tags = 'jobtest,_' + get_grouped_tag('jobtest')
+    jobs = get_jobs_commands(compose_config)
+
+    assert jobs == {
+        'jobtest sync (sql:main)': [
+            'sync', 'pipes', '-i', 'sql:main', '-t', ungrouped_tags,
+            '--name', 'jobtest sync (sql:main)', '-f', '-d',
+            '--loop', '--min-seconds', '60',
+        ],
+        f'jobtest sync (sql:main) group {sync_group}': [
+            'sync', 'pipes', '-i', 'sql:main', '-t', get_sync_group_tag('jobtest', sync_group),
+            '--name', f'jobtest sync (sql:main) group {sync_group}', '-f', '-d',
+            '--schedule', 'daily', '--min-seconds', '60',
+        ],
+        'jobtest sync (sql:other)': [
+            'sync', 'pipes', '-i', 'sql:other', '-t', ungrouped_tags,
+            '--name', 'jobtest sync (sql:other)', '-f', '-d',
+            '--loop', '--min-seconds', '60',
+        ],
+    }
+
+
+def test_jobs_commands_split_shards():
+    """
+    With `sync:shards`, each instance's pipes are split between jobs by their shard tags.
+    """
+    get_jobs_commands = from_plugin_import('compose.utils.jobs', 'get_jobs_commands')
+    get_shard_tag = from_plugin_import('compose.utils.pipes', 'get_shard_tag')
+    compose_config = build_compose_config(shards=2)
+    compose_config['sync']['pipes'] = compose_config['sync']['pipes'][:2]
+    jobs = get_jobs_commands(compose_config)
+
+    ### Shards are assigned by hashing the pipes' keys, so the single pipe on `sql:other`
+    ### only gets one shard's job.
+    assert list(jobs) == [
+        'jobtest sync (sql:main) shard 0',
+        'jobtest sync (sql:main) shard 1',
+        'jobtest sync (sql:other) shard 1',
+    ]
+    for job_name, sysargs in jobs.items():
+        shard = int(job_name.rsplit(' ', maxsplit=1)[-1])
+        assert sysargs[sysargs.index('-t') + 1] == get_shard_tag('jobtest', shard)
+
+
+def test_scheduler_mode_runs_a_single_job():
+    """
+    In scheduler mode, a single job runs `compose scheduler` with the project's files.
+    """
+    get_jobs_commands = from_plugin_import('compose.utils.jobs', 'get_jobs_commands')
+    jobs = get_jobs_commands(build_compose_config(mode='scheduler'))
+
+    assert jobs == {
+        'jobtest scheduler': [
+            'compose', 'scheduler',
+            '--file', '/tmp/jobtest/mrsm-compose.yaml',
+            '--env-file', '/tmp/jobtest/.env',
+            '--name', 'jobtest scheduler', '-f', '-d',
+        ],
+    }
+
+
+def test_job_fingerprints_only_include_the_pipes_for_the_scheduler():
+    """
+    Sync jobs read their pipes from the instance, so only the scheduler's fingerprint
+    changes with the pipes, while both change with the rest of the config.
+    """
+    get_job_fingerprint = from_plugin_import('compose.utils.jobs', 'get_job_fingerprint')
+    sync_sysargs = ['sync', 'pipes', '-i', 'sql:main', '--loop']
+    scheduler_sysargs = ['compose', 'scheduler', '--file', '/tmp/jobtest/mrsm-compose.yaml']
+    compose_config = build_compose_config()
+
+    pipes_config = copy.deepcopy(compose_config)
+    pipes_config['sync']['pipes'][1]['metric'] = 'items_v2'
+    assert get_job_fingerprint(sync_sysargs, pipes_config) == (
+        get_job_fingerprint(sync_sysargs, compose_config)
+    )
+    assert get_job_fingerprint(scheduler_sysargs, pipes_config) != (
+        get_job_fingerprint(scheduler_sysargs, compose_config)
+    )
+
+    args_config = copy.deepcopy(compose_config)
+    args_config['sync']['args'] = ['--chunksize', '1000']
+    assert get_job_fingerprint(sync_sysargs, args_config) != (
+        get_job_fingerprint(sync_sysargs, compose_config)
+    )
+    assert get_job_fingerprint(sync_sysargs + ['--debug'], compose_config) != (
+        get_job_fingerprint(sync_sysargs, compose_config)
+    )
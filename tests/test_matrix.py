@@ -0,0 +1,62 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test the expansion of `matrix:` entries.
+"""
+
+from meerschaum.plugins import from_plugin_import
+
+
+def test_dict_matrix_renders_every_combination():
+    """
+    A mapping of variables generates one pipe per combination of values.
+    """
+    iter_matrix_entries = from_plugin_import('compose.utils.matrix', 'iter_matrix_entries')
+    entries = list(iter_matrix_entries({
+        'matrix': {'location': [1, 2], 'unit': ['C', 'F']},
+        'template': {
+            'connector': 'sql:demo',
+            'metric': 'temp_{{ unit }}',
+            'location': '{{ location }}',
+            'parameters': {
+                'query': "SELECT * FROM t WHERE id = {{location}} AND u = '{{ unit }}' -- {{ other }}",
+                'ids': '{{ location }}',
+            },
+        },
+    }))
+
+    assert [(entry['metric'], entry['location']) for entry in entries] == [
+        ('temp_C', '1'),
+        ('temp_F', '1'),
+        ('temp_C', '2'),
+        ('temp_F', '2'),
+    ]
+    assert entries[1]['parameters'] == {
+        'query': "SELECT * FROM t WHERE id = 1 AND u = 'F' -- {{ other }}",
+        'ids': 1,
+    }
+
+
+def test_list_matrix_renders_one_pipe_per_row():
+    """
+    A list of mappings generates one pipe per row, and the rest of the entry is the template.
+    """
+    iter_matrix_entries = from_plugin_import('compose.utils.matrix', 'iter_matrix_entries')
+    entries = list(iter_matrix_entries({
+        'matrix': [
+            {'loc': '2_3', 'ids': ['2', '3']},
+            'invalid row',
+            {'loc': 4, 'ids': ['4']},
+        ],
+        'connector': 'sql:demo',
+        'metric': 'test',
+        'location': '{{ loc }}',
+        'parameters': {'ids': '{{ ids }}'},
+    }))
+
+    assert entries == [
+        {'connector': 'sql:demo', 'metric': 'test', 'location': '2_3', 'parameters': {'ids': ['2', '3']}},
+        {'connector': 'sql:demo', 'metric': 'test', 'location': '4', 'parameters': {'ids': ['4']}},
+    ]
@@ -0,0 +1,117 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test the utilities for managing defined pipes.
+"""
+
+import os
+import sqlite3
+import textwrap
+
+import meerschaum as mrsm
+from meerschaum.plugins import from_plugin_import
+
+
+def read_pipes_rows(database) -> list:
+    with sqlite3.connect(str(database)) as conn:
+        return conn.execute(
+            "SELECT connector_keys, metric_key, location_key, parameters "
+            "FROM mrsm_pipes ORDER BY metric_key, location_key"
+        ).fetchall()
+
+
+def test_register_pipes_matches_subprocess_registration(tmp_path):
+    """
+    Registering in-process stores the same rows as `register pipes` in subprocesses.
+    """
+    register_pipes = from_plugin_import('compose.utils.pipes', 'register_pipes')
+    read_compose_config, init_root = from_plugin_import(
+        'compose.utils.config',
+        'read_compose_config',
+        'init_root',
+    )
+    ### Share the tests' root so that the subprocesses reuse its virtual environments.
+    compose_file_path = tmp_path / 'mrsm-compose.yaml'
+    compose_file_path.write_text(textwrap.dedent(
+        f"""
+        project_name: "regtest"
+        root_dir: "{os.environ['MRSM_ROOT_DIR']}"
+        isolation: "subprocess"
+        config:
+          meerschaum:
+            connectors:
+              sql:
+                regtest:
+                  flavor: "sqlite"
+                  database: "{tmp_path / 'subprocess.db'}"
+        """
+    ))
+    compose_config = read_compose_config(compose_file_path)
+    init_root(compose_config)
+
+    def build_pipes(instance) -> list:
+        return [
+            mrsm.Pipe(
+                'sql:main', 'orders', location,
+                instance=instance,
+                parameters={
+                    'tags': ['regtest'],
+                    'columns': {'datetime': 'ts', 'id': 'id'},
+                    'query': f"SELECT * FROM orders WHERE region = '{location}'",
+                },
+            )
+            for location in (None, 'us', 'eu')
+        ] + [
+            mrsm.Pipe('sql:main', 'scratch', instance=instance, temporary=True),
+        ]
+
+    mrsm.get_connector('sql', 'regtest', flavor='sqlite', database=str(tmp_path / 'inprocess.db'))
+    inprocess_results = register_pipes(build_pipes('sql:regtest'))
+    subprocess_results = register_pipes(build_pipes('sql:regtest'), compose_config)
+
+    assert [success for success, _ in inprocess_results.values()] == [True, True, True, False]
+    assert [success for success, _ in subprocess_results.values()] == [True, True, True, False]
+    assert len(read_pipes_rows(tmp_path / 'inprocess.db')) == 3
+    assert read_pipes_rows(tmp_path / 'inprocess.db') == read_pipes_rows(tmp_path / 'subprocess.db')
+
+
+def build_pipe(metric: str, query: str = None, connector: str = 'sql:main', **parameters) -> mrsm.Pipe:
+    return mrsm.Pipe(
+        connector, metric,
+        instance='sql:main',
+        target=metric,
+        temporary=True,
+        parameters={**({'query': query} if query else {}), **parameters},
+    )
+
+
+def test_pipes_dependencies_from_queries_and_parents():
+    """
+    A pipe depends on the pipes whose targets its query reads from its own connector,
+    and on the pipes declared as its parents.
+    """
+    get_pipes_dependencies = from_plugin_import('compose.utils.pipes', 'get_pipes_dependencies')
+    pipes = [
+        build_pipe('orders'),
+        build_pipe('orders_daily', 'SELECT * FROM orders'),
+        build_pipe('orders_other', 'SELECT * FROM orders', connector='sql:other'),
+        build_pipe('orders_archive', 'SELECT * FROM orders_archived'),
+        build_pipe(
+            'report',
+            parents=[{'connector': 'sql:main', 'metric': 'orders_daily', 'instance': 'sql:main'}],
+        ),
+    ]
+
+    assert get_pipes_dependencies(pipes) == {0: set(), 1: {0}, 2: set(), 3: set(), 4: {1}}
+
+
+def test_dependency_levels_put_cycles_last():
+    """
+    Pipes are grouped into levels after their upstreams, and cycles share the final level.
+    """
+    get_dependency_levels = from_plugin_import('compose.utils.pipes', 'get_dependency_levels')
+
+    assert get_dependency_levels({0: set(), 1: {0}, 2: set(), 3: {1, 2}}) == [[0, 2], [1], [3]]
+    assert get_dependency_levels({0: set(), 1: {2}, 2: {1}, 3: {0}}) == [[0], [3], [1, 2]]
@@ -0,0 +1,185 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test the `plugin:compose` sync method.
+"""
+
+import sys
+import time
+import pathlib
+import threading
+import subprocess
+import textwrap
+
+import meerschaum as mrsm
+from meerschaum.plugins import from_plugin_import
+
+TESTS_DIR = pathlib.Path(__file__).resolve().parent
+
+HUNG_PROCESS_CHILD_SCRIPT = textwrap.dedent(
+    """
+    import sys, time
+    sys.path.insert(0, {tests_dir!r})
+    import conftest
+    import meerschaum as mrsm
+    from meerschaum.plugins import from_plugin_import
+    sync = from_plugin_import('compose.sync', 'sync')
+
+    def fake_sync(self, **kwargs):
+        time.sleep(600 if self.metric_key == 'hung' else 0)
+        return True, 'Inserted 1, updated 0 rows.'
+
+    ### Worker processes are forked, so they inherit the patched method.
+    mrsm.Pipe.sync = fake_sync
+
+    class Parent:
+        connector_keys = 'plugin:compose'
+        metric_key = 'hung_process_child'
+        location_key = None
+        instance_keys = 'sql:memory'
+        parameters = {{'compose': {{'executor': 'process', 'workers': 2}}}}
+        children = [
+            mrsm.Pipe(
+                'plugin:noop', metric, instance='sql:memory', temporary=True,
+                parameters={{'compose': {{'timeout_seconds': 1}}}},
+            )
+            for metric in ('hung', 'quick')
+        ]
+
+    success, msg = sync(Parent())
+    print('timed out' in msg)
+    """
+)
+
+
+def test_hung_process_child_does_not_block_exit():
+    """
+    A child abandoned in a worker process must not keep the interpreter from exiting.
+    """
+    script = HUNG_PROCESS_CHILD_SCRIPT.format(tests_dir=str(TESTS_DIR))
+    proc = subprocess.run(
+        [sys.executable, '-c', script],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().splitlines()[-1] == 'True'
+
+
+class Parent:
+    """
+    A stand-in for a `plugin:compose` pipe with the given children.
+    """
+    connector_keys = 'plugin:compose'
+    location_key = None
+    instance_keys = 'sql:memory'
+
+    def __init__(self, metric_key: str, children, **compose_parameters):
+        self.metric_key = metric_key
+        self.children = children
+        self.parameters = {'compose': {'skip_unchanged': False, **compose_parameters}}
+
+    def __str__(self):
+        return f"Parent({self.metric_key})"
+
+
+def build_child(metric: str, query: str = None, timeout_seconds: float = None) -> mrsm.Pipe:
+    parameters = {'query': query} if query else {}
+    if timeout_seconds is not None:
+        parameters['compose'] = {'timeout_seconds': timeout_seconds}
+    return mrsm.Pipe(
+        'sql:memory', metric,
+        instance='sql:memory',
+        target=metric,
+        temporary=True,
+        parameters=parameters,
+    )
+
+
+def build_chain_children(**timeouts) -> list:
+    """
+    Return the children `extract` -> `transform` -> `load`, and an independent `audit`.
+    """
+    return [
+        build_child('load', 'SELECT * FROM transform', timeouts.get('load', None)),
+        build_child('transform', 'SELECT * FROM extract', timeouts.get('transform', None)),
+        build_child('extract', None, timeouts.get('extract', None)),
+        build_child('audit', None, timeouts.get('audit', None)),
+    ]
+
+
+def patch_children_syncs(monkeypatch, failing=(), hanging=None):
+    """
+    Replace `Pipe.sync()` to record the order of the children's syncs.
+    """
+    events = []
+    lock = threading.Lock()
+
+    def fake_sync(self, **kwargs):
+        with lock:
+            events.append(('start', self.metric_key))
+        if hanging is not None and self.metric_key in hanging:
+            hanging[self.metric_key].wait(30)
+        else:
+            time.sleep(0.05)
+        with lock:
+            events.append(('end', self.metric_key))
+        if self.metric_key in failing:
+            return False, 'Failed to fetch.'
+        return True, 'Inserted 1, updated 0 rows.'
+
+    monkeypatch.setattr(mrsm.Pipe, 'sync', fake_sync)
+    return events
+
+
+def test_sync_respects_dependencies(monkeypatch):
+    """
+    Children start after their upstream children finish, and independent children run alongside.
+    """
+    sync = from_plugin_import('compose.sync', 'sync')
+    events = patch_children_syncs(monkeypatch)
+    success, msg = sync(Parent('dag_order', build_chain_children(), workers=4))
+
+    assert success, msg
+    assert events.index(('end', 'extract')) < events.index(('start', 'transform'))
+    assert events.index(('end', 'transform')) < events.index(('start', 'load'))
+    assert events.index(('start', 'audit')) < events.index(('end', 'extract'))
+
+
+def test_sync_skips_downstream_of_failures(monkeypatch):
+    """
+    Only the children downstream of a failed child are skipped.
+    """
+    sync = from_plugin_import('compose.sync', 'sync')
+    events = patch_children_syncs(monkeypatch, failing=('transform',))
+    success, msg = sync(Parent('dag_failure', build_chain_children(), workers=4))
+
+    assert not success
+    assert 'Skipped 1 pipe.' in msg
+    assert ('start', 'load') not in events
+    assert ('end', 'audit') in events
+
+
+def test_sync_abandons_timed_out_children(monkeypatch):
+    """
+    A child which runs past its timeout is marked as failed and its downstream is skipped,
+    while the rest of the children continue.
+    """
+    sync = from_plugin_import('compose.sync', 'sync')
+    release_extract = threading.Event()
+    events = patch_children_syncs(monkeypatch, hanging={'extract': release_extract})
+    children = build_chain_children(extract=0.5)
+    start = time.monotonic()
+    try:
+        success, msg = sync(Parent('dag_timeout', children, workers=4))
+    finally:
+        release_extract.set()
+
+    assert time.monotonic() - start < 10
+    assert not success
+    assert '1 pipe timed out.' in msg
+    assert 'Skipped 2 pipes.' in msg
+    assert ('end', 'audit') in events
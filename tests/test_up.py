@@ -0,0 +1,76 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test the initial syncs of `compose up`.
+"""
+
+import threading
+
+import meerschaum as mrsm
+from meerschaum.plugins import from_plugin_import
+
+
+def build_pipe(metric: str, query: str = 'SELECT 1 AS id') -> mrsm.Pipe:
+    return mrsm.Pipe(
+        'sql:memory', metric,
+        instance='sql:memory',
+        target=metric,
+        temporary=True,
+        parameters={'query': query},
+    )
+
+
+def test_run_initial_syncs_retries_only_after_upstream_success(monkeypatch):
+    """
+    A failed pipe is retried after one of its upstreams succeeds, and unrelated failures are not.
+    """
+    run_initial_syncs = from_plugin_import('compose.subactions.up', 'run_initial_syncs')
+    pipes = [
+        build_pipe('cycle_a', 'SELECT * FROM cycle_b'),
+        build_pipe('cycle_b', 'SELECT * FROM cycle_a'),
+        build_pipe('broken'),
+        build_pipe('independent'),
+    ]
+    calls = []
+    threads = set()
+
+    def fake_sync(self, **kwargs):
+        calls.append(self.metric_key)
+        threads.add(threading.current_thread())
+        if self.metric_key == 'broken':
+            return False, 'Always fails.'
+        if self.metric_key == 'cycle_a' and calls.count('cycle_a') == 1:
+            return False, 'cycle_b does not exist yet.'
+        return True, 'Success'
+
+    monkeypatch.setattr(mrsm.Pipe, 'sync', fake_sync)
+    success, msg = run_initial_syncs(pipes, {})
+
+    assert not success
+    assert 'broken' in msg
+    assert calls.count('cycle_a') == 2
+    assert calls.count('cycle_b') == 1
+    assert calls.count('broken') == 1
+    assert calls.count('independent') == 1
+    assert threads == {threading.main_thread()}
+
+
+def test_watch_returns_failed_startup(monkeypatch):
+    """
+    `compose up --watch` returns a failed startup instead of watching.
+    """
+    import plugins.compose.subactions.up as up_module
+    import plugins.compose.utils.plugins as plugins_module
+    watched = []
+    monkeypatch.setattr(
+        plugins_module,
+        'check_and_install_plugins',
+        lambda *args, **kwargs: (False, 'Failed to install plugins.'),
+    )
+    monkeypatch.setattr(up_module, 'watch_compose_up', lambda *args, **kwargs: watched.append(True))
+
+    success, msg = up_module._compose_up({'project_name': 'watchtest'}, watch=True)
+    assert (success, msg) == (False, 'Failed to install plugins.')
+    assert not watched
@@ -0,0 +1,66 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Test the pool of warm interpreters.
+"""
+
+import os
+import time
+import textwrap
+
+from meerschaum.plugins import from_plugin_import
+
+
+def wait_for_idle_workers(key, num_workers: int, timeout: float = 30) -> int:
+    WARM_WORKERS = from_plugin_import('compose.utils.workers', 'WARM_WORKERS')
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if len(WARM_WORKERS.get(key, ())) >= num_workers:
+            break
+        time.sleep(0.1)
+    return len(WARM_WORKERS.get(key, ()))
+
+
+def test_warm_workers_are_prestarted_and_replenished(tmp_path):
+    """
+    The pool is started before the first command and topped up after each command.
+    """
+    (
+        prestart_warm_workers,
+        run_warm_command,
+        stop_warm_workers,
+        get_env_key,
+    ) = from_plugin_import(
+        'compose.utils.workers',
+        'prestart_warm_workers',
+        'run_warm_command',
+        'stop_warm_workers',
+        'get_env_key',
+    )
+    read_compose_config, get_env_dict = from_plugin_import(
+        'compose.utils.config',
+        'read_compose_config',
+        'get_env_dict',
+    )
+    compose_file_path = tmp_path / 'mrsm-compose.yaml'
+    compose_file_path.write_text(textwrap.dedent(
+        f"""
+        project_name: "warmtest"
+        root_dir: "{os.environ['MRSM_ROOT_DIR']}"
+        warm_workers: 2
+        """
+    ))
+    compose_config = read_compose_config(compose_file_path)
+    env = get_env_dict(compose_config)
+    key = get_env_key(env)
+
+    try:
+        prestart_warm_workers(compose_config)
+        assert wait_for_idle_workers(key, 2) == 2
+
+        assert run_warm_command(['show', 'version'], env=env, num_workers=2) == 0
+        assert wait_for_idle_workers(key, 2) == 2
+    finally:
+        stop_warm_workers()
@@ -26,16 +26,24 @@ def run_mrsm_command(
     debug: bool = False,
     _subprocess: Optional[bool] = None,
     _replace: bool = True,
+    _env: Optional[Dict[str, str]] = None,
     **kw
 ) -> mrsm.SuccessTuple:
     """
     Run a Meerschaum command in a subprocess.
+    If `warm_workers` is set, subprocess commands run in pre-started interpreters.
+    If `_env` is provided, run the command with this environment instead.
     """
     from meerschaum.config.environment import replace_env
     from meerschaum.utils.packages import run_python_package
     from meerschaum.config import replace_config
     import meerschaum.config.paths as paths
     from meerschaum._internal.entry import entry
+    get_num_warm_workers, run_warm_command = from_plugin_import(
+        'compose.utils.workers',
+        'get_num_warm_workers',
+        'run_warm_command',
+    )
 
     project_name = get_project_name(compose_config)
     if isinstance(args, str):
@@ -69,8 +77,22 @@ def run_mrsm_command(
 
     config = copy.deepcopy(compose_config.get('config', {})) if _replace else None
     env = get_env_dict(compose_config) if _replace else None
+    if _env is not None:
+        env = _env
     root_dir_path = compose_config.get('root_dir', paths.ROOT_DIR_PATH) if _replace else None
 
+    num_warm_workers = get_num_warm_workers(compose_config) if not kw else 0
+    if _subprocess and not capture_output and num_warm_workers:
+        success = run_warm_command(
+            sysargs,
+            env=env,
+            num_workers=num_warm_workers,
+            debug=debug,
+        ) == 0
+        if success:
+            return success, "Success"
+        return False, f"Failed to execute sysargs:\n{sysargs}"
+
     if capture_output or _subprocess:
         success = run_python_package(
             'meerschaum',
@@ -100,6 +122,7 @@ def init(
     file: Optional[pathlib.Path] = None,
     env_file: Optional[pathlib.Path] = None,
     isolated: bool = False,
+    override_env: bool = False,
     debug: bool = False,
     **kw: Any
 ) -> Dict[str, Any]:
@@ -116,6 +139,9 @@ def init(
         Use a specific environment file.
         Defaults to `./.env`.
 
+    override_env: bool, default False
+        If `True`, overwrite existing environment variables with the environment file's values.
+
     Returns
     -------
     The file path to a compose file if it exists, else `None`.
@@ -140,7 +166,7 @@ def init(
             + "Create a file mrsm-compose.yaml or specify a path with `--file`."
         )
 
-    init_env(compose_file_path, env_file)
+    init_env(compose_file_path, env_file, override=override_env)
     compose_config = read_compose_config(
         compose_file_path,
         env_file=env_file,
@@ -7,13 +7,14 @@ Read the configuration files.
 """
 
 import os
+import re
 import pathlib
 import json
 import pickle
 import platform
 
 import meerschaum as mrsm
-from meerschaum.utils.typing import Optional, Union, Dict, Any, List
+from meerschaum.utils.typing import Optional, Union, Dict, Any, List, Tuple
 from meerschaum.utils.warnings import warn, info
 from meerschaum.plugins import from_plugin_import
 from meerschaum.utils.misc import items_str
@@ -33,10 +34,19 @@ COMPOSE_KEYS = [
     'jobs',
     'isolation',
     'daemon',
+    'warm_workers',
 ]
 DEFAULT_COMPOSE_FILE_CANDIDATES = ['mrsm-compose.yaml', 'mrsm-compose.yml']
+ENV_COMPOSE_CONFIGS_DIR_NAME: str = '.compose-configs'
+ENV_COMPOSE_CONFIGS_LIMIT: int = 8
 CONFIG_METADATA: Dict[str, Any] = {}
 
+### Bump this version when the compiled config's structure changes.
+COMPILED_CONFIG_CACHE_VERSION: int = 3
+ENV_VAR_PATTERN = re.compile(r'\$\{?([A-Za-z_][A-Za-z0-9_]*)')
+HOST_CONFIG_PATTERN = re.compile(r'MRSM\{|\{\s*[\w-]+:[\w-]+\s*\}')
+ROOT_DIR_PATTERN = re.compile(r'^root_dir:[ \t]*[\'"]?([^\'"#\n]*?)[\'"]?[ \t]*(?:#.*)?$', re.MULTILINE)
+
 
 def infer_compose_file_path(file: Optional[pathlib.Path] = None) -> Union[pathlib.Path, None]:
     """
@@ -94,48 +104,24 @@ def read_compose_config(
 
     ensure_project_name = from_plugin_import('compose.utils.stack', 'ensure_project_name')
 
-    envyaml = mrsm.attempt_import('envyaml', venv='compose')
+    ### Skip parsing if the compose file, env file, and environment haven't changed.
     try:
-        env = envyaml.EnvYAML(
-            yaml_file = compose_file_path,
-            env_file = env_file,
-            include_environment = True,
-            flatten = False,
-            strict = True,
-        )
-    except ValueError as ve:
-        ### Yes, this is a hacky way to build the message,
-        ### but it's the best solution for the time being.
-        missing_vars = (
-            str(ve)
-            .split(' variables ', maxsplit=1)[-1]
-            .split(' are not ', maxsplit=1)[0]
-            .replace(' ', '')
-            .split(',')
-        )
-
-        singular = len(missing_vars) == 1
-        message = (
-            items_str(missing_vars)
-            + ' ' + ('is' if singular else 'are') + ' not defined!\n'
-            + '     Using ' + ('an' if singular else '')
-            + ' empty string' + ('' if singular else 's') + ' for '
-            + ('this variable' if singular else 'these variables')
-            + '.'
-        )
-        warn(message, stack=False)
-        
-        for var in missing_vars:
-            os.environ[var.lstrip('$')] = ''
-
-        env = envyaml.EnvYAML(
-            yaml_file = compose_file_path,
-            env_file = env_file,
-            include_environment = True,
-            flatten = False,
-            strict = True,
-        )
-
+        compiled_config_key = get_compiled_config_key(compose_file_path, env_file, isolated)
+        compiled_config = read_compiled_config_cache(compose_file_path, compiled_config_key)
+    except Exception as e:
+        if debug:
+            warn(f"Failed to read the compiled config cache:\n{e}", stack=False)
+        compiled_config_key, compiled_config = None, None
+
+    if compiled_config is not None:
+        compose_config, missing_vars = compiled_config
+        if missing_vars:
+            warn(get_missing_vars_message(missing_vars), stack=False)
+            for var in missing_vars:
+                os.environ[var.lstrip('$')] = ''
+        return compose_config
+
+    env, missing_vars = load_envyaml(compose_file_path, env_file=env_file)
     compose_config = {k: env[k] for k in COMPOSE_KEYS if k in env}
     compose_cf = compose_config.get('config', {})
     if compose_cf:
@@ -213,8 +199,9 @@ def read_compose_config(
 
     compose_config['daemon'] = compose_config.get('daemon', True)
 
-    ### Add metadata keys (project_name, root_dir, plugin_dir, __file__).
+    ### Add metadata keys (project_name, root_dir, plugin_dir, __file__, __env_file__).
     compose_config['__file__'] = compose_file_path
+    compose_config['__env_file__'] = compose_file_path.parent / (env_file or '.env')
     ensure_dir_keys(compose_config)
     ensure_project_name(compose_config)
 
@@ -224,9 +211,224 @@ def read_compose_config(
         '{MRSM_ROOT_DIR}'
     )
     compose_config = replace_config_paths(compose_config, compose_file_path, '{__file__}')
+    compose_config['__version__'] = compiled_config_key or hash_config(compose_config)
+
+    if compiled_config_key is not None:
+        try:
+            write_compiled_config_cache(
+                compose_file_path,
+                compiled_config_key,
+                compose_config,
+                missing_vars,
+            )
+        except Exception as e:
+            if debug:
+                warn(f"Failed to write the compiled config cache:\n{e}", stack=False)
+
     return compose_config
 
 
+def load_envyaml(
+    yaml_path: pathlib.Path,
+    env_file: Optional[pathlib.Path] = None,
+) -> Tuple[Any, List[str]]:
+    """
+    Parse a YAML file with environment variable substitution.
+    Undefined variables are set to empty strings (with a warning).
+
+    Returns
+    -------
+    A tuple of the parsed `EnvYAML` object and the list of undefined variables.
+    """
+    envyaml = mrsm.attempt_import('envyaml', venv='compose')
+    missing_vars = []
+    try:
+        env = envyaml.EnvYAML(
+            yaml_file = yaml_path,
+            env_file = env_file,
+            include_environment = True,
+            flatten = False,
+            strict = True,
+        )
+    except ValueError as ve:
+        ### Yes, this is a hacky way to build the message,
+        ### but it's the best solution for the time being.
+        missing_vars = (
+            str(ve)
+            .split(' variables ', maxsplit=1)[-1]
+            .split(' are not ', maxsplit=1)[0]
+            .replace(' ', '')
+            .split(',')
+        )
+
+        warn(get_missing_vars_message(missing_vars), stack=False)
+        
+        for var in missing_vars:
+            os.environ[var.lstrip('$')] = ''
+
+        env = envyaml.EnvYAML(
+            yaml_file = yaml_path,
+            env_file = env_file,
+            include_environment = True,
+            flatten = False,
+            strict = True,
+        )
+
+    return env, missing_vars
+
+
+def get_missing_vars_message(missing_vars: List[str]) -> str:
+    """
+    Return the warning message for undefined environment variables.
+    """
+    singular = len(missing_vars) == 1
+    return (
+        items_str(missing_vars)
+        + ' ' + ('is' if singular else 'are') + ' not defined!\n'
+        + '     Using ' + ('an' if singular else '')
+        + ' empty string' + ('' if singular else 's') + ' for '
+        + ('this variable' if singular else 'these variables')
+        + '.'
+    )
+
+
+def get_compiled_config_cache_path(compose_file_path: pathlib.Path) -> pathlib.Path:
+    """
+    Return the file path to the compiled config cache.
+
+    Because the root directory is only known after parsing,
+    guess it from the compose file's top-level `root_dir` key
+    (defaulting to the `root` directory next to the compose file).
+    """
+    with open(compose_file_path, 'r', encoding='utf-8') as f:
+        match = ROOT_DIR_PATTERN.search(f.read())
+
+    root_dir_str = match.group(1).strip() if match else ''
+    if (
+        not root_dir_str
+        or root_dir_str in ('null', '~')
+        or '$' in root_dir_str
+        or '{' in root_dir_str
+    ):
+        root_dir_path = compose_file_path.parent / 'root'
+    else:
+        root_dir_path = pathlib.Path(_resolve_abs(root_dir_str, compose_file_path.parent))
+
+    return root_dir_path / '.compose-compiled.pkl'
+
+
+def get_env_var_names(text: str) -> List[str]:
+    """
+    Return the sorted names of the environment variables referenced in a YAML file's text.
+    """
+    return sorted(set(ENV_VAR_PATTERN.findall(text)))
+
+
+def get_compiled_config_key(
+    compose_file_path: pathlib.Path,
+    env_file: Optional[pathlib.Path] = None,
+    isolated: bool = False,
+) -> str:
+    """
+    Return the hash of everything which affects the compiled compose config:
+    the compose and env files' contents and modification times,
+    the environment variables referenced in the compose file, Meerschaum's environment variables,
+    and the host config (if the compose file references it).
+    """
+    import hashlib
+
+    def _get_file_key(path: pathlib.Path) -> Union[Dict[str, Any], None]:
+        if not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            content = f.read()
+        return {
+            'mtime_ns': path.stat().st_mtime_ns,
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+
+    with open(compose_file_path, 'r', encoding='utf-8') as f:
+        compose_text = f.read()
+
+    env_path = compose_file_path.parent / (env_file or '.env')
+    referenced_vars = get_env_var_names(compose_text)
+    key_dict = {
+        'version': COMPILED_CONFIG_CACHE_VERSION,
+        'mrsm_version': mrsm.__version__,
+        'compose_file': compose_file_path.as_posix(),
+        'compose_file_key': _get_file_key(compose_file_path),
+        'env_file': env_path.as_posix(),
+        'env_file_key': _get_file_key(env_path),
+        'isolated': isolated,
+        'referenced_vars': {var: os.environ.get(var, None) for var in referenced_vars},
+        'mrsm_vars': {
+            var: hash_config({var: val})
+            for var, val in os.environ.items()
+            if var.startswith('MRSM_')
+        },
+        'host_config': (
+            hash_config(mrsm.get_config())
+            if HOST_CONFIG_PATTERN.search(compose_text)
+            else None
+        ),
+    }
+    return hash_config(key_dict)
+
+
+def read_compiled_config_cache(
+    compose_file_path: pathlib.Path,
+    compiled_config_key: str,
+) -> Union[Tuple[Dict[str, Any], List[str]], None]:
+    """
+    Return the cached compose config and missing environment variables
+    if the cache matches the key, otherwise `None`.
+    """
+    cache_path = get_compiled_config_cache_path(compose_file_path)
+    if not cache_path.exists():
+        return None
+
+    with open(cache_path, 'rb') as f:
+        cache = pickle.load(f)
+
+    entry = cache.get(compose_file_path.as_posix(), None) if isinstance(cache, dict) else None
+    if not entry or entry.get('key', None) != compiled_config_key:
+        return None
+
+    return entry['compose_config'], entry.get('missing_vars', [])
+
+
+def write_compiled_config_cache(
+    compose_file_path: pathlib.Path,
+    compiled_config_key: str,
+    compose_config: Dict[str, Any],
+    missing_vars: List[str],
+) -> None:
+    """
+    Write the compiled compose config to the cache (if the root directory exists).
+    """
+    cache_path = get_compiled_config_cache_path(compose_file_path)
+    if not cache_path.parent.exists():
+        return
+
+    cache = {}
+    if cache_path.exists():
+        try:
+            with open(cache_path, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception:
+            cache = {}
+    if not isinstance(cache, dict):
+        cache = {}
+
+    cache[compose_file_path.as_posix()] = {
+        'key': compiled_config_key,
+        'compose_config': compose_config,
+        'missing_vars': missing_vars,
+    }
+    with open(cache_path, 'wb') as f:
+        pickle.dump(cache, f)
+
+
 def ensure_dir_keys(compose_config: Dict[str, Any]) -> None:
     """
     Add the keys `root_dir` and `plugins_dir`.
@@ -259,6 +461,8 @@ def get_dir_paths(compose_config: Dict[str, Any], dir_name: str) -> List[pathlib
     """
     Return the absolute paths for the configured plugins directory.
     Throw a warning if multiple values are configured.
+    Relative paths are resolved against the compose file's directory
+    (without changing the working directory).
 
     Parameters
     ----------
@@ -275,9 +479,11 @@ def get_dir_paths(compose_config: Dict[str, Any], dir_name: str) -> List[pathlib
     """
     from meerschaum.config._paths import PLUGINS_RESOURCES_PATH, ROOT_DIR_PATH
     compose_file_path = compose_config.get('__file__', None)
-    old_cwd = os.getcwd()
-    if compose_file_path is not None:
-        os.chdir(compose_file_path.parent)
+    base_dir = (
+        compose_file_path.parent
+        if compose_file_path is not None
+        else pathlib.Path(os.getcwd())
+    )
 
     configured_dir = compose_config.get(f'{dir_name}_dir', -1)
     env_dir = compose_config.get('environment', {}).get(f'MRSM_{dir_name.upper()}_DIR', None)
@@ -288,11 +494,11 @@ def get_dir_paths(compose_config: Dict[str, Any], dir_name: str) -> List[pathlib
     if isinstance(env_dir, str):
         if env_dir.lstrip().startswith('['):
             env_dir_paths = [
-                pathlib.Path(env_path_str).resolve()
+                pathlib.Path(_resolve_abs(env_path_str, base_dir))
                 for env_path_str in json.loads(env_dir)
             ]
         else:
-            env_dir_paths = [pathlib.Path(env_dir).resolve()]
+            env_dir_paths = [pathlib.Path(_resolve_abs(env_dir, base_dir))]
     else:
         env_dir_paths = []
 
@@ -316,7 +522,7 @@ def get_dir_paths(compose_config: Dict[str, Any], dir_name: str) -> List[pathlib
                 info("A null value for `root_dir` will use the host Meerschaum root directory.")
                 path = ROOT_DIR_PATH
         else:
-            path = pathlib.Path(configured_dir_val).resolve()
+            path = pathlib.Path(_resolve_abs(configured_dir_val, base_dir))
         if path not in configured_dir_paths:
             configured_dir_paths.append(path)
 
@@ -333,9 +539,6 @@ def get_dir_paths(compose_config: Dict[str, Any], dir_name: str) -> List[pathlib
             unique_paths.append(real_path)
     existing_unique_paths = [path for path in unique_paths if path.exists()]
 
-    if compose_file_path is not None:
-        os.chdir(old_cwd)
-
     if (
         len(existing_unique_paths) > 1
         and
@@ -366,6 +569,23 @@ def _resolve_abs(path_str: str, base_dir: pathlib.Path) -> str:
 def get_env_dict(compose_config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Return a dictionary of environment variables.
+    The dictionary is built once per config version (see `read_compose_config()`).
+    """
+    version = compose_config.get('__version__', None)
+    memo_key = (version, os.environ.get('TERM', None))
+    env_dicts = CONFIG_METADATA.setdefault('env_dicts', {})
+    if version is not None and platform.system() != 'Windows' and memo_key in env_dicts:
+        return dict(env_dicts[memo_key])
+
+    env_dict = build_env_dict(compose_config)
+    if version is not None:
+        env_dicts[memo_key] = env_dict
+    return dict(env_dict)
+
+
+def build_env_dict(compose_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the dictionary of environment variables.
     """
     env_dict = {}
 
@@ -399,10 +619,21 @@ def get_env_dict(compose_config: Dict[str, Any]) -> Dict[str, Any]:
             )
         )
 
-    env_dict['MRSM__COMPOSE_CONFIG'] = json.dumps(
-        compose_config, separators=(',', ':'),
-        default=json_serialize_value,
-    )
+    ### Pass the path to the serialized config rather than inlining it in every environment.
+    compose_config_path = None
+    if root_dir_path is not None:
+        try:
+            compose_config_path = write_env_compose_config(compose_config)
+        except Exception as e:
+            warn(f"Failed to write the compose config for child processes:\n{e}", stack=False)
+
+    if compose_config_path is not None:
+        env_dict['MRSM__COMPOSE_CONFIG_PATH'] = compose_config_path.as_posix()
+    else:
+        env_dict['MRSM__COMPOSE_CONFIG'] = json.dumps(
+            compose_config, separators=(',', ':'),
+            default=json_serialize_value,
+        )
 
     config = compose_config.get('config', None)
     if config:
@@ -460,6 +691,75 @@ def get_env_dict(compose_config: Dict[str, Any]) -> Dict[str, Any]:
     return env_dict
 
 
+def get_env_compose_config_path(compose_config: Dict[str, Any]) -> pathlib.Path:
+    """
+    Return the file path to the compose config serialized for child processes.
+    Each config version gets its own file, so running children never see a newer config.
+    """
+    version = compose_config.get('__version__', None) or hash_config(compose_config)
+    return compose_config['root_dir'] / ENV_COMPOSE_CONFIGS_DIR_NAME / f'{version}.json'
+
+
+def write_env_compose_config(compose_config: Dict[str, Any]) -> pathlib.Path:
+    """
+    Serialize the compose config for child processes and return the file's path.
+    Only the most recent `ENV_COMPOSE_CONFIGS_LIMIT` versions are kept.
+    """
+    path = get_env_compose_config_path(compose_config)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + f'.{os.getpid()}.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(compose_config, f, separators=(',', ':'), default=json_serialize_value)
+    os.replace(temp_path, path)
+
+    old_paths = sorted(
+        (old_path for old_path in path.parent.glob('*.json') if old_path != path),
+        key=lambda old_path: old_path.stat().st_mtime,
+        reverse=True,
+    )
+    for old_path in old_paths[(ENV_COMPOSE_CONFIGS_LIMIT - 1):]:
+        try:
+            old_path.unlink()
+        except OSError:
+            pass
+
+    return path
+
+
+def is_compose_env() -> bool:
+    """
+    Return whether the current process is running inside a compose project's environment.
+    """
+    return 'MRSM__COMPOSE_CONFIG_PATH' in os.environ or 'MRSM__COMPOSE_CONFIG' in os.environ
+
+
+def get_env_compose_config() -> Union[Dict[str, Any], None]:
+    """
+    Return the compose config passed down through the environment
+    (e.g. for plugins which read their project's config),
+    or `None` if not running inside a compose project.
+    """
+    compose_config_path = os.environ.get('MRSM__COMPOSE_CONFIG_PATH', None)
+    env_compose_configs = CONFIG_METADATA.setdefault('env_compose_configs', {})
+    if compose_config_path in env_compose_configs:
+        return env_compose_configs[compose_config_path]
+
+    ### Each version is written to its own file, so the file's contents never change.
+    if compose_config_path and os.path.exists(compose_config_path):
+        with open(compose_config_path, 'r', encoding='utf-8') as f:
+            env_compose_configs[compose_config_path] = json.load(f)
+        return env_compose_configs[compose_config_path]
+
+    compose_config_str = os.environ.get('MRSM__COMPOSE_CONFIG', None)
+    if compose_config_str:
+        return json.loads(compose_config_str)
+
+    return None
+
+
 def write_patch(compose_config: Dict[str, Any], debug: bool = False) -> None:
     """
     Write the patch files to the configured patch directory.
@@ -505,16 +805,13 @@ def init_root(compose_config: Dict[str, Any], debug: bool = False) -> bool:
                 debug=debug,
             )
 
-    ### Update the cache after building the in-memory config.
-    if config_has_changed(compose_config):
-        write_config_cache(compose_config)
-
     return success
 
 
 def init_env(
     compose_file_path: pathlib.Path,
-    env_file: Optional[pathlib.Path] = None
+    env_file: Optional[pathlib.Path] = None,
+    override: bool = False,
 ) -> None:
     """
     Initialize the local environment from the dotfile.
@@ -524,19 +821,20 @@ def init_env(
     env_file: Optional[pathlib.Path], default None
         The path to the the environment dotfile.
         Infer `.env` if `env_file` is `None`.
+
+    override: bool, default False
+        If `True`, overwrite existing environment variables
+        (e.g. when reloading an edited dotfile).
     """
     dotenv = mrsm.attempt_import('dotenv', venv='compose')
-    old_cwd = os.getcwd()
-    os.chdir(compose_file_path.parent)
     if env_file is None:
         env_file = '.env'
     env_path = compose_file_path.parent / env_file
     try:
         if env_path.exists():
-            dotenv.load_dotenv(env_file)
+            dotenv.load_dotenv(env_path, override=override)
     except Exception as e:
         warn(f"Failed to load '{env_path}':\n{e}")
-    os.chdir(old_cwd)
 
 
 def get_config_cache_path(compose_config: Dict[str, Any]) -> pathlib.Path:
@@ -549,38 +847,197 @@ def get_config_cache_path(compose_config: Dict[str, Any]) -> pathlib.Path:
 
 def write_config_cache(compose_config: Dict[str, Any]) -> None:
     """
-    Write the current compose configuration to a cache file.
+    Write the current compose configuration's hashes (see `get_config_hashes()`) to a cache file.
     """
     config_cache_path = get_config_cache_path(compose_config) 
 
     with open(config_cache_path, 'wb') as f:
-        pickle.dump(hash_config(compose_config), f)
+        pickle.dump(get_config_hashes(compose_config), f)
+
+    CONFIG_METADATA.pop('config_changes', None)
 
 
-def read_config_cache(compose_config: Dict[str, Any]) -> Union[int, None]:
+def read_config_cache(compose_config: Dict[str, Any]) -> Union[Dict[str, Dict[Any, str]], None]:
     """
-    Read and return the cached config metadata.
-    If no cache exists, return None.
+    Read and return the cached config hashes.
+    If no cache exists (or it was written in an older format), return None.
     """
     config_cache_path = get_config_cache_path(compose_config)
     if not config_cache_path.exists():
         return None
-    with open(config_cache_path, 'rb') as f:
-        config_cache = pickle.load(f)
+    try:
+        with open(config_cache_path, 'rb') as f:
+            config_cache = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(config_cache, dict) or 'sections' not in config_cache:
+        return None
     return config_cache
 
 
+def get_cached_config_changes(compose_config: Dict[str, Any]) -> Union[Dict[str, Any], None]:
+    """
+    Return the changes (see `get_config_changes()`) since the config was last cached,
+    or `None` if there is no cache.
+    """
+    if 'config_changes' in CONFIG_METADATA:
+        return CONFIG_METADATA['config_changes']
+    config_cache = read_config_cache(compose_config)
+    config_changes = (
+        get_config_changes(config_cache, get_config_hashes(compose_config))
+        if config_cache is not None
+        else None
+    )
+    CONFIG_METADATA['config_changes'] = config_changes
+    return config_changes
+
+
 def config_has_changed(compose_config: Dict[str, Any]) -> bool:
     """
     Check if the in-memory configuration is the same as the last cached version.
     """
-    if 'config_has_changed' in CONFIG_METADATA:
-        return CONFIG_METADATA['config_has_changed']
-    config_cache = read_config_cache(compose_config)
-    hashed_config = hash_config(compose_config)
-    has_changed = (config_cache != hashed_config)
-    CONFIG_METADATA['config_has_changed'] = has_changed
-    return has_changed
+    config_changes = get_cached_config_changes(compose_config)
+    if config_changes is None:
+        return True
+    return bool(
+        config_changes['sections']
+        or config_changes['connectors']
+        or any(config_changes['pipes'].values())
+    )
+
+
+def get_config_hashes(compose_config: Dict[str, Any]) -> Dict[str, Dict[Any, str]]:
+    """
+    Return the hashes of the compose configuration's parts.
+
+    Returns
+    -------
+    A dictionary with the keys:
+        - `sections`: the hashes of the top-level keys
+            (excluding the pipes, and `config` excluding the connectors),
+        - `connectors`: the hashes of each connector's attributes (keyed by connector keys),
+        - `pipes`: the hashes of each pipe's definition (keyed by `get_pipe_keys()`).
+    """
+    from meerschaum.config import get_config
+    iter_defined_pipes, get_pipe_meta_keys = from_plugin_import(
+        'compose.utils.pipes',
+        'iter_defined_pipes',
+        'get_pipe_meta_keys',
+    )
+    default_instance = get_config('meerschaum', 'instance')
+    sections = {
+        key: val
+        for key, val in compose_config.items()
+        if key not in ('pipes', 'connectors', '__version__')
+    }
+    if isinstance(sections.get('sync', None), dict):
+        sections['sync'] = {
+            key: val
+            for key, val in sections['sync'].items()
+            if key != 'pipes'
+        }
+
+    connectors_config = compose_config.get('config', {}).get('meerschaum', {}).get('connectors', {})
+    if isinstance(sections.get('config', None), dict):
+        sections['config'] = {
+            key: (
+                {_key: _val for _key, _val in val.items() if _key != 'connectors'}
+                if key == 'meerschaum' and isinstance(val, dict)
+                else val
+            )
+            for key, val in sections['config'].items()
+        }
+
+    return {
+        'sections': {key: hash_config({key: val}) for key, val in sections.items()},
+        'connectors': {
+            typ + ':' + label: hash_config({'attributes': attributes})
+            for typ, labels in (connectors_config or {}).items()
+            for label, attributes in (labels or {}).items()
+        },
+        'pipes': {
+            get_pipe_meta_keys(pipe_meta, default_instance): hash_config(pipe_meta)
+            for pipe_meta in iter_defined_pipes(compose_config, as_meta=True)
+        },
+    }
+
+
+def get_config_changes(
+    old_config_hashes: Dict[str, Dict[Any, str]],
+    config_hashes: Dict[str, Dict[Any, str]],
+) -> Dict[str, Any]:
+    """
+    Return the differences between two compose configurations' hashes.
+
+    Parameters
+    ----------
+    old_config_hashes: Dict[str, Dict[Any, str]]
+        The hashes of the previous compose configuration (see `get_config_hashes()`).
+
+    config_hashes: Dict[str, Dict[Any, str]]
+        The hashes of the current compose configuration.
+
+    Returns
+    -------
+    A dictionary with the keys:
+        - `sections`: the top-level keys whose values changed (excluding the pipes and connectors),
+        - `connectors`: the keys of the connectors which were added, changed, or removed,
+        - `pipes`: a dictionary of lists of `added`, `changed`, and `removed` pipes' keys.
+    """
+    def _diff_keys(old_hashes, new_hashes):
+        return sorted(
+            key
+            for key in set(old_hashes) | set(new_hashes)
+            if old_hashes.get(key, None) != new_hashes.get(key, None)
+        )
+
+    old_pipes_hashes, pipes_hashes = old_config_hashes['pipes'], config_hashes['pipes']
+    return {
+        'sections': _diff_keys(old_config_hashes['sections'], config_hashes['sections']),
+        'connectors': _diff_keys(old_config_hashes['connectors'], config_hashes['connectors']),
+        'pipes': {
+            'added': [keys for keys in pipes_hashes if keys not in old_pipes_hashes],
+            'changed': [
+                keys
+                for keys, pipe_hash in pipes_hashes.items()
+                if keys in old_pipes_hashes and old_pipes_hashes[keys] != pipe_hash
+            ],
+            'removed': [keys for keys in old_pipes_hashes if keys not in pipes_hashes],
+        },
+    }
+
+
+def get_pipe_affected_by_changes(pipe: mrsm.Pipe, config_changes: Dict[str, Any]) -> bool:
+    """
+    Return whether a pipe's definition, connectors, or plugins have changed.
+    """
+    get_pipe_keys = from_plugin_import('compose.utils.pipes', 'get_pipe_keys')
+    return get_pipe_keys_affected_by_changes(get_pipe_keys(pipe), config_changes)
+
+
+def get_pipe_keys_affected_by_changes(
+    pipe_keys: Tuple[str, str, str, str],
+    config_changes: Dict[str, Any],
+) -> bool:
+    """
+    Return whether the definition, connectors, or plugins of the pipe with these keys
+    (see `get_pipe_keys()`) have changed.
+    """
+    from meerschaum.connectors import custom_types
+    if pipe_keys in config_changes['pipes']['added'] or pipe_keys in config_changes['pipes']['changed']:
+        return True
+
+    connector_keys, _, _, instance_keys = pipe_keys
+    if connector_keys in config_changes['connectors']:
+        return True
+    if instance_keys in config_changes['connectors']:
+        return True
+
+    connector_type = connector_keys.split(':', maxsplit=1)[0]
+    return (
+        any(key in config_changes['sections'] for key in ('plugins', 'plugins_dir'))
+        and (connector_type == 'plugin' or connector_type in custom_types)
+    )
 
 
 def hash_config(compose_config: Dict[str, Any]) -> str:
@@ -0,0 +1,259 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Expand `include:` entries in the pipes lists into the pipes defined in fragment files.
+
+A fragment is a YAML file with a top-level `pipes:` list, e.g.:
+
+```yaml
+sync:
+  pipes:
+    - include: "pipes/*.yaml"
+```
+
+Fragments are only parsed when the pipes are needed (e.g. not for `compose ps`),
+and each fragment is cached (in memory and in the root directory) until it changes.
+"""
+
+import os
+import glob
+import pickle
+import pathlib
+from typing import List, Dict, Any, Optional, Tuple
+
+from meerschaum.utils.warnings import warn, dprint
+from meerschaum.plugins import from_plugin_import
+
+### Parsed fragments, keyed by path: (key, pipes entries).
+FRAGMENTS_CACHE: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {}
+
+
+def pipes_have_includes(pipes_entries: List[Dict[str, Any]]) -> bool:
+    """
+    Return whether any of the pipes entries are `include:` entries.
+    """
+    return any(_is_include_entry(entry) for entry in pipes_entries)
+
+
+def expand_pipes_includes(
+    pipes_entries: List[Dict[str, Any]],
+    compose_config: Dict[str, Any],
+    base_dir: Optional[pathlib.Path] = None,
+    debug: bool = False,
+    _included_paths: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Return the pipes entries with `include:` entries replaced by the fragments' pipes.
+
+    Parameters
+    ----------
+    pipes_entries: List[Dict[str, Any]]
+        The pipes entries from the compose file (or a fragment).
+
+    compose_config: Dict[str, Any]
+        The compose configuration dictionary.
+
+    base_dir: Optional[pathlib.Path], default None
+        The directory against which relative patterns are resolved.
+        Defaults to the compose file's directory.
+
+    Returns
+    -------
+    A list of pipes entries (the cached entries are not copied, so do not modify them).
+    """
+    if not pipes_have_includes(pipes_entries):
+        return pipes_entries
+
+    if base_dir is None:
+        base_dir = compose_config['__file__'].parent
+    included_paths = _included_paths if _included_paths is not None else []
+
+    expanded_entries = []
+    for entry in pipes_entries:
+        if not _is_include_entry(entry):
+            expanded_entries.append(entry)
+            continue
+
+        for fragment_path in get_include_paths(entry['include'], base_dir):
+            if fragment_path.as_posix() in included_paths:
+                warn(f"Skipping recursive include of '{fragment_path}'.", stack=False)
+                continue
+
+            fragment_entries = read_fragment(fragment_path, compose_config, debug=debug)
+            expanded_entries.extend(
+                expand_pipes_includes(
+                    fragment_entries,
+                    compose_config,
+                    base_dir=fragment_path.parent,
+                    debug=debug,
+                    _included_paths=(included_paths + [fragment_path.as_posix()]),
+                )
+            )
+
+    return expanded_entries
+
+
+def get_fragments_paths(
+    compose_config: Dict[str, Any],
+    debug: bool = False,
+) -> List[pathlib.Path]:
+    """
+    Return the paths to all of the fragments (including nested fragments) in the compose config.
+    """
+    fragments_paths = []
+
+    def _collect(pipes_entries, base_dir):
+        for entry in pipes_entries:
+            if not _is_include_entry(entry):
+                continue
+            for fragment_path in get_include_paths(entry['include'], base_dir):
+                if fragment_path in fragments_paths:
+                    continue
+                fragments_paths.append(fragment_path)
+                _collect(read_fragment(fragment_path, compose_config, debug=debug), fragment_path.parent)
+
+    _collect(
+        (compose_config.get('sync', {}).get('pipes', None) or [])
+        + (compose_config.get('pipes', None) or []),
+        compose_config['__file__'].parent,
+    )
+    return fragments_paths
+
+
+def get_include_paths(patterns: Any, base_dir: pathlib.Path) -> List[pathlib.Path]:
+    """
+    Return the sorted file paths matching the include patterns (globs are supported).
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+
+    paths = []
+    for pattern in patterns or []:
+        pattern_path = pathlib.Path(pattern)
+        if not pattern_path.is_absolute():
+            pattern_path = base_dir / pattern_path
+        matches = sorted(glob.glob(pattern_path.as_posix(), recursive=True))
+        if not matches:
+            warn(f"No fragments match the include '{pattern}'.", stack=False)
+        for match in matches:
+            path = pathlib.Path(match).resolve()
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def get_fragment_key(fragment_path: pathlib.Path) -> str:
+    """
+    Return the cache key for a fragment from its modification time, size,
+    and the values of the environment variables it references.
+    """
+    get_env_var_names, hash_config = from_plugin_import(
+        'compose.utils.config',
+        'get_env_var_names',
+        'hash_config',
+    )
+    stat = fragment_path.stat()
+    with open(fragment_path, 'r', encoding='utf-8') as f:
+        referenced_vars = get_env_var_names(f.read())
+
+    return hash_config({
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'vars': {var: os.environ.get(var, None) for var in referenced_vars},
+    })
+
+
+def read_fragment(
+    fragment_path: pathlib.Path,
+    compose_config: Dict[str, Any],
+    debug: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Return a fragment's pipes entries, parsing the file only if it has changed.
+    """
+    fragment_key = get_fragment_key(fragment_path)
+    fragment_path_str = fragment_path.as_posix()
+
+    cached_key, cached_entries = FRAGMENTS_CACHE.get(fragment_path_str, (None, None))
+    if cached_key == fragment_key:
+        return cached_entries
+
+    disk_cache = _read_fragments_disk_cache(compose_config)
+    cached_key, cached_entries = disk_cache.get(fragment_path_str, (None, None))
+    if cached_key == fragment_key:
+        FRAGMENTS_CACHE[fragment_path_str] = (fragment_key, cached_entries)
+        return cached_entries
+
+    if debug:
+        dprint(f"Compose: Parsing fragment '{fragment_path}'...")
+
+    fragment_entries = parse_fragment(fragment_path, compose_config)
+    FRAGMENTS_CACHE[fragment_path_str] = (fragment_key, fragment_entries)
+    disk_cache[fragment_path_str] = (fragment_key, fragment_entries)
+    try:
+        _write_fragments_disk_cache(compose_config, disk_cache)
+    except Exception as e:
+        if debug:
+            warn(f"Failed to write the fragments cache:\n{e}", stack=False)
+
+    return fragment_entries
+
+
+def parse_fragment(
+    fragment_path: pathlib.Path,
+    compose_config: Dict[str, Any],
+) -> List[Dict[str, Any]]:
+    """
+    Parse a fragment file and return its pipes entries.
+    """
+    load_envyaml, replace_config_paths = from_plugin_import(
+        'compose.utils.config',
+        'load_envyaml',
+        'replace_config_paths',
+    )
+    env, _ = load_envyaml(fragment_path)
+    fragment_entries = env.get('pipes', None) or []
+    if not isinstance(fragment_entries, list):
+        warn(f"The fragment '{fragment_path}' must contain a list of `pipes`.", stack=False)
+        return []
+
+    fragment_entries = replace_config_paths(
+        fragment_entries,
+        compose_config['root_dir'],
+        '{MRSM_ROOT_DIR}',
+    )
+    return replace_config_paths(fragment_entries, fragment_path, '{__file__}')
+
+
+def get_fragments_cache_path(compose_config: Dict[str, Any]) -> pathlib.Path:
+    """
+    Return the file path to the fragments cache file.
+    """
+    root_dir_path = compose_config['root_dir']
+    return root_dir_path / '.compose-fragments.pkl'
+
+
+def _read_fragments_disk_cache(compose_config: Dict[str, Any]) -> Dict[str, Any]:
+    cache_path = get_fragments_cache_path(compose_config)
+    if not cache_path.exists():
+        return {}
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+    except Exception:
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _write_fragments_disk_cache(compose_config: Dict[str, Any], cache: Dict[str, Any]) -> None:
+    cache_path = get_fragments_cache_path(compose_config)
+    if not cache_path.parent.exists():
+        return
+    with open(cache_path, 'wb') as f:
+        pickle.dump(cache, f)
+
+
+def _is_include_entry(entry: Any) -> bool:
+    return isinstance(entry, dict) and 'include' in entry
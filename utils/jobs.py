@@ -6,20 +6,46 @@
 Utility functions for job management.
 """
 
+import os
 import copy
+import math
+import json
 import shlex
-from meerschaum.utils.typing import Dict, List, Any
+import pickle
+import pathlib
+from collections import deque
+from typing import Deque, Tuple
+
+import meerschaum as mrsm
+from meerschaum.utils.typing import Dict, List, Any, Optional, Union
 from meerschaum.utils.daemon import Daemon
 
+### These sections of the compose config are read from the instance by running jobs
+### and do not require restarting the jobs when they change.
+UNFINGERPRINTED_KEYS = ['pipes', 'jobs', '__version__']
+
+### `jobs` runs a `sync pipes` job per instance (and shard or sync group),
+### and `scheduler` runs all of the pipes from a single `compose scheduler` job.
+SYNC_MODES = ['jobs', 'scheduler']
+SCHEDULER_SYSARGS = ['compose', 'scheduler']
+
+### With `sync:adaptive` in jobs mode, each pipe's recent syncs are recorded by the jobs
+### (one file per pipe) and used to set the jobs' `--min-seconds`.
+SYNC_HISTORY_DIR_NAME: str = '.compose-sync-history'
+
 def get_jobs_commands(compose_config: Dict[str, Any]) -> Dict[str, List[str]]:
     """
     Return a mapping of jobs' names to their commands (sysargs) to run.
     """
     from plugins.compose.utils.stack import get_project_name
+    from meerschaum.config.static import STATIC_CONFIG
     from plugins.compose.utils.pipes import (
-        build_custom_connectors, get_defined_pipes,
-        instance_pipes_from_pipes_list,
+        iter_defined_pipes, get_pipe_meta_instance, get_pipe_meta_keys,
+        get_num_shards, get_shard_tag,
+        get_sync_group_defaults, get_pipe_meta_sync_group,
+        get_sync_group_tag, get_grouped_tag,
     )
+    from plugins.compose.sync import get_adaptive_config
     project_name = get_project_name(compose_config)
     explicit_jobs = compose_config.get('jobs', {})
     if explicit_jobs:
@@ -41,19 +67,321 @@ def get_jobs_commands(compose_config: Dict[str, Any]) -> Dict[str, List[str]]:
 
         return jobs
 
-    pipes = get_defined_pipes(compose_config)
-    instance_pipes = instance_pipes_from_pipes_list(pipes)
-    job_names = [
-        project_name + f' sync ({instance_keys})'
-        for instance_keys in instance_pipes
-    ]
-    schedule = compose_config.get('sync', {}).get('schedule', None)
-    min_seconds = compose_config.get('sync', {}).get('min_seconds', None)
-    timeout_seconds = compose_config.get('sync', {}).get('timeout_seconds', None)
+    if get_sync_mode(compose_config) == 'scheduler':
+        job_name = f"{project_name} scheduler"
+        compose_file_path = compose_config['__file__']
+        env_file_path = compose_config.get('__env_file__', None) or (
+            compose_file_path.parent / '.env'
+        )
+        return {
+            job_name: SCHEDULER_SYSARGS + [
+                '--file', compose_file_path.as_posix(),
+                '--env-file', pathlib.Path(env_file_path).as_posix(),
+                '--name', job_name, '-f', '-d',
+            ],
+        }
+
+    ### Only the instances, sync groups, and shards are needed,
+    ### so stream the pipes' metadata rather than building the pipes.
+    default_instance = get_default_instance(compose_config)
+    num_shards = get_num_shards(compose_config)
+    shard_tags = {get_shard_tag(project_name, shard): shard for shard in range(num_shards)}
+    adaptive_config = get_adaptive_config(
+        (compose_config.get('sync', {}) or {}).get('adaptive', None)
+    )
+    sync_groups_values = {}
+    jobs_keys = {}
+    jobs_pipes_keys = {}
+    for pipe_meta in iter_defined_pipes(compose_config, as_meta=True):
+        sync_group = get_pipe_meta_sync_group(pipe_meta, compose_config)
+        if sync_group is not None and sync_group not in sync_groups_values:
+            compose_parameters = pipe_meta['parameters']['compose']
+            sync_groups_values[sync_group] = {
+                key: compose_parameters.get(key, val)
+                for key, val in get_sync_group_defaults(compose_config).items()
+            }
+        shard = (
+            next((shard_tags[tag] for tag in pipe_meta['tags'] if tag in shard_tags), 0)
+            if num_shards > 1
+            else None
+        )
+        job_keys = (get_pipe_meta_instance(pipe_meta, default_instance), sync_group, shard)
+        jobs_keys[job_keys] = None
+        if adaptive_config is not None:
+            jobs_pipes_keys.setdefault(job_keys, []).append(
+                get_pipe_meta_keys(pipe_meta, default_instance)
+            )
+
+    instances_order = {
+        instance_keys: i
+        for i, instance_keys in enumerate(dict.fromkeys(_keys for _keys, _, _ in jobs_keys))
+    }
+    jobs_keys = sorted(
+        jobs_keys,
+        key=lambda keys: (instances_order[keys[0]], keys[1] or '', keys[2] or 0),
+    )
+
     args = compose_config.get('sync', {}).get('args', [])
     if isinstance(args, str):
         args = shlex.split(args)
+    negation_prefix = STATIC_CONFIG['system']['fetch_pipes_keys']['negation_prefix']
+
+    jobs = {}
+    for instance_keys, sync_group, shard in jobs_keys:
+        job_name = get_sync_job_name(project_name, instance_keys, sync_group, shard)
+
+        ### Tags joined by commas must all match, and negated tags are excluded.
+        ### The shard and sync group tags imply the project's tag.
+        job_tags = (
+            [get_sync_group_tag(project_name, sync_group)]
+            if sync_group is not None
+            else ([project_name] if shard is None else [])
+        )
+        if shard is not None:
+            job_tags.append(get_shard_tag(project_name, shard))
+        if sync_group is None and sync_groups_values:
+            job_tags.append(negation_prefix + get_grouped_tag(project_name))
+
+        job_sync_values = dict(
+            sync_groups_values[sync_group]
+            if sync_group is not None
+            else get_sync_group_defaults(compose_config)
+        )
+
+        ### Pipes with a schedule keep their schedule.
+        if adaptive_config is not None and not job_sync_values.get('schedule', None):
+            job_sync_values['min_seconds'] = get_adaptive_job_min_seconds(
+                compose_config,
+                jobs_pipes_keys.get((instance_keys, sync_group, shard), []),
+                adaptive_config,
+            )
+
+        jobs[job_name] = (
+            [
+                'sync', 'pipes', '-i', instance_keys, '-t', ','.join(job_tags),
+                '--name', job_name, '-f', '-d',
+            ]
+            + get_sync_args(args, **job_sync_values)
+        )
+
+    return jobs
+
+
+def get_job_env(
+    sysargs: List[str],
+    compose_config: Dict[str, Any],
+) -> Optional[Dict[str, str]]:
+    """
+    Return the environment for a job which needs more than the project's environment,
+    or `None` to use the project's environment.
+
+    The scheduler job runs the `compose` action, but the project's plugins directories
+    may not include the `compose` plugin, so add the directory of plugins injected by `init()`.
+    """
+    from plugins.compose.utils.config import get_env_dict
+    if sysargs[:len(SCHEDULER_SYSARGS)] != SCHEDULER_SYSARGS:
+        return None
+
+    env = get_env_dict(compose_config)
+    injected_plugins_path = compose_config['root_dir'] / '.internal' / 'plugins' / '.injected'
+    plugins_dir_str = env.get('MRSM_PLUGINS_DIR', None) or ''
+    plugins_dir_paths = (
+        json.loads(plugins_dir_str)
+        if plugins_dir_str.lstrip().startswith('[')
+        else ([plugins_dir_str] if plugins_dir_str else [])
+    )
+    if injected_plugins_path.as_posix() not in plugins_dir_paths:
+        plugins_dir_paths.append(injected_plugins_path.as_posix())
+    env['MRSM_PLUGINS_DIR'] = json.dumps(plugins_dir_paths, separators=(',', ':'))
+    return env
+
+
+def get_adaptive_job_min_seconds(
+    compose_config: Dict[str, Any],
+    pipes_keys: List[Tuple[str, str, str, str]],
+    adaptive_config: Dict[str, Union[int, float]],
+) -> Union[int, float]:
+    """
+    Return a sync job's `--min-seconds` from its pipes' recorded syncs (see `record_job_sync()`).
+
+    A job syncs all of its pipes each lap, so it runs at the shortest of its pipes'
+    adaptive intervals. The interval is rounded to a power of two (within the bounds)
+    so that small changes in the sync durations don't restart the job on every `compose up`.
+    """
+    from plugins.compose.sync import get_adaptive_interval
+    intervals = [
+        get_adaptive_interval(
+            read_sync_history(compose_config, pipe_keys, adaptive_config),
+            adaptive_config,
+        )
+        for pipe_keys in pipes_keys
+    ]
+    interval = min(intervals) if intervals else adaptive_config['min_seconds']
+    if interval > 0:
+        interval = min(
+            adaptive_config['max_seconds'],
+            max(adaptive_config['min_seconds'], 2 ** round(math.log2(interval))),
+        )
+    return int(interval) if float(interval).is_integer() else interval
+
+
+def get_sync_history_path(
+    compose_config: Dict[str, Any],
+    pipe_keys: Tuple[str, str, str, str],
+) -> pathlib.Path:
+    """
+    Return the file path to a pipe's recorded syncs.
+    """
+    from plugins.compose.utils.config import hash_config
+    root_dir_path = pathlib.Path(compose_config['root_dir'])
+    return root_dir_path / SYNC_HISTORY_DIR_NAME / (hash_config(list(pipe_keys)) + '.json')
+
+
+def read_sync_history(
+    compose_config: Dict[str, Any],
+    pipe_keys: Tuple[str, str, str, str],
+    adaptive_config: Dict[str, Union[int, float]],
+) -> Deque[Tuple[Optional[float], Optional[int]]]:
+    """
+    Return the moving window of a pipe's recorded syncs' durations and rows
+    (empty if the pipe has no recorded syncs).
+    """
+    history_path = get_sync_history_path(compose_config, pipe_keys)
+    try:
+        with open(history_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        records = []
+    return deque(
+        (tuple(record) for record in records if isinstance(record, list) and len(record) == 2),
+        maxlen=adaptive_config['window'],
+    )
+
+
+def is_adaptive_jobs_env() -> bool:
+    """
+    Return whether this process runs inside a compose project whose generated sync jobs
+    use `sync:adaptive` (i.e. its syncs should be recorded with `record_job_sync()`).
+    """
+    from plugins.compose.utils.config import is_compose_env, get_env_compose_config
+    from plugins.compose.sync import get_adaptive_config
+    if not is_compose_env():
+        return False
+    try:
+        compose_config = get_env_compose_config()
+    except Exception:
+        return False
+    if not compose_config or not compose_config.get('root_dir', None):
+        return False
+    return (
+        not compose_config.get('jobs', {})
+        and get_sync_mode(compose_config) == 'jobs'
+        and get_adaptive_config(
+            (compose_config.get('sync', {}) or {}).get('adaptive', None)
+        ) is not None
+    )
+
+
+def record_job_sync(
+    pipe: mrsm.Pipe,
+    success_tuple: Optional[Tuple[bool, str]] = None,
+    sync_duration: Optional[float] = None,
+    **kwargs: Any
+) -> None:
+    """
+    Record a successful sync's duration and rows to the pipe's history
+    (registered as a post-sync hook by `is_adaptive_jobs_env()` processes).
+    """
+    from plugins.compose.utils.config import get_env_compose_config
+    from plugins.compose.utils.pipes import get_pipe_keys
+    from plugins.compose.sync import get_adaptive_config, get_rows_counts, update_sync_history
+    if not success_tuple or not success_tuple[0]:
+        return None
 
+    compose_config = get_env_compose_config()
+    adaptive_config = get_adaptive_config(compose_config['sync']['adaptive'])
+    pipe_keys = get_pipe_keys(pipe)
+    rows_counts = get_rows_counts(success_tuple[1])
+    history = update_sync_history(
+        read_sync_history(compose_config, pipe_keys, adaptive_config),
+        adaptive_config,
+        sync_duration,
+        (sum(rows_counts.values()) if rows_counts else None),
+    )
+
+    history_path = get_sync_history_path(compose_config, pipe_keys)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = history_path.with_name(history_path.name + f'.{os.getpid()}.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump([list(record) for record in history], f)
+    os.replace(temp_path, history_path)
+    return None
+
+
+def get_sync_job_name(
+    project_name: str,
+    instance_keys: str,
+    sync_group: Optional[str] = None,
+    shard: Optional[int] = None,
+) -> str:
+    """
+    Return the name of the job which syncs an instance's pipes (in a sync group or shard).
+    """
+    return (
+        project_name + f' sync ({instance_keys})'
+        + (f' group {sync_group}' if sync_group is not None else '')
+        + (f' shard {shard}' if shard is not None else '')
+    )
+
+
+def are_sync_jobs_split(compose_config: Dict[str, Any]) -> bool:
+    """
+    Return whether an instance's pipes may be synced by more than one generated job
+    (i.e. `sync:shards` is set or pipes override the sync group keys).
+    """
+    from plugins.compose.utils.pipes import get_num_shards, has_sync_group_overrides
+    if compose_config.get('jobs', {}) or get_sync_mode(compose_config) != 'jobs':
+        return False
+    return get_num_shards(compose_config) > 1 or has_sync_group_overrides(compose_config)
+
+
+def get_default_instance(compose_config: Dict[str, Any]) -> str:
+    """
+    Return the project's default instance keys.
+    """
+    from meerschaum.config import get_config
+    return str(
+        compose_config.get('config', {}).get('meerschaum', {}).get('instance', None)
+        or get_config('meerschaum', 'instance')
+    )
+
+
+def get_sync_mode(compose_config: Dict[str, Any]) -> str:
+    """
+    Return the configured `sync:mode` (see `SYNC_MODES`).
+    """
+    from meerschaum.utils.warnings import warn
+    from meerschaum.utils.misc import items_str
+    sync_mode = (compose_config.get('sync', {}) or {}).get('mode', None) or 'jobs'
+    if sync_mode not in SYNC_MODES:
+        warn(
+            f"Invalid sync:mode '{sync_mode}' (must be one of {items_str(SYNC_MODES)}). "
+            + "Using 'jobs'.",
+            stack=False,
+        )
+        return 'jobs'
+    return sync_mode
+
+
+def get_sync_args(
+    args: List[str],
+    schedule: Optional[str] = None,
+    min_seconds: Union[int, float, None] = None,
+    job_timeout_seconds: Union[int, float, None] = None,
+) -> List[str]:
+    """
+    Return the `sync:args` with the flags for the schedule, cooldown, and timeout appended.
+    """
     additional_args = copy.deepcopy(args)
     if schedule:
         if (
@@ -71,19 +399,119 @@ def get_jobs_commands(compose_config: Dict[str, Any]) -> Dict[str, List[str]]:
         if '--min-seconds' not in args and '--cooldown' not in args:
             additional_args += ['--min-seconds', str(min_seconds)]
 
-    if timeout_seconds is not None:
+    if job_timeout_seconds is not None:
         if '--timeout-seconds' not in args and '--timeout' not in args:
-            additional_args += ['--timeout-seconds', str(timeout_seconds)]
+            additional_args += ['--timeout-seconds', str(job_timeout_seconds)]
+
+    return additional_args
+
+
+def get_instances_jobs_names(
+    compose_config: Dict[str, Any],
+    instances_keys: Optional[List[str]] = None,
+) -> Dict[str, List[str]]:
+    """
+    Return a mapping of instances' keys to the names of the jobs which sync to them
+    (e.g. the shards of an instance).
+
+    If `instances_keys` is provided and each instance has a single generated sync job,
+    the jobs' names are returned without reading the pipes.
+    """
+    from collections import defaultdict
+    from plugins.compose.utils.stack import get_project_name
+    if (
+        instances_keys is not None
+        and not compose_config.get('jobs', {})
+        and get_sync_mode(compose_config) == 'jobs'
+        and not are_sync_jobs_split(compose_config)
+    ):
+        project_name = get_project_name(compose_config)
+        return {
+            instance_keys: [get_sync_job_name(project_name, instance_keys)]
+            for instance_keys in instances_keys
+        }
+
+    default_instance = get_default_instance(compose_config)
+    instances_jobs_names = defaultdict(lambda: [])
+    for job_name, sysargs in get_jobs_commands(compose_config).items():
+        instance_keys = default_instance
+        for flag in ('-i', '--instance', '--mrsm-instance'):
+            if flag in sysargs and sysargs.index(flag) + 1 < len(sysargs):
+                instance_keys = sysargs[sysargs.index(flag) + 1]
+                break
+        instances_jobs_names[instance_keys].append(job_name)
+    return dict(instances_jobs_names)
+
+
+def get_job_fingerprint(sysargs: List[str], compose_config: Dict[str, Any]) -> str:
+    """
+    Return a hash of a job's command and the config sections which affect the running job.
+    """
+    import hashlib
+    from plugins.compose.utils.config import hash_config
+    from plugins.compose.utils.pipes import iter_defined_pipes
+    relevant_config = {
+        key: val
+        for key, val in compose_config.items()
+        if key not in UNFINGERPRINTED_KEYS
+    }
+    if isinstance(relevant_config.get('sync', None), dict):
+        relevant_config['sync'] = {
+            key: val
+            for key, val in relevant_config['sync'].items()
+            if key not in UNFINGERPRINTED_KEYS
+        }
+
+    ### The scheduler reads the pipes from the compose file rather than the instance,
+    ### so hash the pipes one at a time.
+    if sysargs[:len(SCHEDULER_SYSARGS)] == SCHEDULER_SYSARGS:
+        pipes_hash = hashlib.sha256()
+        for pipe_meta in iter_defined_pipes(compose_config, as_meta=True):
+            pipes_hash.update(hash_config(pipe_meta).encode('utf-8'))
+        relevant_config['pipes'] = pipes_hash.hexdigest()
+
+    return hash_config({'sysargs': sysargs, 'config': relevant_config})
 
-    commands_to_run = [
-        (
-            [
-                'sync', 'pipes', '-i', instance_keys, '-t', project_name,
-                '--name', job_name, '-f', '-d',
-            ]
-            + additional_args
-        )
-        for instance_keys, job_name in zip(instance_pipes, job_names)
-    ]
 
-    return dict(zip(job_names, commands_to_run))
+def get_jobs_fingerprints_path(compose_config: Dict[str, Any]) -> pathlib.Path:
+    """
+    Return the file path to the jobs' fingerprints cache file.
+    """
+    root_dir_path = compose_config['root_dir']
+    return root_dir_path / '.compose-jobs.pkl'
+
+
+def read_jobs_fingerprints(compose_config: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Read the fingerprints of the jobs started by the last `compose up`.
+    If no cache exists, return an empty dictionary.
+    """
+    jobs_fingerprints_path = get_jobs_fingerprints_path(compose_config)
+    if not jobs_fingerprints_path.exists():
+        return {}
+    try:
+        with open(jobs_fingerprints_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return {}
+
+
+def write_jobs_fingerprints(compose_config: Dict[str, Any], jobs_fingerprints: Dict[str, str]) -> None:
+    """
+    Write the jobs' fingerprints to the cache file.
+    """
+    jobs_fingerprints_path = get_jobs_fingerprints_path(compose_config)
+    with open(jobs_fingerprints_path, 'wb') as f:
+        pickle.dump(jobs_fingerprints, f)
+
+
+def job_is_running(job_name: str) -> bool:
+    """
+    Return whether a job exists and is currently running.
+    """
+    from meerschaum.jobs import Job
+    try:
+        job = Job(job_name)
+        return job.exists() and job.status == 'running'
+    except Exception:
+        return False
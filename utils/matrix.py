@@ -0,0 +1,136 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Expand `matrix:` entries in the pipes lists into concrete pipes, e.g.:
+
+```yaml
+sync:
+  pipes:
+    - matrix:
+        location: [1, 2, 3]
+      template:
+        connector: "sql:demo"
+        metric: "test"
+        location: "{{ location }}"
+        parameters:
+          query: "SELECT * FROM stress_test WHERE id = {{ location }}"
+```
+
+A `matrix` is either a mapping of variables to lists of values (every combination is generated)
+or a list of mappings (one pipe per mapping). Only the matrix's variables are substituted.
+"""
+
+import re
+import copy
+import itertools
+from typing import Dict, Any, Iterator
+
+from meerschaum.utils.warnings import warn
+
+TEMPLATE_VAR_PATTERN = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+
+### The pipe's keys are always rendered as strings.
+PIPE_KEYS_ATTRS = [
+    'connector', 'connector_keys',
+    'metric', 'metric_key',
+    'location', 'location_key',
+    'instance', 'instance_keys', 'mrsm_instance',
+]
+
+
+def is_matrix_entry(entry: Any) -> bool:
+    """
+    Return whether a pipes entry is a `matrix:` entry.
+    """
+    return isinstance(entry, dict) and 'matrix' in entry
+
+
+def iter_matrix_entries(entry: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the pipes entries generated from a `matrix:` entry, one combination at a time.
+
+    Parameters
+    ----------
+    entry: Dict[str, Any]
+        The `matrix:` entry. The template is either the `template:` key
+        or the rest of the entry's keys.
+
+    Returns
+    -------
+    An iterator of pipes entries.
+    """
+    template = (
+        entry['template']
+        if 'template' in entry
+        else {key: val for key, val in entry.items() if key != 'matrix'}
+    )
+    if not isinstance(template, dict):
+        warn(f"Skipping matrix with invalid template:\n{template}", stack=False)
+        return
+
+    for variables in iter_matrix_variables(entry['matrix']):
+        pipe_meta = render_template(template, variables)
+        for key in PIPE_KEYS_ATTRS:
+            if pipe_meta.get(key, None) is not None:
+                pipe_meta[key] = str(pipe_meta[key])
+        yield pipe_meta
+
+
+def iter_matrix_variables(matrix: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the variables for each combination of a matrix.
+    """
+    if isinstance(matrix, list):
+        for variables in matrix:
+            if not isinstance(variables, dict):
+                warn(f"Skipping invalid matrix row:\n{variables}", stack=False)
+                continue
+            yield variables
+        return
+
+    if not isinstance(matrix, dict):
+        warn(f"Skipping invalid matrix:\n{matrix}", stack=False)
+        return
+
+    names = list(matrix)
+    values_lists = [
+        (values if isinstance(values, list) else [values])
+        for values in matrix.values()
+    ]
+    for values in itertools.product(*values_lists):
+        yield dict(zip(names, values))
+
+
+def render_template(template: Any, variables: Dict[str, Any]) -> Any:
+    """
+    Return a copy of the template with `{{ var }}` replaced by the variables' values.
+
+    A string which is only a reference (e.g. `"{{ location }}"`) is replaced by the value itself,
+    so lists and numbers keep their types. Unknown variables are left untouched.
+    """
+    if isinstance(template, dict):
+        return {
+            render_template(key, variables): render_template(val, variables)
+            for key, val in template.items()
+        }
+
+    if isinstance(template, list):
+        return [render_template(item, variables) for item in template]
+
+    if not isinstance(template, str) or '{{' not in template:
+        return template
+
+    full_match = TEMPLATE_VAR_PATTERN.fullmatch(template.strip())
+    if full_match and full_match.group(1) in variables:
+        return copy.deepcopy(variables[full_match.group(1)])
+
+    return TEMPLATE_VAR_PATTERN.sub(
+        lambda match: (
+            str(variables[match.group(1)])
+            if match.group(1) in variables
+            else match.group(0)
+        ),
+        template,
+    )
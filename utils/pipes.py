@@ -6,10 +6,39 @@
 Utilities for managing defined pipes.
 """
 
-from typing import List, Dict, Any, Union
+import re
+from typing import List, Dict, Any, Union, Optional, Set, Tuple, Iterable, Iterator
 import meerschaum as mrsm
 from meerschaum.utils.warnings import warn, dprint
 
+PARENT_COMPOSE_KEYS = [
+    'workers',
+    'executor',
+    'connector_workers',
+    'skip_unchanged',
+    'metrics',
+    'adaptive',
+]
+
+### Compose-specific keys which may be set at the top level of a pipe's definition
+### and are moved under its `parameters:compose`.
+PIPE_COMPOSE_KEYS = [
+    'timeout_seconds',
+    'job_timeout_seconds',
+    'schedule',
+    'min_seconds',
+    'priority',
+    'max_lag',
+]
+
+### Pipes which override these `sync` keys are synced by separate jobs (one per group of values).
+### `timeout_seconds` is a child's timeout within a `plugin:compose` pipe,
+### so a pipe overrides the jobs' `--timeout-seconds` with `job_timeout_seconds`.
+SYNC_GROUP_KEYS = ['schedule', 'min_seconds', 'job_timeout_seconds']
+
+### The `sync` keys for the project-wide values of the `SYNC_GROUP_KEYS`, if named differently.
+SYNC_GROUP_CONFIG_KEYS = {'job_timeout_seconds': 'timeout_seconds'}
+
 
 def get_defined_pipes(
     compose_config: Dict[str, Any],
@@ -33,10 +62,44 @@ def get_defined_pipes(
     -------
     A list of pipes (or metadata).
     """
+    pipes = list(iter_defined_pipes(compose_config, as_meta=as_meta, cache=cache, debug=debug))
+
+    if debug:
+        dprint("Compose: Pipes metadata:")
+        mrsm.pprint(pipes if as_meta else [pipe.meta for pipe in pipes])
+
+    return pipes
+
+
+def iter_defined_pipes(
+    compose_config: Dict[str, Any],
+    as_meta: bool = False,
+    cache: bool = True,
+    debug: bool = False,
+) -> Iterator[Union[mrsm.Pipe, Dict[str, Any]]]:
+    """
+    Yield the Pipes defined in `mrsm-compose.yaml` one at a time,
+    expanding `include:` and `matrix:` entries as they are reached.
+
+    Parameters
+    ----------
+    compose_config: Dict[str, Any]
+        The Meerschaum compose configuration dictionary.
+
+    as_meta: bool, default False
+        If `True`, yield metadata (attributes) rather than `Pipe` objects.
+
+    Returns
+    -------
+    An iterator of pipes (or metadata).
+    """
     from plugins.compose.utils.stack import get_project_name
+    from plugins.compose.utils.fragments import expand_pipes_includes
+    from plugins.compose.utils.matrix import is_matrix_entry, iter_matrix_entries
     from meerschaum.config import get_config
     import copy
     project_name = get_project_name(compose_config)
+    num_shards = get_num_shards(compose_config)
     default_instance = compose_config.get(
         'config',
         {}
@@ -49,43 +112,58 @@ def get_defined_pipes(
     )
     sync_pipes_meta = compose_config.get('sync', {}).get('pipes', [])
     global_pipes_meta = compose_config.get('pipes', [])
-    _pipes_meta = sync_pipes_meta + global_pipes_meta
-    pipes_meta = []
-    for _pipe_meta in _pipes_meta:
-        pipe_meta = copy.deepcopy(_pipe_meta)
+    entries = expand_pipes_includes(sync_pipes_meta + global_pipes_meta, compose_config, debug=debug)
+
+    def _iter_pipes_meta():
+        for entry in entries:
+            if is_matrix_entry(entry):
+                yield from iter_matrix_entries(entry)
+            else:
+                yield copy.deepcopy(entry)
+
+    for pipe_meta in _iter_pipes_meta():
+        pipe_compose_parameters = {
+            key: pipe_meta.pop(key)
+            for key in PIPE_COMPOSE_KEYS
+            if key in pipe_meta
+        }
+        if pipe_compose_parameters:
+            if not pipe_meta.get('parameters', None):
+                pipe_meta['parameters'] = {}
+            if not pipe_meta['parameters'].get('compose', None):
+                pipe_meta['parameters']['compose'] = {}
+            pipe_meta['parameters']['compose'].update(pipe_compose_parameters)
         if 'tags' not in pipe_meta:
             pipe_meta['tags'] = []
         pipe_meta['tags'].append(project_name)
+        if num_shards > 1:
+            pipe_meta['tags'].append(
+                get_shard_tag(project_name, get_pipe_meta_shard(pipe_meta, num_shards))
+            )
+        sync_group = get_pipe_meta_sync_group(pipe_meta, compose_config)
+        if sync_group is not None:
+            pipe_meta['tags'].extend([
+                get_grouped_tag(project_name),
+                get_sync_group_tag(project_name, sync_group),
+            ])
         if not pipe_meta.get('instance', None):
             legacy_mrsm_instance = pipe_meta.get('mrsm_instance', None)
             if not legacy_mrsm_instance:
                 pipe_meta['instance'] = default_instance
         if 'cache' not in pipe_meta:
             pipe_meta['cache'] = cache
-        pipes_meta.append(pipe_meta)
 
-    if debug:
-        dprint("Compose: Pipes metadata:")
-        mrsm.pprint(pipes_meta)
-
-    if as_meta:
-        return pipes_meta
-
-    if debug:
-        dprint("Building pipes from metadata...")
-
-    pipes = [mrsm.Pipe(**pipe_meta) for pipe_meta in pipes_meta]
-    
-    if debug:
-        dprint("Returning pipes...")
-
-    return pipes
+        yield pipe_meta if as_meta else mrsm.Pipe(**pipe_meta)
 
 
-def build_custom_connectors(compose_config: Dict[str, Any]) -> Dict[str, Any]:
+def build_custom_connectors(
+    compose_config: Dict[str, Any],
+    connectors_keys: Optional[List[str]] = None,
+) -> Dict[str, Any]:
     """
     This function constructs the custom connectors
     so that they are stored in the in-memory registry.
+    If `connectors_keys` is provided, only build these connectors.
     """
     from meerschaum.connectors import types, custom_types
     custom_connectors_config = compose_config.get(
@@ -106,6 +184,8 @@ def build_custom_connectors(compose_config: Dict[str, Any]) -> Dict[str, Any]:
         _load_plugins = typ not in types
         for label, connector_kwargs in labels.items():
             conn_keys = typ + ':' + label
+            if connectors_keys is not None and conn_keys not in connectors_keys:
+                continue
             custom_connectors[conn_keys] = mrsm.get_connector(
                 conn_keys,
                 _load_plugins=_load_plugins,
@@ -115,7 +195,7 @@ def build_custom_connectors(compose_config: Dict[str, Any]) -> Dict[str, Any]:
     return custom_connectors
 
 
-def instance_pipes_from_pipes_list(pipes: List[mrsm.Pipe]) -> Dict[str, List[mrsm.Pipe]]:
+def instance_pipes_from_pipes_list(pipes: Iterable[mrsm.Pipe]) -> Dict[str, List[mrsm.Pipe]]:
     """
     Return a dictionary of pipes lists, grouping by instance connector keys.
     """
@@ -126,6 +206,72 @@ def instance_pipes_from_pipes_list(pipes: List[mrsm.Pipe]) -> Dict[str, List[mrs
     return instance_pipes
 
 
+def register_pipes(
+    pipes: List[mrsm.Pipe],
+    compose_config: Optional[Dict[str, Any]] = None,
+    debug: bool = False,
+) -> Dict[mrsm.Pipe, mrsm.SuccessTuple]:
+    """
+    Register new pipes, grouped by instance.
+
+    Each instance's pipes are registered in-process with `Pipe.register()`
+    rather than dispatching a `register pipes` command per pipe.
+    With `isolation: subprocess`, each pipe is instead registered in a subprocess.
+
+    Parameters
+    ----------
+    pipes: List[mrsm.Pipe]
+        The unregistered pipes to be registered.
+
+    compose_config: Optional[Dict[str, Any]], default None
+        The compose configuration, for the `isolation` mode.
+
+    Returns
+    -------
+    A dictionary mapping each pipe to its registration `SuccessTuple`.
+    """
+    import json
+    from meerschaum.plugins import from_plugin_import
+    run_mrsm_command = from_plugin_import('compose.utils', 'run_mrsm_command')
+    compose_config = compose_config or {}
+    isolated = compose_config.get('isolation', None) == 'subprocess'
+
+    results = {}
+    for instance_keys, _pipes in instance_pipes_from_pipes_list(pipes).items():
+        if debug:
+            dprint(f"Compose: Registering {len(_pipes)} pipes on '{instance_keys}'...")
+
+        for pipe in _pipes:
+            if pipe.temporary:
+                results[pipe] = (False, f"{pipe} is temporary and will not be registered.")
+                continue
+
+            if not isolated:
+                try:
+                    results[pipe] = pipe.register(debug=debug)
+                except Exception as e:
+                    results[pipe] = (False, str(e))
+                continue
+
+            results[pipe] = run_mrsm_command(
+                [
+                    'register', 'pipes',
+                    '-c', str(pipe.connector_keys),
+                    '-m', str(pipe.metric_key),
+                    '-l', str(pipe.location_key),
+                    '-i', str(pipe.instance_keys),
+                    '--params', json.dumps(pipe.parameters, separators=(',', ':')),
+                    '--noask',
+                ],
+                compose_config,
+                capture_output=False,
+                debug=debug,
+                _replace=False,
+            )
+
+    return results
+
+
 def build_parent_pipe(
     compose_config: Dict[str, Any],
 ) -> mrsm.Pipe:
@@ -148,13 +294,291 @@ def build_parent_pipe(
     project_name = get_project_name(
         compose_config
     ).replace('-', '_').lstrip('_')
+    sync_config = compose_config.get('sync', {}) or {}
+    compose_parameters = {
+        key: sync_config[key]
+        for key in PARENT_COMPOSE_KEYS
+        if key in sync_config
+    }
+    compose_parameters['project_name'] = project_name
     return mrsm.Pipe(
         'plugin:compose', project_name,
         instance=instance_keys,
         parameters={
             'children': children_pipes_meta,
-            'compose': {
-                'project_name': project_name,
-            },
+            'compose': compose_parameters,
         },
     )
+
+
+def get_pipe_keys(pipe: mrsm.Pipe) -> Tuple[str, str, str, str]:
+    """
+    Return a tuple of the pipe's connector, metric, location, and instance keys.
+    """
+    return (
+        str(pipe.connector_keys),
+        str(pipe.metric_key),
+        str(pipe.location_key),
+        str(pipe.instance_keys),
+    )
+
+
+def get_num_shards(compose_config: Dict[str, Any]) -> int:
+    """
+    Return the number of shards into which each instance's pipes are split (`sync:shards`).
+    """
+    try:
+        num_shards = int((compose_config.get('sync', {}) or {}).get('shards', None) or 1)
+    except (TypeError, ValueError):
+        warn("The value for `sync:shards` must be an integer.", stack=False)
+        return 1
+    return max(num_shards, 1)
+
+
+def get_shard_tag(project_name: str, shard: int) -> str:
+    """
+    Return the tag for the pipes in a shard.
+    """
+    return f"{project_name}-shard-{shard}"
+
+
+def is_project_tag(tag: str, project_name: str) -> bool:
+    """
+    Return whether a tag is the project's tag or one of its shard or sync group tags.
+    """
+    return (
+        tag == project_name
+        or tag == get_grouped_tag(project_name)
+        or tag.startswith(f"{project_name}-shard-")
+        or tag.startswith(f"{project_name}-group-")
+    )
+
+
+def get_sync_group_defaults(compose_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return the project-wide values for the `SYNC_GROUP_KEYS` (from `sync`).
+    """
+    sync_config = compose_config.get('sync', {}) or {}
+    return {
+        key: sync_config.get(SYNC_GROUP_CONFIG_KEYS.get(key, key), None)
+        for key in SYNC_GROUP_KEYS
+    }
+
+
+def get_pipe_meta_sync_group(
+    pipe_meta: Dict[str, Any],
+    compose_config: Dict[str, Any],
+) -> Optional[str]:
+    """
+    Return the sync group for a pipe's metadata (a hash of its `schedule`, `min_seconds`,
+    and `job_timeout_seconds`), or `None` if the pipe uses the project-wide values.
+    """
+    from plugins.compose.utils.config import hash_config
+    defaults = get_sync_group_defaults(compose_config)
+    compose_parameters = (pipe_meta.get('parameters', None) or {}).get('compose', None) or {}
+    sync_group_values = {
+        key: compose_parameters.get(key, defaults[key])
+        for key in SYNC_GROUP_KEYS
+    }
+    if sync_group_values == defaults:
+        return None
+    return hash_config(sync_group_values)[:8]
+
+
+def has_sync_group_overrides(compose_config: Dict[str, Any]) -> bool:
+    """
+    Return whether any pipes entry (or matrix template) sets one of the `SYNC_GROUP_KEYS`,
+    without expanding matrices or building pipes.
+    """
+    from plugins.compose.utils.fragments import expand_pipes_includes
+    from plugins.compose.utils.matrix import is_matrix_entry
+    sync_pipes_meta = compose_config.get('sync', {}).get('pipes', [])
+    global_pipes_meta = compose_config.get('pipes', [])
+    for entry in expand_pipes_includes(sync_pipes_meta + global_pipes_meta, compose_config):
+        if is_matrix_entry(entry):
+            entry = entry.get('template', entry)
+        if not isinstance(entry, dict):
+            continue
+        compose_parameters = (entry.get('parameters', None) or {}).get('compose', None) or {}
+        if any(key in entry or key in compose_parameters for key in SYNC_GROUP_KEYS):
+            return True
+    return False
+
+
+def get_pipe_meta_instance(pipe_meta: Dict[str, Any], default_instance: str) -> str:
+    """
+    Return the instance keys from a pipe's metadata without building the pipe.
+    """
+    return str(
+        pipe_meta.get('mrsm_instance', None)
+        or pipe_meta.get('instance', None)
+        or pipe_meta.get('instance_keys', None)
+        or default_instance
+    )
+
+
+def get_pipe_meta_keys(
+    pipe_meta: Dict[str, Any],
+    default_instance: str,
+) -> Tuple[str, str, str, str]:
+    """
+    Return the keys from a pipe's metadata as `get_pipe_keys()` would,
+    without building the pipe.
+    """
+    location = pipe_meta.get('location', None) or pipe_meta.get('location_key', None)
+    if location in ('[None]', 'None'):
+        location = None
+    return (
+        str(pipe_meta.get('connector', None) or pipe_meta.get('connector_keys', None)),
+        str(pipe_meta.get('metric', None) or pipe_meta.get('metric_key', None)),
+        str(location),
+        get_pipe_meta_instance(pipe_meta, default_instance),
+    )
+
+
+def get_sync_group_tag(project_name: str, sync_group: str) -> str:
+    """
+    Return the tag for the pipes in a sync group.
+    """
+    return f"{project_name}-group-{sync_group}"
+
+
+def get_grouped_tag(project_name: str) -> str:
+    """
+    Return the tag for all pipes in sync groups (excluded by the default jobs).
+    """
+    return f"{project_name}-grouped"
+
+
+def get_pipe_meta_shard(pipe_meta: Dict[str, Any], num_shards: int) -> int:
+    """
+    Return the shard for a pipe's metadata.
+    The shard is derived from a hash of the pipe's keys (excluding the instance)
+    so that pipes stay in the same shard between runs.
+    """
+    import hashlib
+    keys = [
+        str(pipe_meta.get(key, pipe_meta.get(alias, None)))
+        for key, alias in (
+            ('connector', 'connector_keys'),
+            ('metric', 'metric_key'),
+            ('location', 'location_key'),
+        )
+    ]
+    digest = hashlib.sha256('\0'.join(keys).encode('utf-8')).hexdigest()
+    return int(digest, 16) % num_shards
+
+
+def get_pipe_compose_parameters(pipe: mrsm.Pipe) -> Dict[str, Any]:
+    """
+    Return the compose-specific parameters of a pipe (see `PIPE_COMPOSE_KEYS`).
+    """
+    return (pipe.parameters or {}).get('compose', None) or {}
+
+
+def get_pipe_query(pipe: mrsm.Pipe) -> Optional[str]:
+    """
+    Return the SQL definition of a pipe (`query`, `sql`, or `fetch:definition`) if it exists.
+    """
+    parameters = pipe.parameters or {}
+    fetch_parameters = parameters.get('fetch', None) or {}
+    query = (
+        parameters.get('query', None)
+        or parameters.get('sql', None)
+        or (
+            fetch_parameters.get('definition', None)
+            if isinstance(fetch_parameters, dict)
+            else None
+        )
+    )
+    return query if isinstance(query, str) else None
+
+
+def get_pipes_dependencies(
+    pipes: List[mrsm.Pipe],
+    debug: bool = False,
+) -> Dict[int, Set[int]]:
+    """
+    Return a mapping of each pipe's index to the indices of the pipes it depends on.
+
+    A pipe depends on another pipe in the list if the other pipe is declared
+    under its `parents` parameter, or if its query references the other pipe's target table
+    and the other pipe is stored on the pipe's connector.
+
+    Parameters
+    ----------
+    pipes: List[mrsm.Pipe]
+        The pipes to be checked against each other.
+
+    Returns
+    -------
+    A dictionary of indices to sets of upstream indices.
+    """
+    pipes_indices = {get_pipe_keys(pipe): i for i, pipe in enumerate(pipes)}
+    dependencies = {i: set() for i in range(len(pipes))}
+
+    for i, pipe in enumerate(pipes):
+        try:
+            parents = pipe.parents
+        except Exception as e:
+            warn(f"Failed to determine the parents of {pipe}:\n{e}", stack=False)
+            parents = []
+
+        for parent in parents:
+            parent_ix = pipes_indices.get(get_pipe_keys(parent), None)
+            if parent_ix is not None and parent_ix != i:
+                dependencies[i].add(parent_ix)
+
+    instance_targets_patterns = {}
+    for i, pipe in enumerate(pipes):
+        if not pipe.target:
+            continue
+        pattern = re.compile(r'(?<!\w)' + re.escape(pipe.target) + r'(?!\w)', re.IGNORECASE)
+        instance_targets_patterns.setdefault(str(pipe.instance_keys), []).append((i, pattern))
+
+    for i, pipe in enumerate(pipes):
+        query = get_pipe_query(pipe)
+        if not query:
+            continue
+        for upstream_ix, pattern in instance_targets_patterns.get(str(pipe.connector_keys), []):
+            if upstream_ix != i and pattern.search(query):
+                dependencies[i].add(upstream_ix)
+
+    if debug:
+        dprint("Compose: Pipes dependencies:")
+        mrsm.pprint({str(pipes[i]): [str(pipes[j]) for j in deps] for i, deps in dependencies.items()})
+
+    return dependencies
+
+
+def get_dependency_levels(dependencies: Dict[int, Set[int]]) -> List[List[int]]:
+    """
+    Group pipes' indices into levels such that each pipe only depends on pipes in earlier levels.
+
+    Parameters
+    ----------
+    dependencies: Dict[int, Set[int]]
+        The mapping of indices to upstream indices (see `get_pipes_dependencies()`).
+
+    Returns
+    -------
+    A list of lists of indices, in the order they may be synced.
+    Pipes in a dependency cycle are placed together in the final level.
+    """
+    levels = []
+    placed = set()
+    remaining = sorted(dependencies)
+    while remaining:
+        level = [
+            ix
+            for ix in remaining
+            if all(upstream_ix in placed for upstream_ix in dependencies[ix])
+        ]
+        if not level:
+            levels.append(remaining)
+            break
+        levels.append(level)
+        placed.update(level)
+        remaining = [ix for ix in remaining if ix not in placed]
+
+    return levels
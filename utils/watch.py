@@ -0,0 +1,109 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Watch the project's files for changes.
+"""
+
+import time
+import pathlib
+from typing import List, Set, Iterator, Optional, Tuple
+
+import meerschaum as mrsm
+
+POLL_SECONDS: float = 1.0
+DEBOUNCE_SECONDS: float = 0.3
+
+
+def watch_paths(
+    paths: List[pathlib.Path],
+    poll_seconds: float = POLL_SECONDS,
+    debug: bool = False,
+) -> Iterator[Set[pathlib.Path]]:
+    """
+    Yield the sets of paths which have been modified, created, or deleted.
+
+    Use `watchfiles` (inotify and equivalents) if it is installed,
+    otherwise fall back to polling the files' modification times.
+
+    Parameters
+    ----------
+    paths: List[pathlib.Path]
+        The files to watch. These need not exist yet.
+
+    poll_seconds: float, default 1.0
+        How often to check the files when polling.
+
+    Returns
+    -------
+    An iterator of sets of changed paths.
+    """
+    from meerschaum.utils.packages import is_installed
+    from meerschaum.utils.warnings import dprint
+    paths = [pathlib.Path(path).resolve() for path in paths]
+
+    if is_installed('watchfiles'):
+        if debug:
+            dprint("Compose: Watching files with `watchfiles`.")
+        yield from _watch_paths_watchfiles(paths)
+        return
+
+    if debug:
+        dprint(f"Compose: Polling files every {poll_seconds} seconds.")
+    yield from _watch_paths_polling(paths, poll_seconds)
+
+
+def _watch_paths_watchfiles(paths: List[pathlib.Path]) -> Iterator[Set[pathlib.Path]]:
+    """
+    Yield changed paths as reported by `watchfiles`.
+    Watch the parent directories so that editors replacing files are detected.
+    """
+    watchfiles = mrsm.attempt_import('watchfiles', lazy=False)
+    paths_strs = {path.as_posix(): path for path in paths}
+    dir_paths = sorted({path.parent.as_posix() for path in paths})
+
+    for changes in watchfiles.watch(
+        *dir_paths,
+        watch_filter=(lambda change, path: pathlib.Path(path).as_posix() in paths_strs),
+        debounce=int(DEBOUNCE_SECONDS * 1000),
+    ):
+        changed_paths = {
+            paths_strs[pathlib.Path(path).as_posix()]
+            for _, path in changes
+            if pathlib.Path(path).as_posix() in paths_strs
+        }
+        if changed_paths:
+            yield changed_paths
+
+
+def _watch_paths_polling(
+    paths: List[pathlib.Path],
+    poll_seconds: float,
+) -> Iterator[Set[pathlib.Path]]:
+    """
+    Yield changed paths by polling their modification times and sizes.
+    """
+    stats = {path: _get_path_stat(path) for path in paths}
+    while True:
+        time.sleep(poll_seconds)
+        changed_paths = {path for path in paths if _get_path_stat(path) != stats[path]}
+        if not changed_paths:
+            continue
+
+        ### Wait for editors to finish writing before reporting the change.
+        time.sleep(DEBOUNCE_SECONDS)
+        for path in paths:
+            stats[path] = _get_path_stat(path)
+        yield changed_paths
+
+
+def _get_path_stat(path: pathlib.Path) -> Optional[Tuple[int, int]]:
+    """
+    Return a file's modification time and size (or `None` if it doesn't exist).
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,290 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+
+"""
+Keep a pool of warm interpreters for subprocess commands (`warm_workers`).
+
+Each worker imports Meerschaum with the project's environment ahead of time
+and then blocks until it is sent a command. A worker runs exactly one command and exits,
+so commands keep the isolation of a fresh subprocess without paying for the imports.
+The pool is started when a project comes up (see `prestart_warm_workers()`)
+and is topped up in a background thread after each command takes a worker.
+"""
+
+import os
+import sys
+import json
+import atexit
+import platform
+import threading
+import subprocess
+from collections import deque
+from typing import Deque, Set
+
+from meerschaum.utils.typing import Dict, Any, List, Optional, Tuple
+from meerschaum.utils.warnings import warn, dprint
+
+WARM_WORKER_CODE: str = """
+import json, os, sys
+commands_fd = int(sys.argv.pop(1))
+import meerschaum
+import meerschaum.config
+import meerschaum._internal.entry
+import meerschaum.actions
+import meerschaum.connectors
+from meerschaum.__main__ import main
+with os.fdopen(commands_fd, 'r') as commands_file:
+    command = commands_file.readline()
+if not command:
+    sys.exit(0)
+command = json.loads(command)
+os.chdir(command['cwd'])
+sys.argv = [sys.argv[0]] + command['sysargs']
+main(command['sysargs'])
+"""
+
+### Idle workers are keyed by their environment and hold the write end of their command pipe.
+WARM_WORKERS: Dict[Tuple[Tuple[str, str], ...], Deque[Tuple[subprocess.Popen, int]]] = {}
+
+### The environments whose pools are being topped up in a background thread.
+REPLENISHING_KEYS: Set[Tuple[Tuple[str, str], ...]] = set()
+
+### Commands may be run concurrently (e.g. from `run_initial_syncs()`).
+WARM_WORKERS_LOCK = threading.Lock()
+
+
+def get_num_warm_workers(compose_config: Dict[str, Any]) -> int:
+    """
+    Return the number of warm workers to keep for the project (0 disables the pool).
+    """
+    from meerschaum.config.static import STATIC_CONFIG
+    if platform.system() == 'Windows':
+        return 0
+
+    ### Daemons capture their children's output line by line, so let them spawn as usual.
+    if os.environ.get(STATIC_CONFIG['environment']['daemon_id'], None):
+        return 0
+
+    num_workers = compose_config.get('warm_workers', None)
+    if not num_workers:
+        return 0
+    try:
+        return max(0, int(num_workers))
+    except (TypeError, ValueError):
+        warn(f"Invalid value for warm_workers: {num_workers}", stack=False)
+        return 0
+
+
+def get_env_key(env: Optional[Dict[str, str]] = None) -> Tuple[Tuple[str, str], ...]:
+    """
+    Return the key of an environment's pool (defaults to `os.environ`).
+    """
+    env_dict = dict(env if isinstance(env, dict) else os.environ)
+    return tuple(sorted((str(k), str(v)) for k, v in env_dict.items()))
+
+
+def prestart_warm_workers(compose_config: Dict[str, Any], debug: bool = False) -> None:
+    """
+    Start the project's warm workers in the background
+    so that its first subprocess commands don't start cold.
+    """
+    from meerschaum.plugins import from_plugin_import
+    get_env_dict = from_plugin_import('compose.utils.config', 'get_env_dict')
+    num_workers = get_num_warm_workers(compose_config)
+    if not num_workers:
+        return
+
+    env_dict = get_env_dict(compose_config)
+    key = get_env_key(env_dict)
+    stop_warm_workers(exclude_key=key)
+    replenish_warm_workers_in_background(key, env_dict, num_workers, debug=debug)
+
+
+def run_warm_command(
+    sysargs: List[str],
+    env: Optional[Dict[str, str]] = None,
+    num_workers: int = 1,
+    debug: bool = False,
+) -> int:
+    """
+    Run a Meerschaum command in a warm worker and return its exit code.
+
+    Parameters
+    ----------
+    sysargs: List[str]
+        The arguments to pass to `mrsm`.
+
+    env: Optional[Dict[str, str]], default None
+        The environment for the worker. Defaults to `os.environ`.
+
+    num_workers: int, default 1
+        How many idle workers to keep for this environment.
+
+    Returns
+    -------
+    The exit code of the command (like `run_python_package()`).
+    """
+    env_dict = dict(env if isinstance(env, dict) else os.environ)
+    key = get_env_key(env_dict)
+    stop_warm_workers(exclude_key=key)
+
+    with WARM_WORKERS_LOCK:
+        worker = get_idle_worker(key)
+
+    ### The pool is empty when it wasn't prestarted or commands outpace the replenishing.
+    if worker is None:
+        worker = spawn_warm_worker(env_dict, debug=debug)
+    proc, commands_fd = worker
+
+    replenish_warm_workers_in_background(key, env_dict, num_workers, debug=debug)
+    if debug:
+        dprint(f"Running {sysargs} in warm worker {proc.pid}.")
+
+    command = json.dumps({'sysargs': [str(arg) for arg in sysargs], 'cwd': os.getcwd()})
+    try:
+        with os.fdopen(commands_fd, 'w') as commands_file:
+            commands_file.write(command + '\n')
+    except OSError as e:
+        warn(f"Failed to send a command to warm worker {proc.pid}:\n{e}", stack=False)
+        proc.kill()
+        return 1
+
+    try:
+        return proc.wait()
+    except KeyboardInterrupt:
+        ### The worker shares our process group, so it received the interrupt too.
+        try:
+            proc.wait(timeout=5)
+        except (subprocess.TimeoutExpired, KeyboardInterrupt):
+            proc.kill()
+        return 1
+
+
+def get_idle_worker(
+    key: Tuple[Tuple[str, str], ...],
+) -> Optional[Tuple[subprocess.Popen, int]]:
+    """
+    Pop a live idle worker for an environment, discarding any which have exited
+    (the caller must hold `WARM_WORKERS_LOCK`).
+    """
+    workers = WARM_WORKERS.get(key, None) or deque()
+    while workers:
+        proc, commands_fd = workers.popleft()
+        if proc.poll() is None:
+            return proc, commands_fd
+        os.close(commands_fd)
+    return None
+
+
+def spawn_warm_worker(
+    env: Dict[str, str],
+    debug: bool = False,
+) -> Tuple[subprocess.Popen, int]:
+    """
+    Start a worker which imports Meerschaum and waits for a command on a pipe.
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, '-c', WARM_WORKER_CODE, str(read_fd)],
+            pass_fds=(read_fd,),
+            env=env,
+        )
+    except Exception:
+        os.close(write_fd)
+        raise
+    finally:
+        os.close(read_fd)
+
+    if debug:
+        dprint(f"Started warm worker {proc.pid}.")
+    return proc, write_fd
+
+
+def replenish_warm_workers(
+    key: Tuple[Tuple[str, str], ...],
+    env: Dict[str, str],
+    num_workers: int,
+    debug: bool = False,
+) -> None:
+    """
+    Start workers until the environment has `num_workers` idle workers
+    (including any taken by commands while starting them).
+    """
+    while True:
+        ### Release the background thread's claim only once the pool is full.
+        with WARM_WORKERS_LOCK:
+            num_missing = num_workers - len(WARM_WORKERS.setdefault(key, deque()))
+            if num_missing <= 0:
+                REPLENISHING_KEYS.discard(key)
+                return
+
+        new_workers = []
+        failed = False
+        for _ in range(num_missing):
+            try:
+                new_workers.append(spawn_warm_worker(env, debug=debug))
+            except Exception as e:
+                warn(f"Failed to start a warm worker:\n{e}", stack=False)
+                failed = True
+                break
+
+        ### Concurrent commands may have topped up the pool in the meantime.
+        with WARM_WORKERS_LOCK:
+            workers = WARM_WORKERS.setdefault(key, deque())
+            while new_workers and len(workers) < num_workers:
+                workers.append(new_workers.pop())
+
+        for _, commands_fd in new_workers:
+            os.close(commands_fd)
+
+        if failed:
+            return
+
+
+def replenish_warm_workers_in_background(
+    key: Tuple[Tuple[str, str], ...],
+    env: Dict[str, str],
+    num_workers: int,
+    debug: bool = False,
+) -> None:
+    """
+    Top up an environment's pool from a daemon thread (one thread per environment at a time).
+    """
+    with WARM_WORKERS_LOCK:
+        if key in REPLENISHING_KEYS:
+            return
+        REPLENISHING_KEYS.add(key)
+
+    def _replenish() -> None:
+        try:
+            replenish_warm_workers(key, env, num_workers, debug=debug)
+        finally:
+            with WARM_WORKERS_LOCK:
+                REPLENISHING_KEYS.discard(key)
+
+    threading.Thread(target=_replenish, daemon=True).start()
+
+
+def stop_warm_workers(exclude_key: Optional[Tuple[Tuple[str, str], ...]] = None) -> None:
+    """
+    Stop the idle workers (except those for `exclude_key`).
+    Closing a worker's pipe lets it exit without running a command.
+    """
+    with WARM_WORKERS_LOCK:
+        stopped_workers = [
+            worker
+            for key in list(WARM_WORKERS)
+            if key != exclude_key
+            for worker in WARM_WORKERS.pop(key)
+        ]
+
+    for _, commands_fd in stopped_workers:
+        try:
+            os.close(commands_fd)
+        except OSError:
+            pass
+
+
+atexit.register(stop_warm_workers)